@@ -1,6 +1,9 @@
 import random
 import poker_game as pk
 import poker_util as pu
+import equity as eq
+import preflop as pf
+from events import LOG, EVENT_HAND_RESULT, EVENT_AGENT_NAMED, EVENT_RL_STATE
 import numpy as np
 
 class BaseAgent:
@@ -10,23 +13,34 @@ class BaseAgent:
         self.replay_buffer = {}
 
     def analyze_amount_won(self, showdown_state: pk.ShowdownState) -> None:
-        # check if player is in winners list
+        # with side pots, add up this player's share of every pot they won
+        if showdown_state.pots:
+            amount = 0
+            split = False
+            for pot in showdown_state.pots:
+                for winner, share in pot.shares():
+                    if winner.name == self.player_name:
+                        amount += share
+                        split = split or len(pot.winners) > 1
+            if LOG.enabled:
+                LOG.emit(EVENT_HAND_RESULT, player=self.player_name, amount=amount, split=split)
+            return amount
 
+        # check if player is in winners list
         for player in showdown_state.winners: 
             if player.name == self.player_name:
                 # check if split pot scenario
-                print("\nplayer is in winners list: ", player.name)
                 if len(showdown_state.winners) > 1:
                     split_pot = showdown_state.pot // len(showdown_state.winners)
-                    if pk.DEBUG:
-                        print(f"{self.player_name} won {split_pot} chips in a split pot.")
+                    if LOG.enabled:
+                        LOG.emit(EVENT_HAND_RESULT, player=self.player_name, amount=split_pot, split=True)
                     return split_pot
                 else:
-                    if pk.DEBUG:
-                        print(f"{self.player_name} won {showdown_state.pot} chips.")
+                    if LOG.enabled:
+                        LOG.emit(EVENT_HAND_RESULT, player=self.player_name, amount=showdown_state.pot, split=False)
                     return showdown_state.pot
-        if pk.DEBUG:
-            print(f"{self.player_name} lost the hand.")
+        if LOG.enabled:
+            LOG.emit(EVENT_HAND_RESULT, player=self.player_name, amount=0, split=False)
         return 0
 
     def analyze_showdown(self, showdown_state: pk.ShowdownState) -> None:
@@ -82,8 +96,8 @@ class BaseAgent:
     def dynamically_set_name(self, game_state: pk.PokerGameStateSnapshot) -> None:
         if self.player_name is None:
             self.player_name = game_state.current_player.name
-            if pk.DEBUG:
-                print(f"Agent name set to {self.player_name}")
+            if LOG.enabled:
+                LOG.emit(EVENT_AGENT_NAMED, player=self.player_name)
 
     def act(self, game_state: pk.PokerGameStateSnapshot) -> pk.Action:
         self.dynamically_set_name(game_state)
@@ -200,101 +214,71 @@ class SmartAgentBase(BaseAgent):
     def __init__(self):
         super().__init__()
         self.rules = pk.PokerRules()
+        # runs in process so it fits inside a single decision
+        self.equity_calculator = eq.EquityCalculator(processes=1, cache=eq.EQUITY_CACHE)
 
     def get_current_players_best_hand(self, game_state: pk.PokerGameStateSnapshot) -> pu.Hand:
         """Get the best hand of the player."""
+        cards = game_state.current_player.hand + game_state.community_cards
+        if len(cards) < 5:
+            return None  # before the flop
+        return self.rules.best_hand(cards)
+
+    def get_current_players_hand_rank(self, game_state: pk.PokerGameStateSnapshot) -> int:
+        """Get the HandCategory of the player's best hand, or -1 before the flop."""
+        category = game_state.hand_category
+        return -1 if category is None else category
+
+    def get_current_players_equity(self, game_state: pk.PokerGameStateSnapshot, samples: int = 2000,
+                                   time_budget: float = None) -> float:
+        """
+        Get the player's share of the pot against random hands for every opponent still in the hand.
+        Preflop it is read from the precomputed table when one has been generated.
+        """
         current_player = game_state.current_player
-        hand = current_player.hand
-        community_cards = game_state.community_cards
-
-        # Combine hand and community cards to evaluate the best hand
-        all_cards = hand + community_cards
-        import itertools
-        all_combinations = list(itertools.combinations(all_cards, 5))
-
-        best_hand = self.rules.get_best_hand(all_combinations)
-        return best_hand
+        opponents = len([p for p in game_state.players if p is not current_player and p.status != pk.PLAYER_STATUS_FOLDED])
+        preflop_table = pf.load_default_table()
+        if not game_state.community_cards and preflop_table is not None and opponents <= pf.MAX_RANDOM_OPPONENTS:
+            return preflop_table.equity(current_player.hand, max(1, opponents))
+        return self.equity_calculator.equity(
+            current_player.hand, game_state.community_cards, max(1, opponents), samples, time_budget
+        ).equity
 
     def i_have_at_least_a_pair(self, game_state: pk.PokerGameStateSnapshot) -> bool:
         #"""Check if the player has at least a pair."""
-        best_hand:pu.Hand = self.get_current_players_best_hand(game_state)
-        return isinstance(best_hand, pu.OnePair) or \
-                isinstance(best_hand, pu.TwoPair) or \
-                isinstance(best_hand, pu.ThreeOfAKind) or \
-                isinstance(best_hand, pu.Straight) or \
-                isinstance(best_hand, pu.Flush) or \
-                isinstance(best_hand, pu.FullHouse) or \
-                isinstance(best_hand, pu.FourOfAKind) or \
-                isinstance(best_hand, pu.StraightFlush) or \
-                isinstance(best_hand, pu.RoyalFlush)
+        return game_state.at_least(pu.HandCategory.ONE_PAIR)
 
     def i_have_at_least_two_pair(self, game_state: pk.PokerGameStateSnapshot) -> bool:
         """Check if the player has at least two pair."""
-        best_hand:pu.Hand = self.get_current_players_best_hand(game_state)
-        return isinstance(best_hand, pu.TwoPair) or \
-                isinstance(best_hand, pu.ThreeOfAKind) or \
-                isinstance(best_hand, pu.Straight) or \
-                isinstance(best_hand, pu.Flush) or \
-                isinstance(best_hand, pu.FullHouse) or \
-                isinstance(best_hand, pu.FourOfAKind) or \
-                isinstance(best_hand, pu.StraightFlush) or \
-                isinstance(best_hand, pu.RoyalFlush)
+        return game_state.at_least(pu.HandCategory.TWO_PAIR)
     
     def i_have_at_least_three_of_a_kind(self, game_state: pk.PokerGameStateSnapshot) -> bool:
         """Check if the player has at least three of a kind."""
-        best_hand:pu.Hand = self.get_current_players_best_hand(game_state)
-        return isinstance(best_hand, pu.ThreeOfAKind) or \
-                isinstance(best_hand, pu.Straight) or \
-                isinstance(best_hand, pu.Flush) or \
-                isinstance(best_hand, pu.FullHouse) or \
-                isinstance(best_hand, pu.FourOfAKind) or \
-                isinstance(best_hand, pu.StraightFlush) or \
-                isinstance(best_hand, pu.RoyalFlush)
+        return game_state.at_least(pu.HandCategory.THREE_OF_A_KIND)
     
     def i_have_at_least_a_straight(self, game_state: pk.PokerGameStateSnapshot) -> bool:
         """Check if the player has at least a straight."""
-        best_hand:pu.Hand = self.get_current_players_best_hand(game_state)
-        return isinstance(best_hand, pu.Straight) or \
-                isinstance(best_hand, pu.Flush) or \
-                isinstance(best_hand, pu.FullHouse) or \
-                isinstance(best_hand, pu.FourOfAKind) or \
-                isinstance(best_hand, pu.StraightFlush) or \
-                isinstance(best_hand, pu.RoyalFlush)
+        return game_state.at_least(pu.HandCategory.STRAIGHT)
     
     def i_have_at_least_a_flush(self, game_state: pk.PokerGameStateSnapshot) -> bool:
         """Check if the player has at least a flush."""
-        best_hand:pu.Hand = self.get_current_players_best_hand(game_state)
-        return isinstance(best_hand, pu.Flush) or \
-                isinstance(best_hand, pu.FullHouse) or \
-                isinstance(best_hand, pu.FourOfAKind) or \
-                isinstance(best_hand, pu.StraightFlush) or \
-                isinstance(best_hand, pu.RoyalFlush)
+        return game_state.at_least(pu.HandCategory.FLUSH)
     
     def i_have_at_least_a_full_house(self, game_state: pk.PokerGameStateSnapshot) -> bool:
         """Check if the player has at least a full house."""
-        best_hand:pu.Hand = self.get_current_players_best_hand(game_state)
-        return isinstance(best_hand, pu.FullHouse) or \
-                isinstance(best_hand, pu.FourOfAKind) or \
-                isinstance(best_hand, pu.StraightFlush) or \
-                isinstance(best_hand, pu.RoyalFlush)
+        return game_state.at_least(pu.HandCategory.FULL_HOUSE)
     
     def i_have_at_least_a_four_of_a_kind(self, game_state: pk.PokerGameStateSnapshot) -> bool:
         """Check if the player has at least a four of a kind."""
-        best_hand:pu.Hand = self.get_current_players_best_hand(game_state)
-        return isinstance(best_hand, pu.FourOfAKind) or \
-                isinstance(best_hand, pu.StraightFlush) or \
-                isinstance(best_hand, pu.RoyalFlush)
+        return game_state.at_least(pu.HandCategory.FOUR_OF_A_KIND)
     
     def i_have_at_least_a_straight_flush(self, game_state: pk.PokerGameStateSnapshot) -> bool:
         """Check if the player has at least a straight flush."""
-        best_hand:pu.Hand = self.get_current_players_best_hand(game_state)
-        return isinstance(best_hand, pu.StraightFlush) or \
-                isinstance(best_hand, pu.RoyalFlush)
+        return game_state.at_least(pu.HandCategory.STRAIGHT_FLUSH)
     
     def i_have_at_least_a_royal_flush(self, game_state: pk.PokerGameStateSnapshot) -> bool:
         """Check if the player has at least a royal flush."""
-        best_hand:pu.Hand = self.get_current_players_best_hand(game_state)
-        return isinstance(best_hand, pu.RoyalFlush)
+        return game_state.at_least(pu.HandCategory.ROYAL_FLUSH)
 
 class PairBetterAgent(SmartAgentBase):
     def __init__(self):
@@ -333,6 +317,41 @@ class FlushBetterAgent(SmartAgentBase):
 
 
 
+PHASE_VECTOR = {
+    pk.PHASE_PRE_FLOP: 0,
+    pk.PHASE_FLOP: 1,
+    pk.PHASE_TURN: 2,
+    pk.PHASE_RIVER: 3
+}
+STATUS_VECTOR = {
+    pk.PLAYER_STATUS_WAITING: 0,
+    pk.PLAYER_STATUS_FOLDED: 1,
+    pk.PLAYER_STATUS_CHECKED: 2,
+    pk.PLAYER_STATUS_CALLED: 3,
+    pk.PLAYER_STATUS_RAISED: 4,
+    pk.PLAYER_STATUS_ALL_IN: 5
+}
+# pot, current bet, phase, 5 community cards and 2 hole cards as (value, suit), stack, status
+OBSERVATION_SIZE = 19
+
+def vectorize_game_states(game_states) -> np.ndarray:
+    """
+    Batched RLAgent.vectorize_game_state: one row per snapshot in the same
+    layout, as an (N, OBSERVATION_SIZE) float32 array.
+    """
+    rows = []
+    for game_state in game_states:
+        player = game_state.current_player
+        row = [game_state.pot, game_state.current_bet, PHASE_VECTOR.get(game_state.phase, -1)]
+        for card in game_state.community_cards:
+            row += (card.value, card.suit_index)
+        row += (0, 0) * (5 - len(game_state.community_cards))
+        for card in player.hand:
+            row += (card.value, card.suit_index)
+        row += (player.stack, STATUS_VECTOR.get(player.status, -1))
+        rows.append(row)
+    return np.array(rows, dtype=np.float32).reshape(len(rows), OBSERVATION_SIZE)
+
 class RLAgent(BaseAgent):
     def __init__(self, filename: str = 'rl_agent.csv'):
         super().__init__()
@@ -385,10 +404,10 @@ class RLAgent(BaseAgent):
         # Vectorize the current player's status
         current_player_status = self._vectorize_status(game_state.current_player.status)
 
-        if pk.DEBUG:
-            print(f"Pot size: {pot_size}, Current bet: {current_bet}, Phase: {phase_vector}, "
-                  f"Community cards: {community_cards_vector}, Player hand: {current_player_hand_vector}, "
-                  f"Player stack: {current_player_stack}, Player status: {current_player_status}")
+        if LOG.enabled:
+            LOG.emit(EVENT_RL_STATE, player=self.player_name, pot=pot_size, current_bet=current_bet, phase=phase_vector,
+                     community_cards=community_cards_vector, hand=current_player_hand_vector,
+                     stack=current_player_stack, status=current_player_status)
 
         # Combine all vectors into a single numpy array
         state_vector = np.concatenate([
@@ -403,27 +422,9 @@ class RLAgent(BaseAgent):
 
         return state_vector
     
-    def _map_suit_to_number(self, suit: str) -> int:
-        """
-        Maps the suit of a card to a numerical value.
-        """
-        suit_mapping = {
-            pu.SUIT_HEARTS: 0,
-            pu.SUIT_DIAMONDS: 1,
-            pu.SUIT_CLUBS: 2,
-            pu.SUIT_SPADES: 3
-        }
-        return suit_mapping.get(suit, -1)
-
     def _vectorize_phase(self, phase: str):
         # map phase to a number
-        phase_mapping = {
-            pk.PHASE_PRE_FLOP: 0,
-            pk.PHASE_FLOP: 1,
-            pk.PHASE_TURN: 2,
-            pk.PHASE_RIVER: 3
-        }
-        return phase_mapping.get(phase, -1)
+        return PHASE_VECTOR.get(phase, -1)
 
     def _vectorize_cards(self, cards: list[pu.Card], community: bool = False):
         """
@@ -433,10 +434,8 @@ class RLAgent(BaseAgent):
         cards_vector = []
 
         for card in cards:
-            rank_num = card.get_card_rank_value(card.rank)
-            suit_num = self._map_suit_to_number(card.suit)
-            cards_vector.append(rank_num)
-            cards_vector.append(suit_num)
+            cards_vector.append(card.value)
+            cards_vector.append(card.suit_index)
 
         if community:
             if len(cards) < 5:
@@ -451,15 +450,7 @@ class RLAgent(BaseAgent):
         """
         Converts the player's status into a numerical value.
         """
-        statuses = {
-            pk.PLAYER_STATUS_WAITING: 0,
-            pk.PLAYER_STATUS_FOLDED: 1,
-            pk.PLAYER_STATUS_CHECKED: 2,
-            pk.PLAYER_STATUS_CALLED: 3,
-            pk.PLAYER_STATUS_RAISED: 4,
-            pk.PLAYER_STATUS_ALL_IN: 5
-        }
-        return statuses.get(status, -1)  # Default to -1 if status is unknown
+        return STATUS_VECTOR.get(status, -1)  # Default to -1 if status is unknown
 
     def save_vectorized_state(self, state_vector: np.ndarray, game_state: pk.PokerGameStateSnapshot) -> None:
         """
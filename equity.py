@@ -0,0 +1,255 @@
+import os
+import time
+from itertools import combinations
+from math import comb
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from statistics import NormalDist
+
+import numpy as np
+import poker_util as pu
+from cache import LRUCache
+
+DEFAULT_SAMPLES = 20000
+DEFAULT_CHUNK_SIZE = 5000
+DEFAULT_CONFIDENCE = 0.95
+# situations with at most this many (runout, opponent holdings) combinations
+# are enumerated exactly instead of sampled
+DEFAULT_EXACT_THRESHOLD = 250000
+EQUITY_CACHE_BYTES = 8 * 1024 * 1024
+
+# shared by calculators created with cache=EQUITY_CACHE, keyed on the suit
+# canonical key of the hole cards and board and the query settings
+EQUITY_CACHE = LRUCache(max_bytes=EQUITY_CACHE_BYTES)
+
+class EquityResult:
+    def __init__(self, equity, std_error, confidence, samples, elapsed, exact=False):
+        self.equity = equity  # expected share of the pot, ties split
+        self.std_error = std_error
+        self.confidence = confidence
+        self.samples = samples  # runouts sampled, or every combination when exact
+        self.elapsed = elapsed  # seconds spent computing
+        self.exact = exact
+
+        margin = NormalDist().inv_cdf(0.5 + confidence / 2) * std_error
+        self.low = max(0.0, equity - margin)
+        self.high = min(1.0, equity + margin)
+
+    def __repr__(self):
+        return (f"EquityResult(equity={self.equity:.4f}, interval=({self.low:.4f}, {self.high:.4f}), "
+                f"samples={self.samples}, exact={self.exact}, elapsed={self.elapsed:.3f})")
+
+def _known_card_ids(hole_cards, board, dead_cards):
+    if len(hole_cards) != 2:
+        raise pu.PokerException("Equity needs exactly two hole cards")
+    if len(board) > 5:
+        raise pu.PokerException("The board cannot have more than 5 cards")
+    known = [card.id for card in list(hole_cards) + list(board) + list(dead_cards)]
+    if len(set(known)) != len(known):
+        raise pu.PokerException("The same card appears more than once")
+    return np.array([card.id for card in hole_cards], dtype=np.int64), np.array([card.id for card in board], dtype=np.int64), known
+
+def _pot_shares(hero_strengths, opponent_strengths):
+    """Share of the pot the hero wins in each row, given an (N, K) array of opponent strengths."""
+    best_opponent = opponent_strengths.max(axis=1)
+    tied = (opponent_strengths == hero_strengths[:, None]).sum(axis=1)
+    return np.where(hero_strengths > best_opponent, 1.0,
+                    np.where(hero_strengths == best_opponent, 1.0 / (1 + tied), 0.0))
+
+def _simulate_chunk(hole_ids, board_ids, known_ids, opponents, samples, seed):
+    """
+    Deal samples random runouts and opponent hands from the unseen cards and
+    return (sum of pot shares, sum of squared pot shares, samples).
+    """
+    rng = np.random.default_rng(seed)
+    unseen = np.setdiff1d(np.arange(52), known_ids)
+    board_needed = 5 - len(board_ids)
+    needed = board_needed + 2 * opponents
+    dealt = unseen[rng.random((samples, len(unseen))).argsort(axis=1)[:, :needed]]
+
+    board = np.concatenate([np.broadcast_to(board_ids, (samples, len(board_ids))), dealt[:, :board_needed]], axis=1)
+    hero = np.concatenate([np.broadcast_to(hole_ids, (samples, 2)), board], axis=1)
+    opponent_hands = np.concatenate([
+        dealt[:, board_needed:].reshape(samples, opponents, 2),
+        np.broadcast_to(board[:, None, :], (samples, opponents, 5))
+    ], axis=2).reshape(samples * opponents, 7)
+
+    shares = _pot_shares(pu.evaluate_batch(hero), pu.evaluate_batch(opponent_hands).reshape(samples, opponents))
+    return float(shares.sum()), float((shares * shares).sum()), samples
+
+def count_combinations(known_cards: int, board_cards: int, opponents: int) -> int:
+    """Number of (runout, opponent holdings) combinations exact enumeration has to evaluate."""
+    unseen = 52 - known_cards
+    board_needed = 5 - board_cards
+    count = comb(unseen, board_needed)
+    for opponent in range(opponents):
+        count *= comb(unseen - board_needed - 2 * opponent, 2)
+    return count
+
+def _enumerate_exact(hole_ids, board_ids, known_ids, opponents):
+    """
+    Evaluate every runout and every holding of every opponent in one batch and
+    return (sum of pot shares, combinations).
+    """
+    unseen = np.setdiff1d(np.arange(52), known_ids)
+    board_needed = 5 - len(board_ids)
+    runouts = list(combinations(unseen.tolist(), board_needed))
+    runouts = np.array(runouts, dtype=np.int64).reshape(len(runouts), board_needed)
+    boards = np.concatenate([np.broadcast_to(board_ids, (len(runouts), len(board_ids))), runouts], axis=1)
+    hero_strengths = pu.evaluate_batch(np.concatenate([np.broadcast_to(hole_ids, (len(boards), 2)), boards], axis=1))
+
+    # rows are (runout index, used card mask, opponent hole cards so far). each
+    # opponent crosses every row with every unseen pair and drops the overlaps
+    pairs = np.array(list(combinations(unseen.tolist(), 2)), dtype=np.int64)
+    pair_masks = (np.int64(1) << pairs[:, 0]) | (np.int64(1) << pairs[:, 1])
+    rows = np.arange(len(runouts))
+    used = np.bitwise_or.reduce(np.int64(1) << runouts, axis=1) if board_needed else np.zeros(len(runouts), dtype=np.int64)
+    holdings = []
+    for _ in range(opponents):
+        row_index = np.repeat(np.arange(len(rows)), len(pairs))
+        pair_index = np.tile(np.arange(len(pairs)), len(rows))
+        keep = (used[row_index] & pair_masks[pair_index]) == 0
+        row_index = row_index[keep]
+        pair_index = pair_index[keep]
+        rows = rows[row_index]
+        used = used[row_index] | pair_masks[pair_index]
+        holdings = [holding[row_index] for holding in holdings] + [pairs[pair_index]]
+
+    opponent_hands = np.concatenate([
+        np.stack(holdings, axis=1),
+        np.broadcast_to(boards[rows][:, None, :], (len(rows), opponents, 5))
+    ], axis=2).reshape(len(rows) * opponents, 7)
+    shares = _pot_shares(hero_strengths[rows], pu.evaluate_batch(opponent_hands).reshape(len(rows), opponents))
+    return float(shares.sum()), len(rows)
+
+def _result(totals, confidence, started):
+    total, total_squares, samples = totals
+    if samples == 0:
+        raise pu.PokerException("No samples were simulated within the budget")
+    equity = total / samples
+    variance = max(0.0, total_squares / samples - equity * equity)
+    std_error = (variance / samples) ** 0.5
+    return EquityResult(equity, std_error, confidence, samples, time.perf_counter() - started)
+
+class EquityCalculator:
+    """
+    Monte Carlo equity against random opponent hands. Samples are split into
+    chunks that run on a process pool, which is created on first use and kept
+    for later calls. With processes=1 every chunk runs in the calling process,
+    which is the better choice for short per decision budgets. Results are
+    stored in cache, an LRUCache, when one is given.
+    """
+    def __init__(self, processes=None, chunk_size=DEFAULT_CHUNK_SIZE, seed=None,
+                 exact_threshold=DEFAULT_EXACT_THRESHOLD, cache=None):
+        self.processes = processes
+        self.chunk_size = chunk_size
+        self.exact_threshold = exact_threshold
+        self.cache = cache
+        self.seed_sequence = np.random.SeedSequence(seed)
+        self._pool = None
+
+    def equity(self, hole_cards, board=(), opponents=1, samples=DEFAULT_SAMPLES,
+               time_budget=None, dead_cards=(), confidence=DEFAULT_CONFIDENCE) -> EquityResult:
+        """
+        Estimate the hero's share of the pot against opponents random hands.
+        Stops after samples runouts or time_budget seconds, whichever comes
+        first; pass samples=None to run for the whole time budget. Spots with
+        no more than exact_threshold combinations are enumerated exactly
+        instead, ignoring both budgets.
+        """
+        if self.cache is not None and not dead_cards:
+            # relabelling suits never changes equity, so suit isomorphic spots share an entry
+            key = (pu.canonical_key(hole_cards, board), opponents, samples, time_budget, confidence, self.exact_threshold)
+            return self.cache.get_or_compute(
+                key, lambda: self._equity(hole_cards, board, opponents, samples, time_budget, dead_cards, confidence)
+            )
+        return self._equity(hole_cards, board, opponents, samples, time_budget, dead_cards, confidence)
+
+    def _equity(self, hole_cards, board, opponents, samples, time_budget, dead_cards, confidence):
+        if opponents < 1:
+            raise pu.PokerException("Equity needs at least one opponent")
+        if samples is None and time_budget is None:
+            raise pu.PokerException("Equity needs a sample budget, a time budget or both")
+        started = time.perf_counter()
+        deadline = None if time_budget is None else started + time_budget
+        hole_ids, board_ids, known_ids = _known_card_ids(hole_cards, board, dead_cards)
+        if len(known_ids) + 5 - len(board_ids) + 2 * opponents > 52:
+            raise pu.PokerException("Not enough cards left to deal every opponent")
+        job = (hole_ids, board_ids, known_ids, opponents)
+
+        if count_combinations(len(known_ids), len(board_ids), opponents) <= self.exact_threshold:
+            total, combinations_count = _enumerate_exact(*job)
+            return EquityResult(total / combinations_count, 0.0, confidence, combinations_count,
+                                time.perf_counter() - started, exact=True)
+        if self.processes == 1:
+            return self._run_inline(job, samples, deadline, confidence, started)
+        return self._run_pool(job, samples, deadline, confidence, started)
+
+    def _chunks(self, samples):
+        """Yield (chunk size, seed) pairs until the sample budget is used up."""
+        remaining = samples
+        while remaining is None or remaining > 0:
+            size = self.chunk_size if remaining is None else min(self.chunk_size, remaining)
+            if remaining is not None:
+                remaining -= size
+            yield size, self.seed_sequence.spawn(1)[0]
+
+    def _run_inline(self, job, samples, deadline, confidence, started):
+        totals = [0.0, 0.0, 0]
+        for size, seed in self._chunks(samples):
+            if deadline is not None and totals[2] and time.perf_counter() >= deadline:
+                break
+            for i, value in enumerate(_simulate_chunk(*job, size, seed)):
+                totals[i] += value
+        return _result(totals, confidence, started)
+
+    def _run_pool(self, job, samples, deadline, confidence, started):
+        pool = self._get_pool()
+        chunks = self._chunks(samples)
+        in_flight = set()
+        totals = [0.0, 0.0, 0]
+        # keep two chunks per worker queued so no worker waits on the parent
+        for size, seed in chunks:
+            in_flight.add(pool.submit(_simulate_chunk, *job, size, seed))
+            if len(in_flight) >= 2 * self._workers():
+                break
+        while in_flight:
+            timeout = None if deadline is None or not totals[2] else max(0.0, deadline - time.perf_counter())
+            done, in_flight = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                for i, value in enumerate(future.result()):
+                    totals[i] += value
+            if deadline is not None and totals[2] and time.perf_counter() >= deadline:
+                for future in in_flight:
+                    future.cancel()
+                break
+            for _ in done:
+                chunk = next(chunks, None)
+                if chunk is not None:
+                    in_flight.add(pool.submit(_simulate_chunk, *job, *chunk))
+        return _result(totals, confidence, started)
+
+    def _workers(self):
+        return self.processes or os.cpu_count() or 1
+
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self._workers())
+        return self._pool
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def calculate_equity(hole_cards, board=(), opponents=1, samples=DEFAULT_SAMPLES, time_budget=None,
+                     processes=None, seed=None, dead_cards=(), confidence=DEFAULT_CONFIDENCE,
+                     exact_threshold=DEFAULT_EXACT_THRESHOLD) -> EquityResult:
+    """One off equity estimate. Reuse an EquityCalculator to keep its process pool between calls."""
+    with EquityCalculator(processes=processes, seed=seed, exact_threshold=exact_threshold) as calculator:
+        return calculator.equity(hole_cards, board, opponents, samples, time_budget, dead_cards, confidence)
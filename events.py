@@ -0,0 +1,116 @@
+import json
+import sys
+from collections import deque
+
+# events emitted by the game and agents. fields are plain values (names,
+# numbers, lists of card strings) so every sink can serialize them
+EVENT_HAND_START = 'hand_start'
+EVENT_HAND_END = 'hand_end'
+EVENT_GAME_OVER = 'game_over'
+EVENT_BETTING_ROUND_START = 'betting_round_start'
+EVENT_BETTING_ROUND_END = 'betting_round_end'
+EVENT_TURN = 'turn'
+EVENT_NEXT_PLAYER = 'next_player'
+EVENT_REMAINING_PLAYERS = 'remaining_players'
+EVENT_ACTION = 'action'
+EVENT_BET_PLACED = 'bet_placed'
+EVENT_FOLD_WIN = 'fold_win'
+EVENT_SHOWDOWN = 'showdown'
+EVENT_POT_AWARDED = 'pot_awarded'
+EVENT_HAND_RESULT = 'hand_result'
+EVENT_AGENT_NAMED = 'agent_named'
+EVENT_RL_STATE = 'rl_state'
+
+DEFAULT_RING_BUFFER_SIZE = 10000
+
+# how TextSink renders each event
+TEXT_FORMATS = {
+    EVENT_HAND_START: "\n\n\n###########################################\nStarting hand number {hand_number}",
+    EVENT_HAND_END: "Hand is over.",
+    EVENT_GAME_OVER: "{reason}",
+    EVENT_BETTING_ROUND_START: "\n\n\n###########################################\nStarting betting round for phase: {phase}",
+    EVENT_BETTING_ROUND_END: "End of betting round. Pot is now {pot}.",
+    EVENT_TURN: "\nCurrent player: {player}, Position: {position}",
+    EVENT_NEXT_PLAYER: "Next player: {player}, Position: {position}",
+    EVENT_REMAINING_PLAYERS: "Remaining players after {player}: {remaining}",
+    EVENT_ACTION: "Action taken: {player} {type} {amount}",
+    EVENT_BET_PLACED: "{player} put {amount} in the pot",
+    EVENT_FOLD_WIN: "{player} wins the pot of {pot} as everyone else folded!",
+    EVENT_SHOWDOWN: "{winners} win with {hand}!",
+    EVENT_POT_AWARDED: "{player} wins {amount} chips!",
+    EVENT_HAND_RESULT: "{player} won {amount} chips.",
+    EVENT_AGENT_NAMED: "Agent name set to {player}",
+}
+
+class EventLog:
+    """
+    Dispatches events to its sinks. With no sinks enabled is False, and callers
+    guard every emit with it, so a silent run never builds an event:
+
+        if LOG.enabled:
+            LOG.emit(EVENT_ACTION, player=player.name, type=action_type, amount=amount)
+    """
+    def __init__(self):
+        self.sinks = []
+        self.enabled = False
+
+    def add_sink(self, sink):
+        self.sinks.append(sink)
+        self.enabled = True
+        return sink
+
+    def remove_sink(self, sink):
+        self.sinks.remove(sink)
+        self.enabled = bool(self.sinks)
+
+    def clear_sinks(self):
+        self.sinks = []
+        self.enabled = False
+
+    def emit(self, event, **fields):
+        for sink in self.sinks:
+            sink.write(event, fields)
+
+class TextSink:
+    """Human readable lines, the format the game used to print."""
+    def __init__(self, stream=None):
+        self.stream = stream if stream is not None else sys.stdout
+
+    def write(self, event, fields):
+        template = TEXT_FORMATS.get(event)
+        if template is None:
+            line = event + ' ' + ' '.join(f"{key}={value}" for key, value in fields.items())
+        else:
+            line = template.format(**fields)
+        self.stream.write(line + '\n')
+
+class JSONLinesSink:
+    """One JSON object per event, written to a path or an open text stream."""
+    def __init__(self, target):
+        self._owns_stream = isinstance(target, str)
+        self.stream = open(target, 'a') if self._owns_stream else target
+
+    def write(self, event, fields):
+        self.stream.write(json.dumps({'event': event, **fields}, default=str) + '\n')
+
+    def close(self):
+        if self._owns_stream:
+            self.stream.close()
+
+class RingBufferSink:
+    """Keeps the last capacity events in memory as (event, fields) pairs."""
+    def __init__(self, capacity=DEFAULT_RING_BUFFER_SIZE):
+        self.events = deque(maxlen=capacity)
+
+    def write(self, event, fields):
+        self.events.append((event, fields))
+
+    def of_type(self, event):
+        return [fields for name, fields in self.events if name == event]
+
+# shared by the game and the agents. nothing is recorded until a sink is added
+LOG = EventLog()
+
+def enable_text_output(stream=None) -> TextSink:
+    """Print events to stdout (or stream), like the old DEBUG output."""
+    return LOG.add_sink(TextSink(stream))
@@ -0,0 +1,274 @@
+import bisect
+import mmap
+import os
+import struct
+
+import numpy as np
+import poker_game as pk
+import poker_util as pu
+
+HISTORY_MAGIC = b'PKHH'
+HISTORY_VERSION = 1
+DEFAULT_CHUNK_HANDS = 100000
+MAX_SEATS = 255
+BOARD_SIZE = 5
+
+# action types as stored in an action record
+ACTION_TYPES = (pk.PLAYER_ACTION_FOLD, pk.PLAYER_ACTION_CHECK, pk.PLAYER_ACTION_CALL, pk.PLAYER_ACTION_RAISE,
+                pk.PLAYER_ACTION_RERAISE, pk.PLAYER_ACTION_ALL_IN)
+_ACTION_CODES = {action_type: code for code, action_type in enumerate(ACTION_TYPES)}
+
+# chunk file layout: file header, then one record per hand made of
+#   a hand header: seed (-1 when unseeded), table id, hand number, seat count,
+#     board card count, action count and the board card ids (-1 padded)
+#   a seat record per position: seat, stack before the blinds, chips won and
+#     the two hole card ids
+#   an action record per action: position, action type and amount
+# the index file next to it holds the uint64 offset of every record
+_FILE_HEADER = struct.Struct('<4sI')
+_HAND_HEADER = struct.Struct('<qIIBBH5b')
+_SEAT_RECORD = struct.Struct('<Bii2b')
+_ACTION_RECORD = struct.Struct('<BBi')
+_CHUNK_NAME = 'hands-{:05d}'
+
+def _chunk_paths(directory, chunk):
+    base = os.path.join(directory, _CHUNK_NAME.format(chunk))
+    return base + '.bin', base + '.idx'
+
+def _chunk_numbers(directory):
+    chunks = []
+    for name in os.listdir(directory):
+        if name.startswith('hands-') and name.endswith('.bin'):
+            chunks.append(int(name[len('hands-'):-len('.bin')]))
+    return sorted(chunks)
+
+def _check_file_header(path, header):
+    magic, version = _FILE_HEADER.unpack(header)
+    if magic != HISTORY_MAGIC:
+        raise pu.PokerException(f"{path} is not a hand history file")
+    if version != HISTORY_VERSION:
+        raise pu.PokerException(f"{path} is version {version}, expected version {HISTORY_VERSION}")
+
+class HandHistoryWriter:
+    """
+    Records every hand of the games it is passed to as their recorder, into
+    append only chunk files in directory: hands-NNNNN.bin holds the hand
+    records and hands-NNNNN.idx their offsets. A new chunk is started every
+    chunk_hands hands, and a directory that already holds a history is
+    appended to.
+
+        with HandHistoryWriter('history') as recorder:
+            PokerGame(players, seed=1, recorder=recorder).run_game()
+    """
+    def __init__(self, directory, chunk_hands=DEFAULT_CHUNK_HANDS):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.chunk_hands = chunk_hands
+        chunks = _chunk_numbers(directory)
+        self.hands = sum(os.path.getsize(_chunk_paths(directory, chunk)[1]) // 8 for chunk in chunks)
+        self.chunk = chunks[-1] if chunks else 0
+        self._open_chunk(self.chunk)
+        # the hand being recorded
+        self._start_stacks = None
+        self._actions = bytearray()
+        self._action_count = 0
+
+    def _open_chunk(self, chunk):
+        data_path, index_path = _chunk_paths(self.directory, chunk)
+        if os.path.exists(data_path):
+            with open(data_path, 'rb') as f:
+                _check_file_header(data_path, f.read(_FILE_HEADER.size))
+            self._data = open(data_path, 'ab')
+        else:
+            self._data = open(data_path, 'ab')
+            self._data.write(_FILE_HEADER.pack(HISTORY_MAGIC, HISTORY_VERSION))
+        self._index = open(index_path, 'ab')
+        self._offset = self._data.tell()
+        self._chunk_hand_count = self._index.tell() // 8
+
+    def start_hand(self, game):
+        """Called by the game once the blinds are in and the cards are dealt."""
+        if len(game.players) > MAX_SEATS:
+            raise ValueError(f"Hand histories hold at most {MAX_SEATS} seats.")
+        self._start_stacks = [player.stack + player.total_contribution for player in game.players]
+        self._actions = bytearray()
+        self._action_count = 0
+
+    def record_action(self, game, player, action):
+        """Called by the game after it processed an action."""
+        if self._start_stacks is None:
+            return  # not inside a hand
+        code = _ACTION_CODES.get(action.type)
+        if code is None:
+            raise ValueError(f"Unknown action type: {action.type}")
+        self._actions += _ACTION_RECORD.pack(game.table.positions[player.seat], code, action.amount)
+        self._action_count += 1
+
+    def end_hand(self, game):
+        """Called by the game once the pots are paid. Writes the hand's record."""
+        players = game.players
+        board = [card.id for card in game.community_cards]
+        if isinstance(game.deck, pu.CounterDeck):
+            hand_number = game.deck.hand_number
+        else:
+            hand_number = game.hand_number - pk.FIRST_HAND_NUMBER - 1
+        record = bytearray(_HAND_HEADER.pack(
+            -1 if game.seed is None else game.seed, game.table_id, hand_number, len(players), len(board),
+            self._action_count, *(board + [pk.NO_CARD] * (BOARD_SIZE - len(board)))
+        ))
+        for player, start_stack in zip(players, self._start_stacks):
+            won = player.stack - start_stack + player.total_contribution
+            hole_card_ids = [card.id for card in player.hand] + [pk.NO_CARD] * pk.HOLE_CARD_COUNT
+            record += _SEAT_RECORD.pack(player.seat, start_stack, won, *hole_card_ids[:pk.HOLE_CARD_COUNT])
+        record += self._actions
+        self._data.write(record)
+        self._index.write(struct.pack('<Q', self._offset))
+        self._offset += len(record)
+        self._chunk_hand_count += 1
+        self.hands += 1
+        self._start_stacks = None
+        if self._chunk_hand_count >= self.chunk_hands:
+            self._close_chunk()
+            self.chunk += 1
+            self._open_chunk(self.chunk)
+
+    def flush(self):
+        self._data.flush()
+        self._index.flush()
+
+    def _close_chunk(self):
+        self._data.close()
+        self._index.close()
+
+    def close(self):
+        self._close_chunk()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class HandRecord:
+    """One recorded hand. Per seat lists are in position order, small blind first."""
+    __slots__ = ('seed', 'table_id', 'hand_number', 'seats', 'stacks', 'payouts', 'hole_cards', 'board', 'actions')
+
+    def __init__(self, seed, table_id, hand_number, seats, stacks, payouts, hole_cards, board, actions):
+        self.seed = seed  # None when the game was not seeded
+        self.table_id = table_id
+        self.hand_number = hand_number
+        self.seats = seats
+        self.stacks = stacks  # before the blinds
+        self.payouts = payouts  # chips won from the pots
+        self.hole_cards = hole_cards
+        self.board = board
+        self.actions = actions  # (position, action type, amount) in order
+
+    def __repr__(self):
+        return (f"HandRecord(seed={self.seed}, table_id={self.table_id}, hand_number={self.hand_number}, "
+                f"stacks={self.stacks}, payouts={self.payouts}, actions={len(self.actions)})")
+
+class HandHistoryReader:
+    """Random access to a directory written by HandHistoryWriter, through memory maps of its chunks."""
+    def __init__(self, directory):
+        self.directory = directory
+        self._maps = []
+        self._indexes = []
+        self._first_hands = []  # index of the first hand of each chunk
+        hands = 0
+        for chunk in _chunk_numbers(directory):
+            data_path, index_path = _chunk_paths(directory, chunk)
+            with open(data_path, 'rb') as f:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            _check_file_header(data_path, data[:_FILE_HEADER.size])
+            if os.path.getsize(index_path):
+                index = np.memmap(index_path, dtype='<u8', mode='r')
+            else:
+                index = np.zeros(0, dtype='<u8')
+            self._maps.append(data)
+            self._indexes.append(index)
+            self._first_hands.append(hands)
+            hands += len(index)
+        self._hands = hands
+
+    def __len__(self):
+        return self._hands
+
+    def __getitem__(self, index) -> HandRecord:
+        if index < 0:
+            index += self._hands
+        if not 0 <= index < self._hands:
+            raise IndexError("hand index out of range")
+        chunk = bisect.bisect_right(self._first_hands, index) - 1
+        data = self._maps[chunk]
+        offset = int(self._indexes[chunk][index - self._first_hands[chunk]])
+        seed, table_id, hand_number, seat_count, board_count, action_count, *board = _HAND_HEADER.unpack_from(data, offset)
+        offset += _HAND_HEADER.size
+        seats, stacks, payouts, hole_cards = [], [], [], []
+        for _ in range(seat_count):
+            seat, stack, won, *hole_card_ids = _SEAT_RECORD.unpack_from(data, offset)
+            offset += _SEAT_RECORD.size
+            seats.append(seat)
+            stacks.append(stack)
+            payouts.append(won)
+            hole_cards.append([pu.CARDS[card_id] for card_id in hole_card_ids if card_id != pk.NO_CARD])
+        actions = []
+        for _ in range(action_count):
+            position, code, amount = _ACTION_RECORD.unpack_from(data, offset)
+            offset += _ACTION_RECORD.size
+            actions.append((position, ACTION_TYPES[code], amount))
+        return HandRecord(None if seed < 0 else seed, table_id, hand_number, seats, stacks, payouts, hole_cards,
+                          [pu.CARDS[card_id] for card_id in board[:board_count]], actions)
+
+    def __iter__(self):
+        for index in range(self._hands):
+            yield self[index]
+
+    def replay(self, index, actions=None):
+        """replay_hand for the hand at index."""
+        return replay_hand(self[index], actions)
+
+    def close(self):
+        for data in self._maps:
+            data.close()
+        self._maps = []
+        self._indexes = []
+
+class _ReplayDeck:
+    """Deals a recorded hand's cards in the order the game draws them."""
+    def __init__(self, cards):
+        self.cards = list(reversed(cards))
+
+    def draw(self):
+        if not self.cards:
+            raise pu.PokerException("The recorded hand has no more cards to deal")
+        return self.cards.pop()
+
+    def reset_cards(self):
+        raise pu.PokerException("A replayed game only plays the recorded hand")
+
+def replay_hand(record, actions=None):
+    """
+    Rebuild the PokerGame of a recorded hand and play its first actions
+    recorded actions, all of them by default. Seat i is the player named
+    seat<record.seats[i]>. Returns (game, steps, game_state): steps is the
+    paused hand_steps generator and game_state the pending decision, or None
+    when the hand is over. Raises PokerException if the game asks a
+    different player to act than the record.
+    """
+    players = [pk.Player(name=f"seat{seat}", stack=stack) for seat, stack in zip(record.seats, record.stacks)]
+    game = pk.PokerGame(players=players, maximum_hands=1)
+    game.seed = record.seed
+    game.table_id = record.table_id
+    game.deck = _ReplayDeck([card for hole in record.hole_cards for card in hole] + record.board)
+    steps = game.hand_steps()
+    try:
+        game_state = next(steps)
+        for position, action_type, amount in record.actions[:actions]:
+            player = game.players[position]
+            if game_state.current_player.seat != player.seat:
+                raise pu.PokerException(f"Replay expected {game_state.current_player.name} to act, the record has {player.name}")
+            game_state = steps.send(pk.Action(player, type=action_type, amount=amount))
+    except StopIteration:
+        return game, steps, None
+    return game, steps, game_state
@@ -1,9 +1,18 @@
+from array import array
+from collections.abc import Sequence
+
+import numpy as np
+
+from events import (
+    LOG, EVENT_HAND_START, EVENT_HAND_END, EVENT_GAME_OVER, EVENT_BETTING_ROUND_START, EVENT_BETTING_ROUND_END,
+    EVENT_TURN, EVENT_NEXT_PLAYER, EVENT_REMAINING_PLAYERS, EVENT_ACTION, EVENT_BET_PLACED, EVENT_FOLD_WIN,
+    EVENT_SHOWDOWN, EVENT_POT_AWARDED
+)
 from poker_util import (
-    Card, Deck, PokerRules, WorstPokerHand
+    Card, CARDS, Deck, FastDeck, CounterDeck, PokerRules, IncrementalEvaluator, HAND_RANK_NAMES, HandCategory, hand_category,
+    evaluate_hand
 )
 
-DEBUG = True
-
 PHASE_PRE_FLOP = 'pre-flop'
 PHASE_FLOP = 'flop'
 PHASE_TURN = 'turn'
@@ -20,12 +29,27 @@ POSITION_HIGHJACK = 6
 POSITION_CUT_OFF = 7
 POSITION_BUTTON = 8
 
+SMALL_BLIND_AMOUNT = 1
+BIG_BLIND_AMOUNT = 2
+
 PLAYER_STATUS_WAITING = 'waiting'
 PLAYER_STATUS_FOLDED = 'folded'
 PLAYER_STATUS_CHECKED = 'checked'
 PLAYER_STATUS_CALLED = 'called'
 PLAYER_STATUS_RAISED = 'raised'
 PLAYER_STATUS_ALL_IN = 'all_in'
+# TableState stores a status as its index in this tuple
+PLAYER_STATUSES = (PLAYER_STATUS_WAITING, PLAYER_STATUS_FOLDED, PLAYER_STATUS_CHECKED, PLAYER_STATUS_CALLED,
+                   PLAYER_STATUS_RAISED, PLAYER_STATUS_ALL_IN)
+_STATUS_CODES = {status: code for code, status in enumerate(PLAYER_STATUSES)}
+_WAITING = _STATUS_CODES[PLAYER_STATUS_WAITING]
+_FOLDED = _STATUS_CODES[PLAYER_STATUS_FOLDED]
+_CHECKED = _STATUS_CODES[PLAYER_STATUS_CHECKED]
+_ALL_IN = _STATUS_CODES[PLAYER_STATUS_ALL_IN]
+
+HOLE_CARD_COUNT = 2
+NO_CARD = -1
+NO_SEAT = -1
 
 PLAYER_ACTION_FOLD = 'fold'
 PLAYER_ACTION_CHECK = 'check'
@@ -38,28 +62,239 @@ GAME_SHOULD_CONTINUE = 'continue'
 GAME_SHOULD_NOT_CONTINUE = False
 FIRST_HAND_NUMBER = 1
 
+class TableState:
+    """
+    Per seat state of a table in fixed size arrays indexed by seat: stacks,
+    current bets, chips contributed this hand, status codes and hole card ids. Players are views over one
+    seat, so copying a table is a handful of array copies.
+
+    The table also keeps, for the seats in the hand, a count of players per
+    status, a count of non-folded players per current bet and two seat rings:
+    next_live[seat] is the next non-folded seat and next_actionable[seat] the
+    next seat neither folded nor all in (NO_SEAT if there is none). The rings
+    go round the seats in the hand in position order, whatever their seat
+    numbers.
+    Bets and statuses must be changed with set_bet and set_status to keep them
+    up to date; Player does this.
+    """
+    __slots__ = ('stacks', 'current_bets', 'contributions', 'statuses', 'hole_cards', 'seated', 'positions', 'order',
+                 'seated_count', 'status_counts', 'live_bets', 'next_live', 'next_actionable')
+
+    def __init__(self, seats):
+        self.stacks = [0] * seats
+        self.current_bets = [0] * seats
+        self.contributions = [0] * seats  # chips put in over the whole hand
+        self.statuses = array('B', bytes(seats))  # indexes into PLAYER_STATUSES, 0 is waiting
+        self.hole_cards = array('b', [NO_CARD]) * (seats * HOLE_CARD_COUNT)
+        self.seat_players(range(seats))
+
+    def copy(self):
+        table = TableState.__new__(TableState)
+        table.stacks = self.stacks[:]
+        table.current_bets = self.current_bets[:]
+        table.contributions = self.contributions[:]
+        table.statuses = self.statuses[:]
+        table.hole_cards = self.hole_cards[:]
+        table.seated = self.seated[:]
+        table.positions = self.positions[:]
+        table.order = self.order[:]
+        table.seated_count = self.seated_count
+        table.status_counts = self.status_counts[:]
+        table.live_bets = dict(self.live_bets)
+        table.next_live = self.next_live[:]
+        table.next_actionable = self.next_actionable[:]
+        return table
+
+    def copy_seat(self, source, source_seat, seat):
+        """Copy seat source_seat of the table source into seat."""
+        self.stacks[seat] = source.stacks[source_seat]
+        self.set_bet(seat, source.current_bets[source_seat])
+        self.contributions[seat] = source.contributions[source_seat]
+        self.set_status(seat, source.statuses[source_seat])
+        start = seat * HOLE_CARD_COUNT
+        source_start = source_seat * HOLE_CARD_COUNT
+        self.hole_cards[start:start + HOLE_CARD_COUNT] = source.hole_cards[source_start:source_start + HOLE_CARD_COUNT]
+
+    def seat_players(self, seats):
+        """Take the seats in the hand, in position order, and rebuild the counters and rings over them."""
+        size = len(self.stacks)
+        self.seated = array('B', bytes(size))
+        self.positions = array('b', [NO_SEAT]) * size
+        self.order = array('b', seats)  # the seats in the hand by position
+        for position, seat in enumerate(self.order):
+            self.seated[seat] = 1
+            self.positions[seat] = position
+        self.seated_count = len(self.order)
+        self.status_counts = [0] * len(PLAYER_STATUSES)
+        self.live_bets = {}
+        for seat in range(size):
+            if self.seated[seat]:
+                self.status_counts[self.statuses[seat]] += 1
+                if self.statuses[seat] != _FOLDED:
+                    self._count_bet(self.current_bets[seat], 1)
+        self.next_live = self._build_ring(self._is_live)
+        self.next_actionable = self._build_ring(self._is_actionable)
+
+    def set_bet(self, seat, amount):
+        previous = self.current_bets[seat]
+        if previous == amount:
+            return
+        self.current_bets[seat] = amount
+        if self.seated[seat] and self.statuses[seat] != _FOLDED:
+            self._count_bet(previous, -1)
+            self._count_bet(amount, 1)
+
+    def set_status(self, seat, code):
+        previous = self.statuses[seat]
+        if previous == code:
+            return
+        self.statuses[seat] = code
+        if not self.seated[seat]:
+            return
+        self.status_counts[previous] -= 1
+        self.status_counts[code] += 1
+        # most changes are between waiting, checked, called and raised and touch neither ring
+        if (previous == _FOLDED) != (code == _FOLDED):
+            self._count_bet(self.current_bets[seat], 1 if previous == _FOLDED else -1)
+            self._relink(self.next_live, seat, self._is_live)
+        if (previous == _FOLDED or previous == _ALL_IN) != (code == _FOLDED or code == _ALL_IN):
+            self._relink(self.next_actionable, seat, self._is_actionable)
+
+    def _count_bet(self, amount, change):
+        count = self.live_bets.get(amount, 0) + change
+        if count:
+            self.live_bets[amount] = count
+        else:
+            del self.live_bets[amount]
+
+    def _is_live(self, seat):
+        return self.seated[seat] and self.statuses[seat] != _FOLDED
+
+    def _is_actionable(self, seat):
+        return self.seated[seat] and self.statuses[seat] != _FOLDED and self.statuses[seat] != _ALL_IN
+
+    def _build_ring(self, member):
+        order = self.order
+        count = len(order)
+        ring = array('b', [NO_SEAT]) * len(self.stacks)
+        following = NO_SEAT
+        # walk round twice backwards so every seat sees the first member after it
+        for index in range(2 * count - 1, -1, -1):
+            seat = order[index % count]
+            if index < count:
+                ring[seat] = following
+            if member(seat):
+                following = seat
+        return ring
+
+    def _relink(self, ring, seat, member):
+        """Repoint the seats before seat, back to the previous member, after seat joined or left the ring."""
+        order = self.order
+        count = len(order)
+        if member(seat):
+            target = seat
+        else:
+            target = ring[seat] if ring[seat] != seat else NO_SEAT
+        position = self.positions[seat]
+        for step in range(1, count + 1):
+            previous = order[(position - step) % count]
+            ring[previous] = target
+            if member(previous):
+                break
+
+    def __len__(self):
+        return len(self.stacks)
+
 class Player:
+    """
+    A seat at the table. The stack, current bet, status and hole cards live
+    in a TableState: a new player gets a table of its own and PokerGame
+    moves it into the game's table with sit().
+    """
+    __slots__ = ('name', 'agent', 'hand_evaluator', 'table', 'seat')
+
     def __init__(self, name, stack, agent=None):
         self.name = name
-        self.stack = stack
-        self.current_bet = 0
-        self.status = PLAYER_STATUS_WAITING  # Can be "waiting", "folded", "checked", "called", "raised"
-        self.hand = []
         self.agent = agent  # Agent object to decide actions
+        # hole cards plus the community cards dealt so far, kept up to date by the game
+        self.hand_evaluator = None
+        self.table = TableState(1)
+        self.seat = 0
+        self.table.stacks[0] = stack
+
+    def sit(self, table, seat):
+        """Move the player's state into seat of table and read it from there."""
+        table.copy_seat(self.table, self.seat, seat)
+        self.table = table
+        self.seat = seat
+
+    @property
+    def stack(self):
+        return self.table.stacks[self.seat]
+
+    @stack.setter
+    def stack(self, value):
+        self.table.stacks[self.seat] = value
+
+    @property
+    def current_bet(self):
+        return self.table.current_bets[self.seat]
+
+    @current_bet.setter
+    def current_bet(self, value):
+        self.table.set_bet(self.seat, value)
+
+    @property
+    def total_contribution(self):
+        """Chips put in the pot this hand, over every betting round."""
+        return self.table.contributions[self.seat]
+
+    @total_contribution.setter
+    def total_contribution(self, value):
+        self.table.contributions[self.seat] = value
+
+    @property
+    def status(self):
+        """Can be "waiting", "folded", "checked", "called", "raised" or "all_in"."""
+        return PLAYER_STATUSES[self.table.statuses[self.seat]]
+
+    @status.setter
+    def status(self, value):
+        code = _STATUS_CODES.get(value)
+        if code is None:
+            raise ValueError(f"Unknown player status: {value}")
+        self.table.set_status(self.seat, code)
+
+    @property
+    def hand(self):
+        hole_cards = self.table.hole_cards
+        start = self.seat * HOLE_CARD_COUNT
+        return [CARDS[card_id] for card_id in hole_cards[start:start + HOLE_CARD_COUNT] if card_id != NO_CARD]
+
+    @hand.setter
+    def hand(self, cards):
+        if len(cards) > HOLE_CARD_COUNT:
+            raise ValueError(f"A player holds at most {HOLE_CARD_COUNT} cards.")
+        hole_cards = self.table.hole_cards
+        start = self.seat * HOLE_CARD_COUNT
+        for offset in range(HOLE_CARD_COUNT):
+            hole_cards[start + offset] = cards[offset].id if offset < len(cards) else NO_CARD
+        self.hand_evaluator = None  # it held the old cards, whoever deals the new ones builds a new one
 
     def place_bet(self, amount):
-        if amount > self.stack:
-            actual_bet_amount = self.stack
-            self.stack = 0
-            self.current_bet += actual_bet_amount
-            self.status = PLAYER_STATUS_ALL_IN
-            return actual_bet_amount
-        self.stack -= amount
-        self.current_bet += amount
+        table, seat = self.table, self.seat
+        stack = table.stacks[seat]
+        if amount >= stack:
+            amount = stack
+            table.set_status(seat, _ALL_IN)
+        table.stacks[seat] = stack - amount
+        table.set_bet(seat, table.current_bets[seat] + amount)
+        table.contributions[seat] += amount
         return amount
 
     def reset_player_for_new_hand(self):
         self.current_bet = 0
+        self.total_contribution = 0
         self.status = PLAYER_STATUS_WAITING
         self.hand = []
 
@@ -69,40 +304,114 @@ class Player:
             return self.agent.act(game_state)
         raise NotImplementedError(f"{self.name} does not have an agent to decide actions.")
 
+    def best_hand_strength(self, community_cards):
+        """
+        Strength of the player's best hand with community_cards, read from the
+        incremental evaluator when it holds exactly these cards.
+        """
+        cards = self.hand + community_cards
+        evaluator = self.hand_evaluator
+        if evaluator is not None:
+            cards_mask = 0
+            for card in cards:
+                cards_mask |= card.mask
+            if evaluator.cards_mask == cards_mask and evaluator.card_count == len(cards):
+                return evaluator.strength
+        return evaluate_hand(cards)
+
+    def copy(self, table=None):
+        """A player with the same name, agent and hand evaluator state over the same seat of table (by default a copy of its own)."""
+        player = Player.__new__(Player)
+        player.name = self.name
+        player.agent = self.agent
+        player.hand_evaluator = self.hand_evaluator.copy() if self.hand_evaluator is not None else None
+        player.table = table if table is not None else self.table.copy()
+        player.seat = self.seat
+        return player
+
     def __str__(self):
         return f"Player(name={self.name}, stack={self.stack}, status={self.status}, hand={self.hand})"
 
 class Action:
+    __slots__ = ('player', 'type', 'amount')
+
     def __init__(self, player, type, amount=0):
         self.player = player
         self.type = type  # e.g., fold, check, call, raise, reraise, all_in
         self.amount = amount  # Amount of chips involved in the action
 
-        if DEBUG:
-            print(f"Action taken: {self.player.name} {self.type} {self.amount}")
+        if LOG.enabled:
+            LOG.emit(EVENT_ACTION, player=player.name, type=type, amount=amount)
+
+    def for_player(self, player):
+        """The same action taken by player, without logging it again."""
+        action = Action.__new__(Action)
+        action.player = player
+        action.type = self.type
+        action.amount = self.amount
+        return action
 
     def __repr__(self):
         return f"Action(player={self.player.name}, type={self.type}, amount={self.amount})"
 
+def play_steps(steps):
+    """
+    Drive a hand_steps or betting_round_steps generator by asking each
+    player's agent for its action. Returns the generator's return value.
+    """
+    try:
+        game_state = next(steps)
+        while True:
+            game_state = steps.send(game_state.current_player.take_action(game_state))
+    except StopIteration as finished:
+        return finished.value
+
+def _hand_strength_key(ranked_player):
+    return ranked_player[0]
+
 class PokerGame:
-    def __init__(self, players, maximum_hands=3):
+    def __init__(self, players, maximum_hands=3, seed=None, table_id=0, recorder=None):
+        # every seat's stack, bet, status and hole cards live in one TableState
+        self.table = TableState(len(players))
+        for seat, player in enumerate(players):
+            player.sit(self.table, seat)
         self.players = players  # List of Player objects
         self.pot = 0
+        self.pots = []  # main and side pots of the last showdown
         self.current_bet = 0
         self.table_position = 0  # Tracks the current player's position
         self.community_cards = []
-        self.deck = Deck()
+        # with a seed every hand is dealt from a counter based stream, so a
+        # single hand can be rebuilt from (seed, table_id, hand index) alone
+        self.deck = Deck() if seed is None else CounterDeck(seed, table_id)
+        self.seed = seed
+        self.table_id = table_id
+        # optional hand history recorder (see history.HandHistoryWriter), told about every hand and action
+        self.recorder = recorder
         self.phase = PHASE_PRE_FLOP  # Current phase of the game
         self.actions = []  # List of actions for the current phase
         self.hand_number = FIRST_HAND_NUMBER  # Track the number of hands played
         self.maximum_hands = maximum_hands  # Maximum number of hands to play
+        self._deltas = []  # undo records of apply(), newest last
         if len(players) < 2:
             raise ValueError("At least two players are required to start a game.")
-        
+
+    @property
+    def players(self):
+        return self._players
+
+    @players.setter
+    def players(self, players):
+        # the list is only ever replaced, so this is where the table learns who is in the hand
+        self._players = players
+        self.table.seat_players([player.seat for player in players])
+
     def deal_hands(self):
         """Deal two cards to each player."""
         for player in self.players:
-            player.hand = [self.deck.draw(), self.deck.draw()]
+            cards = [self.deck.draw(), self.deck.draw()]
+            player.hand = cards
+            player.hand_evaluator = IncrementalEvaluator(cards)
 
     def rotate_position(self):
         """Move to the next player's position."""
@@ -114,6 +423,8 @@ class PokerGame:
 
     def process_action(self, player, action):
         """Process a player's action."""
+        if action.player is not player:
+            action = action.for_player(player)  # built from the PlayerView the agent was shown
         if action.type == PLAYER_ACTION_FOLD:
             player.status = PLAYER_STATUS_FOLDED
             self.actions.append(action)
@@ -127,8 +438,8 @@ class PokerGame:
             if call_amount == 0:
                 raise ValueError(f"{player.name} cannot call because they have already matched the current bet. Check instead")
             actual_bet_amount = player.place_bet(call_amount)
-            if DEBUG:
-                print('actual_bet_amount: ', actual_bet_amount)
+            if LOG.enabled:
+                LOG.emit(EVENT_BET_PLACED, player=player.name, amount=actual_bet_amount)
             self.pot += actual_bet_amount
             if player.status != PLAYER_STATUS_ALL_IN:
                 player.status = PLAYER_STATUS_CALLED
@@ -137,30 +448,30 @@ class PokerGame:
             raise_amount = action.amount
             if raise_amount <= self.current_bet:
                 raise ValueError(f"Raise must be greater than the current bet of {self.current_bet}.")
-            player.place_bet(raise_amount)
-            self.pot += raise_amount
+            self.pot += player.place_bet(raise_amount)
             self.current_bet = player.current_bet
-            player.status = PLAYER_STATUS_RAISED
+            if player.status != PLAYER_STATUS_ALL_IN:
+                player.status = PLAYER_STATUS_RAISED
             self.actions.append(action)
         elif action.type == PLAYER_ACTION_RERAISE:
             reraise_amount = action.amount
             if reraise_amount <= self.current_bet:
                 raise ValueError(f"Reraise must be greater than the current bet of {self.current_bet}.")
-            player.place_bet(reraise_amount)
-            self.pot += reraise_amount
+            self.pot += player.place_bet(reraise_amount)
             self.current_bet = player.current_bet
-            player.status = PLAYER_STATUS_RAISED
+            if player.status != PLAYER_STATUS_ALL_IN:
+                player.status = PLAYER_STATUS_RAISED
             self.actions.append(action)
         elif action.type == PLAYER_ACTION_ALL_IN:
             if player.stack <= 0:
                 raise ValueError(f"{player.name} cannot go all-in with a stack of {player.stack}.")
-            all_in_amount = player.stack
-            player.place_bet(all_in_amount)
-            self.pot += all_in_amount
+            self.pot += player.place_bet(player.stack)
             if self.current_bet < player.current_bet:
                 self.current_bet = player.current_bet
             player.status = PLAYER_STATUS_ALL_IN
             self.actions.append(action)
+        if self.recorder is not None:
+            self.recorder.record_action(self, player, action)
 
     def calculate_preflop_starting_position(self):
         if len(self.players) == 2:
@@ -176,31 +487,42 @@ class PokerGame:
         raise ValueError("No active players found.")
 
     def calculate_next_position(self, current_position):
+        """
+        Position of the next player to act after current_position: the next
+        player who has not folded and is not all in, else the next all in
+        player, searching the seats after current_position before wrapping
+        round to the ones before it. Pre-flop, with nobody left after
+        current_position, the small blind acts.
+        """
+        players = self.players
+        table = self.table
+        last_position = len(players) - 1
+        # past the last seat every player counts as coming after the current position
+        wrapped = current_position >= last_position
+        seat = players[last_position if wrapped else current_position].seat
+        if LOG.enabled:
+            remaining_players = players if wrapped else players[current_position + 1:]
+            LOG.emit(EVENT_REMAINING_PLAYERS, player=players[-1 if wrapped else current_position].name,
+                     remaining=[player.name for player in remaining_players])
 
-        # take the current position index and get all the players that come after it in the list
-        remaining_players = self.players[current_position + 1:]
-        if len(remaining_players) == 0:
-            current_position = -1  # reset to the beginning of the list
-            remaining_players = self.players
-        if DEBUG:
-            print(f"Remaining players after {self.players[current_position].name}: {[player.name for player in remaining_players]}")
-        # get all remaining players who have not folded
-        remaining_players = [player for player in remaining_players if player.status != PLAYER_STATUS_FOLDED]
-        if self.phase == PHASE_PRE_FLOP and len(remaining_players) == 0:
+        live = table.next_live[seat]
+        live = NO_SEAT if live == NO_SEAT else table.positions[live]
+        actionable = table.next_actionable[seat]
+        actionable = NO_SEAT if actionable == NO_SEAT else table.positions[actionable]
+        live_after = live != NO_SEAT and (wrapped or live > current_position)
+        if self.phase == PHASE_PRE_FLOP and not live_after:
             # if there are no remaining players, return the first player in the list
             return POSITION_SMALL_BLIND
-
-        # find the first player in the list who has not folded and is not all in
-        for player in remaining_players:
-            if player.status != PLAYER_STATUS_FOLDED and player.status != PLAYER_STATUS_ALL_IN:
-                return self.players.index(player)
-            
-        # if everyone is all in or folded, return the next all in player
-        # this means everyone is either all in or folded, so we need to find the next all in player.
-        # the game will handle this scenario outside this function.
-        for player in remaining_players:
-            if player.status == PLAYER_STATUS_ALL_IN:
-                return self.players.index(player)
+        if actionable != NO_SEAT and (wrapped or actionable > current_position):
+            return actionable
+        # everyone after the current position is folded or all in, so the next all in player
+        if live_after:
+            return live
+        # everyone after the current position has folded, so wrap around to the seats before it
+        if actionable != NO_SEAT:
+            return actionable
+        if live != NO_SEAT:
+            return live
         raise ValueError("No active players found after the current position.")
 
     def map_position_to_position_name(self, position):
@@ -220,12 +542,23 @@ class PokerGame:
 
     def betting_round(self):
         """Conduct a betting round."""
-        if DEBUG:
-            print(f"\n\n\n###########################################")
-            print(f"Starting betting round for phase: {self.phase}")
-            for player in self.players:
-                index_of_player = self.players.index(player)
-                print(f"{player.name} - Position: {self.map_position_to_position_name(index_of_player)} Stack: {player.stack}, Status: {player.status}, Hand: {player.hand}")
+        play_steps(self.betting_round_steps())
+
+    def betting_round_steps(self):
+        """
+        Generator form of betting_round. Yields an ObservationView each time a
+        player has to act and expects their Action back through send().
+        """
+        self._start_betting_round()
+        yield from self._betting_steps()
+
+    def _start_betting_round(self):
+        if LOG.enabled:
+            LOG.emit(EVENT_BETTING_ROUND_START, phase=self.phase, players=[
+                {'name': player.name, 'position': self.map_position_to_position_name(index), 'stack': player.stack,
+                 'status': player.status, 'hand': [str(card) for card in player.hand]}
+                for index, player in enumerate(self.players)
+            ])
         
         """Run a betting round."""
         # iniitialize starting position. if phase is preflop, set the first player to act as the UTG player.
@@ -239,43 +572,52 @@ class PokerGame:
                 player.current_bet = 0  # Reset players' current bets for the new betting round
         self.actions = []  # Reset actions for the current phase
 
-        
-        while True:
+    def _betting_steps(self):
+        """The betting round from the player at table_position on."""
+        while self._seek_decision():
+            current_player = self.players[self.table_position]
+            action = yield ObservationView(self, current_player)
+            self.process_action(current_player, action)
+            if not self._pass_turn():
+                break
+        self._end_betting_round()
 
+    def _seek_decision(self):
+        """
+        Move table_position on from the player there to the first who has to
+        act. Returns False if the betting round ends first.
+        """
+        while True:
             current_player = self.players[self.table_position]
-            if DEBUG:
-                print("\n")
-                print(f"Current player: {current_player.name}, Position: {self.map_position_to_position_name(self.table_position)}")
+            if LOG.enabled:
+                LOG.emit(EVENT_TURN, player=current_player.name, position=self.map_position_to_position_name(self.table_position))
             # Check if current player is all-in
             if current_player.status == PLAYER_STATUS_ALL_IN:
                 if self.betting_round_should_end():
-                    break
+                    return False
                 # Skip the player if they are all-in
                 self.table_position = self.calculate_next_position(self.table_position)
                 continue
 
             if current_player.status != PLAYER_STATUS_FOLDED:
-                game_state = PokerGameStateSnapshot(
-                    pot=self.pot,
-                    current_bet=self.current_bet,
-                    phase=self.phase,
-                    players=[p for p in self.players],
-                    community_cards=self.community_cards,
-                    actions=self.actions,
-                    current_player=current_player
-                )
-                action = current_player.take_action(game_state)
-                self.process_action(current_player, action)
+                return True
 
-            if self.betting_round_should_end():
-                break
+            if not self._pass_turn():
+                return False
 
-            self.table_position = self.calculate_next_position(self.table_position)
-            if DEBUG:
-                print(f"Next player: {self.players[self.table_position].name}, Position: {self.map_position_to_position_name(self.table_position)}")
+    def _pass_turn(self):
+        """Move table_position to the next player, unless the betting round should end (returns False)."""
+        if self.betting_round_should_end():
+            return False
+        self.table_position = self.calculate_next_position(self.table_position)
+        if LOG.enabled:
+            LOG.emit(EVENT_NEXT_PLAYER, player=self.players[self.table_position].name,
+                     position=self.map_position_to_position_name(self.table_position))
+        return True
 
-        if DEBUG:
-            print(f"End of betting round. Pot is now {self.pot}.")
+    def _end_betting_round(self):
+        if LOG.enabled:
+            LOG.emit(EVENT_BETTING_ROUND_END, phase=self.phase, pot=self.pot)
         # reset non folded players' status to waiting
         self.reset_non_all_in_players_and_folded_players_status()
 
@@ -285,35 +627,25 @@ class PokerGame:
                 player.status = PLAYER_STATUS_WAITING
 
     def betting_round_should_end(self)-> bool:
+        # the table keeps these counts up to date as bets and statuses change
+        table = self.table
+        status_counts = table.status_counts
 
         # check if any player has a waiting status
-        waiting_player_statuses = [p.status for p in self.players if p.status == PLAYER_STATUS_WAITING]
-        if len(waiting_player_statuses) != 0:
+        if status_counts[_WAITING]:
             return False
 
         # check if all players have checked or folded
-        active_player_statuses = [p.status for p in self.players if p.status != PLAYER_STATUS_FOLDED]
-        if len(set(active_player_statuses)) == 1 and active_player_statuses[0] in [PLAYER_STATUS_CHECKED, PLAYER_STATUS_FOLDED]:
+        active_players = table.seated_count - status_counts[_FOLDED]
+        if active_players and status_counts[_CHECKED] == active_players:
             return True
-        
+
         # check if one player is all in
-        all_in_player_statuses = [p.status for p in self.players if p.status == PLAYER_STATUS_ALL_IN]
-        if len(all_in_player_statuses) >= 1:
+        if status_counts[_ALL_IN]:
             return True
 
-        active_player_current_bets = [p.current_bet for p in self.players if p.status != PLAYER_STATUS_FOLDED]
         # check if all players have the same current bet
-        if len(set(active_player_current_bets)) == 1:
-            return True
-        
-        # # check if all players have folded, raise, or are all in
-        # # @Todo: this will work for two players, but will break if one goes all in, and two are left with money to raise and reraise eachother
-
-        # all_in_and_folded_statuses = [p.status for p in self.players if p.status in [PLAYER_STATUS_ALL_IN, PLAYER_STATUS_FOLDED, PLAYER_STATUS_RAISED]]
-        # if len(all_in_and_folded_statuses) == len(self.players):
-        #     return True       
-
-        return False
+        return len(table.live_bets) == 1
 
     def reset_game_for_new_hand(self):
         """Reset the game state for a new round."""
@@ -337,66 +669,97 @@ class PokerGame:
             self.deck.reset_cards()  # Shuffle the deck for the next hand
 
         # initialize the sb / bb
-        self.players[POSITION_SMALL_BLIND].place_bet(1)
-        self.players[POSITION_BIG_BLIND].place_bet(2)
-        self.pot = 3  # Add the blinds to the pot
-        self.current_bet = 2  # Set the current bet to the big blind amount
+        self.players[POSITION_SMALL_BLIND].place_bet(SMALL_BLIND_AMOUNT)
+        self.players[POSITION_BIG_BLIND].place_bet(BIG_BLIND_AMOUNT)
+        self.pot = SMALL_BLIND_AMOUNT + BIG_BLIND_AMOUNT  # Add the blinds to the pot
+        self.current_bet = BIG_BLIND_AMOUNT  # Set the current bet to the big blind amount
 
         self.hand_number += 1  # Increment the hand number
         return True
 
-    def determine_winner(self):
-        rules = PokerRules()
-        player_and_current_best_hand = {
-            'player': None,
-            'best_hand': WorstPokerHand(),
-            'tied_hands': []
-        }
+    def build_side_pots(self):
+        """
+        Split the chips put in this hand into a main pot and side pots, one
+        layer per all in level, each with the players who can win it. Chips a
+        folded player put in above every remaining player's total go to the
+        last pot.
+        """
+        players = self.players
+        live_levels = sorted({p.total_contribution for p in players if p.status != PLAYER_STATUS_FOLDED})
+        pots = []
+        previous_level = 0
+        for level in live_levels:
+            amount = sum(min(p.total_contribution, level) - min(p.total_contribution, previous_level) for p in players)
+            eligible_players = [p for p in players if p.status != PLAYER_STATUS_FOLDED and p.total_contribution >= level]
+            if pots and pots[-1].eligible_players == eligible_players:
+                pots[-1].amount += amount
+            else:
+                pots.append(Pot(amount, eligible_players))
+            previous_level = level
+        leftover = sum(p.total_contribution - previous_level for p in players if p.total_contribution > previous_level)
+        if leftover:
+            pots[-1].amount += leftover
+        return pots
 
+    def determine_winner(self):
+        """
+        Decide every pot and return (GAME_SHOULD_CONTINUE, winners of the main
+        pot). The pots, with their winners, are left in self.pots for
+        award_pots. Players are ranked once and each pot takes the best of its
+        eligible players from that ranking.
+        """
         # get all active players who have not folded
         active_players = [p for p in self.players if p.status != PLAYER_STATUS_FOLDED]
+        self.pots = self.build_side_pots()
         if len(active_players) == 1:
             # If only one player remains, they win the pot
             winner = active_players[0]
-            if DEBUG:
-                print(f"{winner.name} wins the pot of {self.pot} as everyone else folded!")
+            for pot in self.pots:
+                pot.winners = [winner]
+            if LOG.enabled:
+                LOG.emit(EVENT_FOLD_WIN, player=winner.name, pot=self.pot)
             return GAME_SHOULD_CONTINUE, [winner]
 
-        for player in active_players:
-            # get player's cards and all community cards in a list
-            all_cards = player.hand + self.community_cards
-            # get all possible 5 card combinations combinations from the player's hand and community cards
-            from itertools import combinations
-            all_combinations = list(combinations(all_cards, 5))
-
-            # get the best hand from all combinations
-            best_hand = rules.get_best_hand(all_combinations)
-
-            # check if hand is equal to current best hand
-            if best_hand == player_and_current_best_hand['best_hand'] and player_and_current_best_hand['player'] != player:
-                player_and_current_best_hand['tied_hands'].append(player)
-
-            if best_hand > player_and_current_best_hand['best_hand']:
-                player_and_current_best_hand['best_hand'] = best_hand
-                player_and_current_best_hand['player'] = player
-                player_and_current_best_hand['tied_hands'] = [] # reset tied hands
-
-        # There is a tie
-        if len(player_and_current_best_hand['tied_hands']) > 0:
-            # If there are tied hands, split the pot among the winners
-            if DEBUG:
-                print(f"It's a tie between {', '.join([p.name for p in player_and_current_best_hand['tied_hands']])} with {player_and_current_best_hand['best_hand']}!")
-            player_and_current_best_hand['tied_hands'].append(player_and_current_best_hand['player'])
-            return GAME_SHOULD_CONTINUE, player_and_current_best_hand['tied_hands']
-        
-        # If there is a winner, give them the pot
-        if DEBUG:
-            print(f"{player_and_current_best_hand['player']} wins with {player_and_current_best_hand['best_hand']}!")
-        return GAME_SHOULD_CONTINUE, [player_and_current_best_hand['player']]
+        # rank every player with a single sort on their best hand strength
+        ranked_players = sorted(
+            ((player.best_hand_strength(self.community_cards), player) for player in active_players),
+            key=_hand_strength_key,
+            reverse=True
+        )
+        for pot in self.pots:
+            eligible_players = pot.eligible_players
+            best_strength = None
+            for strength, player in ranked_players:
+                if best_strength is not None and strength != best_strength:
+                    break
+                if player in eligible_players:
+                    best_strength = strength
+                    pot.winners.append(player)
+        best_strength = ranked_players[0][0]
+        winners = self.pots[0].winners
+
+        if LOG.enabled:
+            LOG.emit(EVENT_SHOWDOWN, winners=[p.name for p in winners], hand=HAND_RANK_NAMES[hand_category(best_strength)],
+                     strength=best_strength)
+        return GAME_SHOULD_CONTINUE, winners
+
+    def award_pots(self):
+        """Pay every pot decided by determine_winner to its winners."""
+        for pot in self.pots:
+            if len(pot.winners) == 0:
+                raise ValueError("No winners found.")
+            for winner, amount in pot.shares():
+                winner.stack += amount
+                if LOG.enabled:
+                    LOG.emit(EVENT_POT_AWARDED, player=winner.name, amount=amount)
 
     def add_community_card(self):
         """Add a card to the community cards."""
-        self.community_cards.append(self.deck.draw())
+        card = self.deck.draw()
+        self.community_cards.append(card)
+        for player in self.players:
+            if player.hand_evaluator is not None and player.status != PLAYER_STATUS_FOLDED:
+                player.hand_evaluator.add(card)
 
     def advance_phase(self):
         """Advance to the next phase of the game."""
@@ -415,19 +778,45 @@ class PokerGame:
 
     def run_hand(self):
         """Run the game. Will return False if the game is over."""
-        if DEBUG:
-            print("running the hand...")
+        return play_steps(self.hand_steps())
+
+    def hand_steps(self):
+        """
+        Generator form of run_hand. Yields an ObservationView each time a
+        player has to act, expects their Action back through send(), and
+        returns what run_hand returns. Lets a caller own the decision loop.
+        """
         if not self.reset_game_for_new_hand():
-            if DEBUG:
-                print("Game over! Not enough players to continue.")
+            if LOG.enabled:
+                LOG.emit(EVENT_GAME_OVER, reason="Game over! Not enough players to continue.")
             return GAME_SHOULD_NOT_CONTINUE
         self.deal_hands()
+        if self.recorder is not None:
+            self.recorder.start_hand(self)
+        return (yield from self._play_out_steps())
+
+    def resume_steps(self):
+        """
+        Continue a hand from its pending decision, the point a game made by
+        fork() was copied at. Yields and returns like hand_steps.
+        """
+        yield from self._betting_steps()
+        if self.phase != PHASE_SHOWDOWN:
+            self.advance_phase()
+        return (yield from self._play_out_steps())
+
+    def _play_out_steps(self):
+        """The betting rounds left from the current phase on, then the showdown."""
         while self.phase != PHASE_SHOWDOWN:
-            self.betting_round()
+            yield from self.betting_round_steps()
             if self.phase != PHASE_SHOWDOWN:
                 self.advance_phase()
-        if DEBUG:
-            print("Hand is over.")
+        return self.finish_hand()
+
+    def finish_hand(self):
+        """Settle a hand that reached the showdown: decide and pay the pots. Returns what run_hand returns."""
+        if LOG.enabled:
+            LOG.emit(EVENT_HAND_END, pot=self.pot, community_cards=[str(card) for card in self.community_cards])
         should_game_continue, winners = self.determine_winner()
 
         # inform agents of who won
@@ -438,41 +827,219 @@ class PokerGame:
                         players=self.players,
                         community_cards=self.community_cards,
                         winners=winners,
-                        pot=self.pot
+                        pot=self.pot,
+                        pots=self.pots
                     )
                 )
 
         # assign winnings
-        if len(winners) == 0:
-            raise ValueError("No winners found.")
-
-        if len(winners) >= 1:
-            split_pot = self.pot // len(winners)
-            for winner in winners:
-                winner.stack += split_pot
-                if DEBUG:
-                    print(f"{winner.name} wins {split_pot} chips!")
-        else:
-            winner.stack += self.pot
-
+        self.award_pots()
+        if self.recorder is not None:
+            self.recorder.end_hand(self)
         return should_game_continue
 
+    def start_hand(self):
+        """
+        Start a hand to play with apply() and undo() instead of hand_steps.
+        Returns False when the game is over, like run_hand. Otherwise the hand
+        waits at its first decision, or at the showdown if nobody has one.
+        """
+        self._deltas.clear()
+        if not self.reset_game_for_new_hand():
+            if LOG.enabled:
+                LOG.emit(EVENT_GAME_OVER, reason="Game over! Not enough players to continue.")
+            return GAME_SHOULD_NOT_CONTINUE
+        self.deal_hands()
+        if self.recorder is not None:
+            self.recorder.start_hand(self)
+        self._start_betting_round()
+        if not self._seek_decision():
+            self._next_street_decision()
+        return True
+
+    def observation(self):
+        """The pending decision, for a hand played with apply()."""
+        return ObservationView(self, self.players[self.table_position])
+
+    def apply(self, action):
+        """
+        Play action for the player at table_position and move on to the next
+        decision, dealing any streets on the way. What changed is pushed as one
+        delta record for undo(). Returns True at the next decision and False
+        once the hand reached the showdown; finish_hand() settles it, but can
+        not be undone.
+        """
+        if self.recorder is not None:
+            raise ValueError("Applied actions can not be taken back from a recorder, fork() the game first.")
+        table = self.table
+        player = self.players[self.table_position]
+        seat = player.seat
+        stack, bet, contribution, status = (table.stacks[seat], table.current_bets[seat], table.contributions[seat],
+                                            table.statuses[seat])
+        pot, current_bet, table_position, phase = self.pot, self.current_bet, self.table_position, self.phase
+        actions, actions_length, community_length = self.actions, len(self.actions), len(self.community_cards)
+        self.process_action(player, action)
+
+        street_statuses = street_bets = None
+        pending = self._pass_turn() and self._seek_decision()
+        if not pending:
+            # the betting round is over: keep the seats as they were before resetting them for the next street
+            street_statuses = table.statuses[:]
+            street_bets = table.current_bets[:]
+            pending = self._next_street_decision()
+        self._deltas.append((seat, stack, bet, contribution, status, pot, current_bet, table_position, phase, actions,
+                             actions_length, community_length, street_statuses, street_bets))
+        return pending
+
+    def undo(self):
+        """Take back the last apply()."""
+        (seat, stack, bet, contribution, status, pot, current_bet, table_position, phase, actions,
+         actions_length, community_length, street_statuses, street_bets) = self._deltas.pop()
+        table = self.table
+        community_cards = self.community_cards
+        if len(community_cards) > community_length:
+            dealt = community_cards[community_length:]
+            del community_cards[community_length:]
+            for player in self.players:
+                if player.hand_evaluator is not None and player.status != PLAYER_STATUS_FOLDED:
+                    for card in dealt:
+                        player.hand_evaluator.remove(card)
+            if isinstance(self.deck, FastDeck):
+                self.deck.position -= len(dealt)
+            else:
+                self.deck.cards.extend(reversed(dealt))
+        if street_statuses is not None:
+            for street_seat in range(len(table)):
+                table.set_bet(street_seat, street_bets[street_seat])
+                table.set_status(street_seat, street_statuses[street_seat])
+        table.stacks[seat] = stack
+        table.set_bet(seat, bet)
+        table.contributions[seat] = contribution
+        table.set_status(seat, status)
+        self.pot = pot
+        self.current_bet = current_bet
+        self.table_position = table_position
+        self.phase = phase
+        del actions[actions_length:]
+        self.actions = actions
+
+    def _next_street_decision(self):
+        """
+        End the betting round and play on through the streets nobody has to
+        act on. Returns True at a decision and False at the showdown.
+        """
+        while True:
+            self._end_betting_round()
+            if self.phase != PHASE_SHOWDOWN:
+                self.advance_phase()
+            if self.phase == PHASE_SHOWDOWN:
+                return False
+            self._start_betting_round()
+            if self._seek_decision():
+                return True
+
+    def fork(self, rng=None, observer=None):
+        """
+        Copy the game for search, in a few microseconds. The copy gets its own
+        table and players, which keep their names and share their agents,
+        while cards and past actions are shared. Undealt cards come out in
+        the order they would have in this game unless rng, a numpy Generator,
+        is given: then they are reshuffled with it and, with an observer, the
+        hole cards of the other players still in the hand are dealt again from
+        the cards observer can not see. Later hands of the copy are shuffled
+        with rng, or else with a stream spawned from this game's deck, which
+        deals on as before. Forked at a decision point, the hand goes on with
+        resume_steps(). The copy records nothing.
+        """
+        game = PokerGame.__new__(PokerGame)
+        table = self.table.copy()
+        players = [player.copy(table) for player in self._players]
+        forked = dict(zip(map(id, self._players), players))
+        game.table = table
+        game._players = players  # the copied table is already seated
+        game.pot = self.pot
+        game.pots = []
+        game.current_bet = self.current_bet
+        game.table_position = self.table_position
+        game.community_cards = list(self.community_cards)
+        game.phase = self.phase
+        game.actions = [action.for_player(forked.get(id(action.player), action.player)) for action in self.actions]
+        game.hand_number = self.hand_number
+        game.maximum_hands = self.maximum_hands
+        game.seed = self.seed
+        game.table_id = self.table_id
+        game.recorder = None
+        game._deltas = []
+
+        deck = self.deck
+        if isinstance(deck, FastDeck):
+            undealt = deck.undealt_ids()
+        else:
+            undealt = array('B', [card.id for card in reversed(deck.cards)])
+        if rng is not None:
+            observer = forked.get(id(observer), observer)
+            hidden = [player for player in players if observer is not None and player is not observer
+                      and player.status != PLAYER_STATUS_FOLDED]
+            pool = list(undealt) + [card.id for player in hidden for card in player.hand]
+            pool = [pool[index] for index in rng.permutation(len(pool))]
+            for player in hidden:
+                cards = [CARDS[pool.pop()] for _ in player.hand]
+                player.hand = cards
+                player.hand_evaluator = IncrementalEvaluator(cards + game.community_cards)
+            undealt = array('B', pool)
+        if rng is None:
+            # later hands get their own stream, derived from this game's deck when it has one
+            rng = deck.spawn_seed() if isinstance(deck, FastDeck) else np.random.default_rng()
+        game.deck = FastDeck.with_undealt(undealt, rng)
+        return game
+
     def run_game(self):
         """Run the game until completion."""
         while True:
-            if DEBUG:
-                print(f"\n\n\n###########################################")
-                print(f"Starting hand number {self.hand_number}")
+            if LOG.enabled:
+                LOG.emit(EVENT_HAND_START, hand_number=self.hand_number)
             if self.hand_number > self.maximum_hands:
-                if DEBUG:
-                    print("Max Hands Reached!")
+                if LOG.enabled:
+                    LOG.emit(EVENT_GAME_OVER, reason="Max Hands Reached!")
                 break
             if self.run_hand() is not GAME_SHOULD_CONTINUE:
-                if DEBUG:
-                    print("Someone won the game!")
+                if LOG.enabled:
+                    LOG.emit(EVENT_GAME_OVER, reason="Someone won the game!")
                 break
 
-class PokerGameStateSnapshot:
+_NOT_EVALUATED = object()
+
+class GameObservation:
+    """What a player sees when it has to act. Subclasses provide the attributes and a _hand_category slot."""
+    __slots__ = ()
+
+    @property
+    def hand_category(self) -> HandCategory:
+        """
+        Category of the current player's best hand, or None before the flop.
+        Evaluated once per observation, so any number of at_least checks cost one evaluation.
+        """
+        if self._hand_category is _NOT_EVALUATED:
+            player = self.current_player
+            community_cards = self.community_cards
+            if len(player.hand) + len(community_cards) >= 5:
+                self._hand_category = hand_category(player.best_hand_strength(community_cards))
+            else:
+                self._hand_category = None
+        return self._hand_category
+
+    def at_least(self, category: HandCategory) -> bool:
+        """Whether the current player's best hand is category or better."""
+        current = self.hand_category
+        return current is not None and current >= category
+
+    def __str__(self):
+        return f"{type(self).__name__}(pot={self.pot}, current_bet={self.current_bet}, phase={self.phase}, players={self.players}, community_cards={self.community_cards}, actions={self.actions}, current_player={self.current_player})"
+
+class PokerGameStateSnapshot(GameObservation):
+    __slots__ = ('pot', 'current_bet', 'phase', 'players', 'community_cards', 'actions', 'current_player',
+                 '_hand_category')
+
     def __init__(self,
                  pot,
                  current_bet,
@@ -488,17 +1055,187 @@ class PokerGameStateSnapshot:
         self.community_cards = community_cards
         self.actions = actions
         self.current_player = current_player
+        self._hand_category = _NOT_EVALUATED
+
+    def detach(self):
+        """Snapshots own their state already."""
+        return self
+
+class SequenceView(Sequence):
+    """Read-only view of a list. hand + view and view + hand give new lists."""
+    __slots__ = ('_items',)
+
+    def __init__(self, items):
+        self._items = items
+
+    def __getitem__(self, index):
+        return self._items[index]
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __add__(self, other):
+        return self._items + list(other)
+
+    def __radd__(self, other):
+        return list(other) + self._items
+
+    def __eq__(self, other):
+        return list(self._items) == list(other) if isinstance(other, (list, tuple, SequenceView)) else NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(self._items)
+
+class PlayerView:
+    """
+    Read-only view of a seat, as ObservationView hands it out: reads go to
+    the game's TableState, so it follows the game like the observation does.
+    """
+    __slots__ = ('_player',)
+
+    def __init__(self, player):
+        self._player = player
+
+    @property
+    def name(self):
+        return self._player.name
+
+    @property
+    def agent(self):
+        return self._player.agent
+
+    @property
+    def seat(self):
+        return self._player.seat
+
+    @property
+    def stack(self):
+        player = self._player
+        return player.table.stacks[player.seat]
+
+    @property
+    def current_bet(self):
+        player = self._player
+        return player.table.current_bets[player.seat]
+
+    @property
+    def total_contribution(self):
+        player = self._player
+        return player.table.contributions[player.seat]
+
+    @property
+    def status(self):
+        player = self._player
+        return PLAYER_STATUSES[player.table.statuses[player.seat]]
+
+    @property
+    def hand(self):
+        return self._player.hand
+
+    def take_action(self, game_state):
+        return self._player.take_action(game_state)
+
+    def best_hand_strength(self, community_cards):
+        return self._player.best_hand_strength(community_cards)
 
     def __str__(self):
-        return f"PokerGameStateSnapshot(pot={self.pot}, current_bet={self.current_bet}, phase={self.phase}, players={self.players}, community_cards={self.community_cards}, actions={self.actions}, current_player={self.current_player})"
+        return str(self._player)
+
+class ObservationView(GameObservation):
+    """
+    The observation betting_round_steps yields: a read-only view straight
+    into the game, so a decision costs a few small objects rather than a
+    copy of the table. Players come as PlayerViews. It follows the game, so
+    it is only meaningful until the action is sent back; call detach() for a
+    PokerGameStateSnapshot to keep.
+    """
+    __slots__ = ('_game', '_player', 'current_player', '_hand_category')
+
+    def __init__(self, game, current_player):
+        object.__setattr__(self, '_game', game)
+        object.__setattr__(self, '_player', current_player)
+        object.__setattr__(self, 'current_player', PlayerView(current_player))
+        object.__setattr__(self, '_hand_category', _NOT_EVALUATED)
+
+    def __setattr__(self, name, value):
+        if name != '_hand_category':
+            raise AttributeError(f"{type(self).__name__} is read-only, detach() it to get a mutable snapshot.")
+        object.__setattr__(self, name, value)
+
+    @property
+    def pot(self):
+        return self._game.pot
+
+    @property
+    def current_bet(self):
+        return self._game.current_bet
+
+    @property
+    def phase(self):
+        return self._game.phase
+
+    @property
+    def players(self):
+        current = self._player
+        return tuple(self.current_player if player is current else PlayerView(player) for player in self._game.players)
+
+    @property
+    def community_cards(self):
+        return SequenceView(self._game.community_cards)
+
+    @property
+    def actions(self):
+        return SequenceView(self._game.actions)
+
+    def detach(self) -> PokerGameStateSnapshot:
+        """Copy the observation, players included, into a snapshot that no longer follows the game."""
+        game = self._game
+        table = game.table.copy()
+        players = [player.copy(table) for player in game.players]
+        snapshot = PokerGameStateSnapshot(
+            pot=game.pot,
+            current_bet=game.current_bet,
+            phase=game.phase,
+            players=players,
+            community_cards=list(game.community_cards),
+            actions=list(game.actions),
+            current_player=players[game.players.index(self._player)]
+        )
+        snapshot._hand_category = self._hand_category
+        return snapshot
+
+class Pot:
+    """The main pot or a side pot: its chips, who can win them and, after the showdown, who did."""
+    __slots__ = ('amount', 'eligible_players', 'winners')
+
+    def __init__(self, amount, eligible_players):
+        self.amount = amount
+        self.eligible_players = eligible_players
+        self.winners = []
+
+    def shares(self):
+        """(winner, chips) pairs. Chips that do not split evenly go one each to the first winners by position."""
+        split_pot, odd_chips = divmod(self.amount, len(self.winners))
+        return [(winner, split_pot + (1 if index < odd_chips else 0)) for index, winner in enumerate(self.winners)]
+
+    def __repr__(self):
+        return f"Pot(amount={self.amount}, eligible_players={[p.name for p in self.eligible_players]}, winners={[p.name for p in self.winners]})"
 
 class ShowdownState:
     # must before cumulative bet is reset
-    def __init__(self, players, community_cards, winners, pot):
+    __slots__ = ('players', 'community_cards', 'winners', 'pot', 'pots')
+
+    def __init__(self, players, community_cards, winners, pot, pots=None):
         self.players = players
         self.community_cards = community_cards
-        self.winners = winners
+        self.winners = winners  # winners of the main pot
         self.pot = pot
+        self.pots = pots  # every Pot with its winners, when the game built them
 
     def __str__(self):
         return f"ShowdownState(players={self.players}, community_cards={self.community_cards}, winner={self.winner}, pot={self.pot})"
\ No newline at end of file
@@ -1,3 +1,9 @@
+import random
+from array import array
+from enum import IntEnum
+
+import numpy as np
+
 CARD_RANK_NAME_A = 'A'
 CARD_RANK_NAME_K = 'K'
 CARD_RANK_NAME_Q = 'Q'
@@ -50,13 +56,98 @@ HAND_COMPARE_GT = 1
 HAND_COMPARE_LT = -1
 HAND_COMPARE_EQ = 0
 
+# numeric hand categories used by the lookup table evaluator, ordered weakest to strongest
+HAND_RANK_HIGH_CARD = 0
+HAND_RANK_ONE_PAIR = 1
+HAND_RANK_TWO_PAIR = 2
+HAND_RANK_THREE_OF_A_KIND = 3
+HAND_RANK_STRAIGHT = 4
+HAND_RANK_FLUSH = 5
+HAND_RANK_FULL_HOUSE = 6
+HAND_RANK_FOUR_OF_A_KIND = 7
+HAND_RANK_STRAIGHT_FLUSH = 8
+HAND_RANK_ROYAL_FLUSH = 9
+
+class HandCategory(IntEnum):
+    """Ordered hand categories, interchangeable with the HAND_RANK_* ints."""
+    HIGH_CARD = HAND_RANK_HIGH_CARD
+    ONE_PAIR = HAND_RANK_ONE_PAIR
+    TWO_PAIR = HAND_RANK_TWO_PAIR
+    THREE_OF_A_KIND = HAND_RANK_THREE_OF_A_KIND
+    STRAIGHT = HAND_RANK_STRAIGHT
+    FLUSH = HAND_RANK_FLUSH
+    FULL_HOUSE = HAND_RANK_FULL_HOUSE
+    FOUR_OF_A_KIND = HAND_RANK_FOUR_OF_A_KIND
+    STRAIGHT_FLUSH = HAND_RANK_STRAIGHT_FLUSH
+    ROYAL_FLUSH = HAND_RANK_ROYAL_FLUSH
+
+_HAND_CATEGORIES = tuple(HandCategory)
+
+# a hand strength is the category in the high bits followed by up to five
+# 4 bit rank values (most significant first), so plain int comparison orders hands
+STRENGTH_CATEGORY_SHIFT = 20
+
 class PokerException(Exception):
     pass
 
+SUITS = (SUIT_HEARTS, SUIT_DIAMONDS, SUIT_CLUBS, SUIT_SPADES)
+CARD_RANK_NAMES = (CARD_RANK_NAME_2, CARD_RANK_NAME_3, CARD_RANK_NAME_4, CARD_RANK_NAME_5,
+                   CARD_RANK_NAME_6, CARD_RANK_NAME_7, CARD_RANK_NAME_8, CARD_RANK_NAME_9,
+                   CARD_RANK_NAME_10, CARD_RANK_NAME_J, CARD_RANK_NAME_Q, CARD_RANK_NAME_K,
+                   CARD_RANK_NAME_A)
+
+_CARD_RANK_VALUES = {
+    CARD_RANK_NAME_A: CARD_RANK_VALUE_A,
+    CARD_RANK_NAME_K: CARD_RANK_VALUE_K,
+    CARD_RANK_NAME_Q: CARD_RANK_VALUE_Q,
+    CARD_RANK_NAME_J: CARD_RANK_VALUE_J,
+    CARD_RANK_NAME_10: CARD_RANK_VALUE_10,
+    CARD_RANK_NAME_9: CARD_RANK_VALUE_9,
+    CARD_RANK_NAME_8: CARD_RANK_VALUE_8,
+    CARD_RANK_NAME_7: CARD_RANK_VALUE_7,
+    CARD_RANK_NAME_6: CARD_RANK_VALUE_6,
+    CARD_RANK_NAME_5: CARD_RANK_VALUE_5,
+    CARD_RANK_NAME_4: CARD_RANK_VALUE_4,
+    CARD_RANK_NAME_3: CARD_RANK_VALUE_3,
+    CARD_RANK_NAME_2: CARD_RANK_VALUE_2
+}
+
+# indexed by rank value, 2 through 14
+_RANK_PRIMES = (0, 0, 2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+
 class Card:
-    def __init__(self, rank, suit):
-        self.rank = rank
-        self.suit = suit
+    """
+    One of the 52 playing cards. Cards are interned: Card(rank, suit) always
+    returns the same immutable object, which carries its integer id
+    (suit index * 13 + rank value - 2), rank value, suit index and id bit mask.
+    """
+    __slots__ = ('rank', 'suit', 'value', 'suit_index', 'id', 'mask', 'prime')
+
+    def __new__(cls, rank, suit):
+        card = _CARDS_BY_NAME.get((rank, suit))
+        if card is None:
+            raise PokerException(f"Invalid card: {rank} of {suit}")
+        return card
+
+    @classmethod
+    def _create(cls, rank, suit):
+        card = object.__new__(cls)
+        value = _CARD_RANK_VALUES[rank]
+        suit_index = SUITS.index(suit)
+        object.__setattr__(card, 'rank', rank)
+        object.__setattr__(card, 'suit', suit)
+        object.__setattr__(card, 'value', value)
+        object.__setattr__(card, 'suit_index', suit_index)
+        object.__setattr__(card, 'id', suit_index * 13 + value - 2)
+        object.__setattr__(card, 'mask', 1 << (suit_index * 13 + value - 2))
+        object.__setattr__(card, 'prime', _RANK_PRIMES[value])
+        return card
+
+    def __setattr__(self, name, value):
+        raise PokerException("Cards are immutable")
+
+    def __reduce__(self):
+        return (Card, (self.rank, self.suit))
 
     def __str__(self):
         return f"{self.rank} of {self.suit}"
@@ -67,11 +158,9 @@ class Card:
     def compare(self, other):
         if not isinstance(other, Card):
             raise PokerException("Card cannot be compared to non-card object")
-        self_value = self.get_card_rank_value(self.rank)
-        other_value = self.get_card_rank_value(other.rank)
-        if self_value == other_value:
+        if self.value == other.value:
             return HAND_COMPARE_EQ
-        elif self_value > other_value:
+        elif self.value > other.value:
             return HAND_COMPARE_GT
         else:
             return HAND_COMPARE_LT
@@ -86,61 +175,279 @@ class Card:
         return self.compare(other) == HAND_COMPARE_GT
     
     def get_card_rank_value(self, rank):
-        return {
-            CARD_RANK_NAME_A: CARD_RANK_VALUE_A,
-            CARD_RANK_NAME_K: CARD_RANK_VALUE_K,
-            CARD_RANK_NAME_Q: CARD_RANK_VALUE_Q,
-            CARD_RANK_NAME_J: CARD_RANK_VALUE_J,
-            CARD_RANK_NAME_10: CARD_RANK_VALUE_10,
-            CARD_RANK_NAME_9: CARD_RANK_VALUE_9,
-            CARD_RANK_NAME_8: CARD_RANK_VALUE_8,
-            CARD_RANK_NAME_7: CARD_RANK_VALUE_7,
-            CARD_RANK_NAME_6: CARD_RANK_VALUE_6,
-            CARD_RANK_NAME_5: CARD_RANK_VALUE_5,
-            CARD_RANK_NAME_4: CARD_RANK_VALUE_4,
-            CARD_RANK_NAME_3: CARD_RANK_VALUE_3,
-            CARD_RANK_NAME_2: CARD_RANK_VALUE_2
-        }.get(rank, 0)
+        return _CARD_RANK_VALUES.get(rank, 0)
+
+_CARDS_BY_NAME = {}
+# every card indexed by its id, 0 through 51
+CARDS = tuple(Card._create(rank, suit) for suit in SUITS for rank in CARD_RANK_NAMES)
+for _card in CARDS:
+    _CARDS_BY_NAME[(_card.rank, _card.suit)] = _card
+del _card
+
+# the order Deck has always dealt from before shuffling
+_FRESH_DECK = tuple(Card(rank, suit) for suit in SUITS for rank in reversed(CARD_RANK_NAMES))
+
+def card_from_id(card_id: int) -> Card:
+    """Return the interned card with the given id."""
+    return CARDS[card_id]
 
 class Deck:
-    def __init__(self, no_shuffle=False):
-        self.fresh_deck_of_cards = [Card(rank, suit) for suit in [SUIT_HEARTS, SUIT_DIAMONDS, SUIT_CLUBS, SUIT_SPADES]
-                      for rank in [CARD_RANK_NAME_A, CARD_RANK_NAME_K, CARD_RANK_NAME_Q, CARD_RANK_NAME_J,
-                                   CARD_RANK_NAME_10, CARD_RANK_NAME_9, CARD_RANK_NAME_8, CARD_RANK_NAME_7,
-                                   CARD_RANK_NAME_6, CARD_RANK_NAME_5, CARD_RANK_NAME_4, CARD_RANK_NAME_3,
-                                   CARD_RANK_NAME_2]]
-        self.cards = self.fresh_deck_of_cards.copy()
+    def __init__(self, no_shuffle=False, seed=None):
+        self.fresh_deck_of_cards = _FRESH_DECK
+        self.cards = list(self.fresh_deck_of_cards)
         self.no_shuffle = no_shuffle
+        # each deck owns its random stream so tables do not share global state
+        self.random = random.Random(seed)
         self.shuffle()
 
     def shuffle(self):
         if self.no_shuffle:
             return
-        import random
-        random.shuffle(self.cards)
+        self.random.shuffle(self.cards)
 
     def draw(self):
         return self.cards.pop() if self.cards else PokerException("No cards left in the deck")
     
     def reset_cards(self):
-        self.cards = self.fresh_deck_of_cards.copy()
+        self.cards = list(self.fresh_deck_of_cards)
         self.shuffle()
 
+# cards FastDeck shuffles whenever it runs out of shuffled cards, enough for a heads up hand
+DEFAULT_DEAL_SIZE = 9
+def _shuffle_ids(ids, rng, start, stop):
+    """Partial Fisher-Yates: fix ids[start:stop] from the cards not placed before start."""
+    for i, offset in zip(range(start, stop), rng.random(stop - start).tolist()):
+        j = i + int(offset * (52 - i))
+        ids[i], ids[j] = ids[j], ids[i]
+
+class FastDeck:
+    """
+    Deck of card ids in an array('B') with its own seeded numpy generator.
+    Shuffling is a partial Fisher-Yates that only randomizes the cards about to
+    be dealt, and reset_cards just rewinds, since shuffling any order of the 52
+    ids is as good as shuffling a fresh deck. Works anywhere a Deck does.
+    """
+    def __init__(self, seed=None, deal_size=DEFAULT_DEAL_SIZE):
+        seed_sequence = np.random.SeedSequence(seed)
+        self._rng = np.random.Generator(np.random.PCG64(seed_sequence))
+        self._seed = (seed_sequence.entropy, ())  # (entropy, spawn_key) of the SeedSequence behind rng
+        self.spawned = 0  # child streams handed out by spawn_seed
+        self.deal_size = deal_size
+        self.ids = array('B', range(52))
+        self.position = 0  # index of the next card to deal
+        self.shuffled_to = 0  # ids[position:shuffled_to] are already shuffled
+        self._completed = None  # ids in the order the deck will deal them, cached by undealt_ids
+
+    @property
+    def rng(self) -> np.random.Generator:
+        """The deck's own generator. Decks made by with_undealt only build it once they need it."""
+        if self._rng is None:
+            entropy, spawn_key = self._seed
+            self._rng = np.random.Generator(np.random.PCG64(np.random.SeedSequence(entropy, spawn_key=spawn_key)))
+        return self._rng
+
+    @rng.setter
+    def rng(self, rng):
+        self._rng = rng
+
+    def spawn_seed(self) -> tuple:
+        """
+        (entropy, spawn_key) of a new child stream, as SeedSequence.spawn would
+        make it, for a deck derived from this one. Every call gives a different
+        stream, independent of this deck's, and the same ones on every run.
+        """
+        if self._seed is None:
+            raise PokerException("The deck's generator was not built from a SeedSequence")
+        entropy, spawn_key = self._seed
+        self.spawned += 1
+        return entropy, spawn_key + (self.spawned - 1,)
+
+    def shuffle(self, count=52):
+        """Shuffle the next count undealt cards into place."""
+        stop = min(52, self.shuffled_to + count)
+        _shuffle_ids(self.ids, self.rng, self.shuffled_to, stop)
+        self.shuffled_to = stop
+        self._completed = None
+
+    def undealt_ids(self) -> array:
+        """
+        The undealt card ids in the order they will be dealt. The rest of the
+        shuffle is done on a copy, and the generator is rewound afterwards, so
+        the deck deals exactly as it would have.
+        """
+        if self.shuffled_to == 52:
+            return self.ids[self.position:]
+        if self._completed is None:
+            ids = array('B', self.ids)
+            state = self.rng.bit_generator.state
+            _shuffle_ids(ids, self.rng, self.shuffled_to, 52)
+            self.rng.bit_generator.state = state
+            self._completed = ids
+        return self._completed[self.position:]
+
+    def draw(self) -> Card:
+        if self.position == self.shuffled_to:
+            if self.position == 52:
+                raise PokerException("No cards left in the deck")
+            self.shuffle(self.deal_size)
+        card_id = self.ids[self.position]
+        self.position += 1
+        return CARDS[card_id]
+
+    def draw_ids(self, count: int) -> array:
+        """Deal count card ids at once."""
+        if self.position + count > 52:
+            raise PokerException("Not enough cards left in the deck")
+        if self.position + count > self.shuffled_to:
+            self.shuffle(self.position + count - self.shuffled_to)
+        dealt = self.ids[self.position:self.position + count]
+        self.position += count
+        return dealt
+
+    def draw_many(self, count: int) -> list:
+        """Deal count cards at once."""
+        return [CARDS[card_id] for card_id in self.draw_ids(count)]
+
+    def deal_batch(self, hands: int, count: int) -> np.ndarray:
+        """
+        Deal count cards for each of hands independent fresh decks, as a
+        (hands, count) uint8 array of card ids. Runs the same partial
+        Fisher-Yates vectorized across decks and leaves this deck untouched.
+        """
+        if not 0 <= count <= 52:
+            raise PokerException("A deck only has 52 cards")
+        decks = np.tile(np.arange(52, dtype=np.uint8), (hands, 1))
+        rows = np.arange(hands)
+        for i in range(count):
+            j = i + (self.rng.random(hands) * (52 - i)).astype(np.intp)
+            picked = decks[rows, j]
+            decks[rows, j] = decks[:, i]
+            decks[:, i] = picked
+        return decks[:, :count].copy()
+
+    @classmethod
+    def with_undealt(cls, undealt, rng, deal_size=DEFAULT_DEAL_SIZE):
+        """
+        Deck that deals the card ids in undealt in order, the rest counting as
+        dealt already. Later hands are shuffled with rng: a numpy Generator, or
+        the (entropy, spawn_key) from another deck's spawn_seed, whose generator
+        is only built if the deck runs out of cards.
+        """
+        deck = cls.__new__(cls)
+        if isinstance(rng, np.random.Generator):
+            deck._rng = rng
+            seed_sequence = rng.bit_generator.seed_seq
+            spawnable = isinstance(seed_sequence, np.random.SeedSequence)
+            deck._seed = (seed_sequence.entropy, tuple(seed_sequence.spawn_key)) if spawnable else None
+        else:
+            deck._rng = None
+            deck._seed = rng
+        deck.spawned = 0
+        deck.deal_size = deal_size
+        remaining = set(undealt)
+        deck.ids = array('B', [card_id for card_id in range(52) if card_id not in remaining]) + array('B', undealt)
+        deck.position = 52 - len(undealt)
+        deck.shuffled_to = 52
+        deck._completed = None
+        return deck
+
+    def reset_cards(self):
+        self.position = 0
+        self.shuffled_to = 0
+        self._completed = None
+
+    @property
+    def cards(self) -> list:
+        """The undealt cards, in the order they would be dealt once shuffled."""
+        return [CARDS[card_id] for card_id in self.ids[self.position:]]
+
+    def __len__(self):
+        return 52 - self.position
+
+class CounterDeck(FastDeck):
+    """
+    FastDeck whose shuffle for every hand comes from a Philox counter based
+    generator keyed by (seed, table_id) with the hand number in the counter.
+    Any hand's deal is rebuilt directly with CounterDeck(seed, table_id,
+    hand_number), without replaying earlier hands, and tables with different
+    ids never share a stream. reset_cards moves on to the next hand number.
+    """
+    def __init__(self, seed=0, table_id=0, hand_number=0, deal_size=DEFAULT_DEAL_SIZE):
+        # FastDeck.__init__ would build an entropy seeded generator only to drop it
+        self.deal_size = deal_size
+        self._seed = ((seed, table_id), ())  # for spawn_seed, not the deal stream
+        self.spawned = 0
+        self.key = np.array([seed, table_id], dtype=np.uint64)
+        self.bit_generator = np.random.Philox(key=self.key)
+        self.rng = np.random.Generator(self.bit_generator)
+        self.start_hand(hand_number)
+
+    def start_hand(self, hand_number: int):
+        """Rewind to a fresh deck for hand_number."""
+        self.hand_number = hand_number
+        # the hand number fills the second counter word, so a hand's draws only
+        # advance the first word and never reach the next hand's counters.
+        # setting the state is several times cheaper than a new Philox
+        self.bit_generator.state = {
+            'bit_generator': 'Philox',
+            'state': {'counter': np.array([0, hand_number, 0, 0], dtype=np.uint64), 'key': self.key},
+            'buffer': np.zeros(4, dtype=np.uint64),
+            'buffer_pos': 4,
+            'has_uint32': 0,
+            'uinteger': 0,
+        }
+        self.ids = array('B', range(52))
+        self.position = 0
+        self.shuffled_to = 0
+        self._completed = None
+
+    def reset_cards(self):
+        self.start_hand(self.hand_number + 1)
+
+def _card_value(card):
+    return card.value
+
 class Hand:
     def __init__(self, cards):
         self.cards = cards
+        self._strength = None
         if len(cards) != 5:
             raise PokerException("Hand must contain exactly 5 cards")
 
+    @property
+    def strength(self) -> int:
+        """Integer key that totally orders hands: higher is better, equal hands are equal."""
+        if self._strength is None:
+            self._strength = evaluate_hand(self.cards)
+        return self._strength
+
+    def compare(self, other):
+        if not isinstance(other, Hand):
+            raise PokerException("Hand cannot be compared to non-hand object")
+        if self.strength > other.strength:
+            return HAND_COMPARE_GT
+        elif self.strength < other.strength:
+            return HAND_COMPARE_LT
+        return HAND_COMPARE_EQ
+
+    def __gt__(self, other):
+        return self.compare(other) == HAND_COMPARE_GT
+
+    def __lt__(self, other):
+        return self.compare(other) == HAND_COMPARE_LT
+
+    def __eq__(self, other):
+        return self.compare(other) == HAND_COMPARE_EQ
+
     def evaluate_kickers(self, kickers1, kickers2):
         assert len(kickers1) == len(kickers2), "Kickers must be of the same length"
 
         #sorted cards by value
-        sorted1 = sorted(kickers1, key=lambda card: card.get_card_rank_value(card.rank), reverse=True)
-        sorted2 = sorted(kickers2, key=lambda card: card.get_card_rank_value(card.rank), reverse=True)
+        sorted1 = sorted([card.value for card in kickers1], reverse=True)
+        sorted2 = sorted([card.value for card in kickers2], reverse=True)
         for i in range(len(sorted1)):
-            value1 = sorted1[i].get_card_rank_value(sorted1[i].rank)
-            value2 = sorted2[i].get_card_rank_value(sorted2[i].rank)
+            value1 = sorted1[i]
+            value2 = sorted2[i]
             if value1 > value2:
                 return FIRST_KICKER_WINS
             elif value1 < value2:   
@@ -148,6 +455,9 @@ class Hand:
         return KICKERS_TIE
 
 class WorstPokerHand(Hand):
+    # sorts below every real hand
+    strength = -1
+
     def __init__(self):
         super().__init__([
             Card(CARD_RANK_NAME_2, SUIT_HEARTS),
@@ -157,48 +467,18 @@ class WorstPokerHand(Hand):
             Card(CARD_RANK_NAME_7, SUIT_HEARTS)
         ])
 
-    def compare(self, other):
-        if not isinstance(other, Hand):
-            raise PokerException("Hand cannot be compared to non-hand object")
-        if isinstance(other, WorstPokerHand):
-            return HAND_COMPARE_EQ
-        return HAND_COMPARE_LT
-
-    def __gt__(self, other):
-        return self.compare(other) == HAND_COMPARE_GT
-    
-    def __lt__(self, other):
-        return self.compare(other) == HAND_COMPARE_LT
-    
-    def __eq__(self, other):
-        return self.compare(other) == HAND_COMPARE_EQ
-
 class RoyalFlush(Hand):
     def __init__(self, cards: list[Card]):
         super().__init__(cards)
         try:
             straight_flush = StraightFlush(cards)
-            if straight_flush.highest_straight_flush_card.rank == CARD_RANK_NAME_A:
+            if straight_flush.highest_straight_flush_card.value == CARD_RANK_VALUE_A:
                 return
             else:
                 raise PokerException("Invalid Royal Flush")
         except Exception as e:
             raise PokerException("Invalid Royal Flush") from e
 
-    def compare(self, other):
-        if not isinstance(other, Hand):
-            raise PokerException("Hand cannot be compared to non-hand object")
-        return HAND_COMPARE_GT
-    
-    def __gt__(self, other):
-        return self.compare(other) == HAND_COMPARE_GT
-
-    def __lt__(self, other):
-        return self.compare(other) == HAND_COMPARE_LT
-
-    def __eq__(self, other):
-        return self.compare(other) == HAND_COMPARE_EQ        
-
 class StraightFlush(Hand):
     def __init__(self, cards: list[Card]):
         super().__init__(cards)
@@ -212,402 +492,427 @@ class StraightFlush(Hand):
         except Exception as e:
             raise PokerException("Invalid Straight Flush") from e
 
-    def compare(self, other):
-        if not isinstance(other, Hand):
-            raise PokerException("Hand cannot be compared to non-hand object")
-        if isinstance(other, RoyalFlush):
-            return HAND_COMPARE_LT
-        if isinstance(other, StraightFlush):
-            return self.highest_straight_flush_card > other.highest_straight_flush_card
-        return HAND_COMPARE_GT
-
-    def __gt__(self, other):
-        return self.compare(other) == HAND_COMPARE_GT
-    
-    def __lt__(self, other):
-        return self.compare(other) == HAND_COMPARE_LT
-    
-    def __eq__(self, other):
-        return self.compare(other) == HAND_COMPARE_EQ
-
 class FourOfAKind(Hand):
     def __init__(self, cards: list[Card]):
         super().__init__(cards)
 
+        values = [c.value for c in cards]
         for card in cards:
-            ranks = [c.rank for c in cards]
-            if ranks.count(card.rank) == 4:
+            if values.count(card.value) == 4:
                 self.rank = card
-                self.kicker = [c for c in cards if c.rank != card.rank][0]
+                self.kicker = [c for c in cards if c.value != card.value][0]
                 return
         raise PokerException("Invalid Four of a Kind")
 
-    def compare(self, other):
-        if not isinstance(other, Hand):
-            raise PokerException("Hand cannot be compared to non-hand object")
-        if isinstance(other, RoyalFlush):
-            return HAND_COMPARE_LT
-        if isinstance(other, StraightFlush):
-            return HAND_COMPARE_LT
-        if isinstance(other, FourOfAKind):
-            return self.rank > other.rank
-        return HAND_COMPARE_GT
-    
-    def __gt__(self, other):
-        return self.compare(other) == HAND_COMPARE_GT
-    
-    def __lt__(self, other):
-        return self.compare(other) == HAND_COMPARE_LT
-    
-    def __eq__(self, other):
-        return self.compare(other) == HAND_COMPARE_EQ
-    
 class FullHouse(Hand):
     def __init__(self, cards: list[Card]):
         super().__init__(cards)
         self.three_of_a_kind_rank = None
         self.pair_rank = None
+        values = [c.value for c in cards]
         for card in cards:
-            ranks = [c.rank for c in cards]
-            if ranks.count(card.rank) == 3:
+            if values.count(card.value) == 3:
                 self.three_of_a_kind_rank = card
-            elif ranks.count(card.rank) == 2:
+            elif values.count(card.value) == 2:
                 self.pair_rank = card
         if self.three_of_a_kind_rank and self.pair_rank:
             return
         raise PokerException("Invalid Full House")
 
-    def compare(self, other):
-        if not isinstance(other, Hand):
-            raise PokerException("Hand cannot be compared to non-hand object")
-        if isinstance(other, RoyalFlush):
-            return HAND_COMPARE_LT
-        if isinstance(other, StraightFlush):
-            return HAND_COMPARE_LT
-        if isinstance(other, FourOfAKind):
-            return HAND_COMPARE_LT
-        if isinstance(other, FullHouse):
-            if self.three_of_a_kind_rank > other.three_of_a_kind_rank:
-                return HAND_COMPARE_GT
-            elif self.three_of_a_kind_rank == other.three_of_a_kind_rank:
-                return self.pair_rank > other.pair_rank
-            else:
-                return HAND_COMPARE_LT
-        return HAND_COMPARE_GT
-    
-    def __gt__(self, other):
-        return self.compare(other) == HAND_COMPARE_GT
-    
-    def __lt__(self, other):
-        return self.compare(other) == HAND_COMPARE_LT
-    
-    def __eq__(self, other):
-        return self.compare(other) == HAND_COMPARE_EQ
-
 class Flush(Hand):
     def __init__(self, cards: list[Card]):
         super().__init__(cards)
-        suits = [card.suit for card in cards]
+        suits = [card.suit_index for card in cards]
         if len(set(suits)) == 1:
             return
         else:
             raise PokerException("Invalid Flush")
 
-    def compare(self, other):
-        if not isinstance(other, Hand):
-            raise PokerException("Hand cannot be compared to non-hand object")
-        if isinstance(other, RoyalFlush):
-            return HAND_COMPARE_LT
-        if isinstance(other, StraightFlush):
-            return HAND_COMPARE_LT
-        if isinstance(other, FourOfAKind):
-            return HAND_COMPARE_LT
-        if isinstance(other, FullHouse):
-            return HAND_COMPARE_LT
-        if isinstance(other, Flush):
-            result = self.evaluate_kickers(self.cards, other.cards)
-            if result == FIRST_KICKER_WINS:
-                return HAND_COMPARE_GT
-            elif result == SECOND_KICKER_WINS:
-                return HAND_COMPARE_LT
-            else:
-                Exception("something went wrong")
-        return HAND_COMPARE_GT
-    
-    def __gt__(self, other):
-        return self.compare(other) == HAND_COMPARE_GT
-    
-    def __lt__(self, other):
-        return self.compare(other) == HAND_COMPARE_LT
-    
-    def __eq__(self, other):
-        return self.compare(other) == HAND_COMPARE_EQ
-
 class Straight(Hand):
     def __init__(self, cards: list[Card]):
         super().__init__(cards)
-        ranks = sorted([card.get_card_rank_value(card.rank) for card in cards])
+        ranks = sorted([card.value for card in cards])
         if len(ranks) != 5:
             raise PokerException("Invalid Straight")
         if ranks == list(range(ranks[0], ranks[0] + 5)):
-            highest_card = max(cards, key=lambda card: card.get_card_rank_value(card.rank))
+            highest_card = max(cards, key=_card_value)
             self.highest_straight_card = highest_card
             return
         # check for the special case of A, 2, 3, 4, 5
         if ranks == [2, 3, 4, 5, 14]:
             # get the second highest card in the hand
-            self.highest_straight_card = max([card for card in cards if card.get_card_rank_value(card.rank) != 14], key=lambda card: card.get_card_rank_value(card.rank))
+            self.highest_straight_card = max([card for card in cards if card.value != CARD_RANK_VALUE_A], key=_card_value)
             return
         raise PokerException("Invalid Straight")
-    
-    def compare(self, other):
-        if not isinstance(other, Hand):
-            raise PokerException("Hand cannot be compared to non-hand object")
-        if isinstance(other, RoyalFlush):
-            return HAND_COMPARE_LT
-        if isinstance(other, StraightFlush):
-            return HAND_COMPARE_LT
-        if isinstance(other, FourOfAKind):
-            return HAND_COMPARE_LT
-        if isinstance(other, FullHouse):
-            return HAND_COMPARE_LT
-        if isinstance(other, Flush):
-            return HAND_COMPARE_LT
-        if isinstance(other, Straight):
-            if self.highest_straight_card > other.highest_straight_card:
-                return HAND_COMPARE_GT
-            elif other.highest_straight_card > self.highest_straight_card:
-                return HAND_COMPARE_LT
-            else:
-                return HAND_COMPARE_EQ
-        return HAND_COMPARE_GT
-    
-    def __gt__(self, other):
-        return self.compare(other) == HAND_COMPARE_GT
 
-    def __lt__(self, other):
-        return self.compare(other) == HAND_COMPARE_LT
-    
-    def __eq__(self, other):
-        return self.compare(other) == HAND_COMPARE_EQ
-    
     def __str__(self):
         return f"Straight: {self.highest_straight_card.rank} high"
-    
-
 
 class ThreeOfAKind(Hand):
     def __init__(self, cards: list[Card]):
         super().__init__(cards)
-        ranks = [card.rank for card in cards]
-        for rank in ranks:
-            if ranks.count(rank) == 3:
-                self.rank = rank
-                self.kickers = [card for card in cards if card.rank != rank]
+        values = [card.value for card in cards]
+        for value in values:
+            if values.count(value) == 3:
+                self.rank_value = value
+                self.rank = CARD_RANK_NAMES[value - 2]
+                self.kickers = [card for card in cards if card.value != value]
                 return
         raise PokerException("Invalid Three of a Kind")
-    
-    def compare(self, other):
-        if not isinstance(other, Hand):
-            raise PokerException("Hand cannot be compared to non-hand object")
-        if isinstance(other, RoyalFlush):
-            return HAND_COMPARE_LT
-        if isinstance(other, StraightFlush):
-            return HAND_COMPARE_LT
-        if isinstance(other, FourOfAKind):
-            return HAND_COMPARE_LT
-        if isinstance(other, FullHouse):
-            return HAND_COMPARE_LT
-        if isinstance(other, Flush):
-            return HAND_COMPARE_LT
-        if isinstance(other, Straight):
-            return HAND_COMPARE_LT
-        if isinstance(other, ThreeOfAKind):
-            if self.rank < other.rank:
-                return HAND_COMPARE_LT
-            elif self.rank == other.rank:
-                result = self.evaluate_kickers(self.kickers, other.kickers)
-                if result == FIRST_KICKER_WINS:
-                    return HAND_COMPARE_GT
-                elif result == SECOND_KICKER_WINS:
-                    return HAND_COMPARE_LT
-                else:
-                    return HAND_COMPARE_EQ
-        return HAND_COMPARE_GT
-    
-    def __gt__(self, other):
-        return self.compare(other) == HAND_COMPARE_GT
-
-    def __lt__(self, other):
-        return self.compare(other) == HAND_COMPARE_LT
-    
-    def __eq__(self, other):
-        return self.compare(other) == HAND_COMPARE_EQ
-    
 
 class TwoPair(Hand):
     def __init__(self, cards: list[Card]):
         super().__init__(cards)
-        ranks = [card.rank for card in cards]
+        values = [card.value for card in cards]
         first_pair_rank = None
         second_pair_rank = None
-        for rank in ranks:
-            if ranks.count(rank) == 2:
+        for value in values:
+            if values.count(value) == 2:
                 if first_pair_rank is None:
-                    first_pair_rank = rank
-                elif second_pair_rank is None and rank != first_pair_rank:
-                    second_pair_rank = rank
+                    first_pair_rank = value
+                elif second_pair_rank is None and value != first_pair_rank:
+                    second_pair_rank = value
         if first_pair_rank and second_pair_rank:
-            self.first_pair_rank = first_pair_rank
-            self.second_pair_rank = second_pair_rank
-            self.kicker = [card for card in cards if card.rank != first_pair_rank and card.rank != second_pair_rank][0]
+            self.first_pair_rank_value = first_pair_rank
+            self.second_pair_rank_value = second_pair_rank
+            self.first_pair_rank = CARD_RANK_NAMES[first_pair_rank - 2]
+            self.second_pair_rank = CARD_RANK_NAMES[second_pair_rank - 2]
+            self.kicker = [card for card in cards if card.value != first_pair_rank and card.value != second_pair_rank][0]
             return
         raise PokerException("Invalid Two Pair")
-    
-    def compare(self, other):
-        if not isinstance(other, Hand):
-            raise PokerException("Hand cannot be compared to non-hand object")
-        if isinstance(other, RoyalFlush):
-            return HAND_COMPARE_LT
-        if isinstance(other, StraightFlush):
-            return HAND_COMPARE_LT
-        if isinstance(other, FourOfAKind):
-            return HAND_COMPARE_LT
-        if isinstance(other, FullHouse):
-            return HAND_COMPARE_LT
-        if isinstance(other, Flush):
-            return HAND_COMPARE_LT
-        if isinstance(other, Straight):
-            return HAND_COMPARE_LT
-        if isinstance(other, ThreeOfAKind):
-            return HAND_COMPARE_LT
-        if isinstance(other, TwoPair):
-            if self.first_pair_rank > other.first_pair_rank:
-                return HAND_COMPARE_GT
-            elif self.first_pair_rank == other.first_pair_rank:
-                if self.second_pair_rank < other.second_pair_rank:
-                    return HAND_COMPARE_LT
-                elif self.second_pair_rank == other.second_pair_rank:
-                    result = self.evaluate_kickers([self.kicker], [other.kicker])
-                    if result == FIRST_KICKER_WINS:
-                        return HAND_COMPARE_GT
-                    elif result == SECOND_KICKER_WINS:
-                        return HAND_COMPARE_LT
-                    else:
-                        return HAND_COMPARE_EQ
-        return HAND_COMPARE_GT
-    
-    def __gt__(self, other):
-        return self.compare(other) == HAND_COMPARE_GT
-    
-    def __lt__(self, other):
-        return self.compare(other) == HAND_COMPARE_LT
-    
-    def __eq__(self, other):
-        return self.compare(other) == HAND_COMPARE_EQ
 
 class OnePair(Hand):
     def __init__(self, cards: list[Card]):
         super().__init__(cards)
-        ranks = [card.rank for card in cards]
-        for rank in ranks:
-            if ranks.count(rank) == 2:
-                self.rank = rank
-                self.kickers = [card for card in cards if card.rank != rank]
+        values = [card.value for card in cards]
+        for value in values:
+            if values.count(value) == 2:
+                self.rank_value = value
+                self.rank = CARD_RANK_NAMES[value - 2]
+                self.kickers = [card for card in cards if card.value != value]
                 return
         raise PokerException("Invalid One Pair")
 
-    def compare(self, other):
-        if not isinstance(other, Hand):
-            raise PokerException("Hand cannot be compared to non-hand object")
-        if isinstance(other, RoyalFlush):
-            return HAND_COMPARE_LT
-        if isinstance(other, StraightFlush):
-            return HAND_COMPARE_LT
-        if isinstance(other, FourOfAKind):
-            return HAND_COMPARE_LT
-        if isinstance(other, FullHouse):
-            return HAND_COMPARE_LT
-        if isinstance(other, Flush):
-            return HAND_COMPARE_LT
-        if isinstance(other, Straight):
-            return HAND_COMPARE_LT
-        if isinstance(other, ThreeOfAKind):
-            return HAND_COMPARE_LT
-        if isinstance(other, TwoPair):
-            return HAND_COMPARE_LT
-        if isinstance(other, OnePair):
-            if self.rank < other.rank:
-                return HAND_COMPARE_LT
-            elif self.rank == other.rank:
-                result = self.evaluate_kickers(self.kickers, other.kickers)
-                if result == FIRST_KICKER_WINS:
-                    return HAND_COMPARE_GT
-                elif result == SECOND_KICKER_WINS:
-                    return HAND_COMPARE_LT
-                else:
-                    return HAND_COMPARE_EQ
-        return HAND_COMPARE_GT
-    
-    def __gt__(self, other):
-        return self.compare(other) == HAND_COMPARE_GT
-
-    def __lt__(self, other):
-        return self.compare(other) == HAND_COMPARE_LT
-    
-    def __eq__(self, other):
-        return self.compare(other) == HAND_COMPARE_EQ
-
 class HighCard(Hand):
     def __init__(self, cards: list[Card]):
         super().__init__(cards)
-        #use the get_card_rank_value method to get the rank value of the cards
-        self.highest_card = max(cards, key=lambda card: card.get_card_rank_value(card.rank))
-
-    def compare(self, other):
-        if not isinstance(other, Hand):
-            raise PokerException("Hand cannot be compared to non-hand object")
-        if isinstance(other, RoyalFlush):
-            return HAND_COMPARE_LT
-        if isinstance(other, StraightFlush):
-            return HAND_COMPARE_LT
-        if isinstance(other, FourOfAKind):
-            return HAND_COMPARE_LT
-        if isinstance(other, FullHouse):
-            return HAND_COMPARE_LT
-        if isinstance(other, Flush):
-            return HAND_COMPARE_LT
-        if isinstance(other, Straight):
-            return HAND_COMPARE_LT
-        if isinstance(other, ThreeOfAKind):
-            return HAND_COMPARE_LT
-        if isinstance(other, TwoPair):
-            return HAND_COMPARE_LT
-        if isinstance(other, OnePair):
-            return HAND_COMPARE_LT
-        if isinstance(other, HighCard):
-            result = self.evaluate_kickers(self.cards ,other.cards)
-            if result == FIRST_KICKER_WINS:
-                return HAND_COMPARE_GT
-            elif result == SECOND_KICKER_WINS:
-                return HAND_COMPARE_LT
-            else:
-                return HAND_COMPARE_EQ
-        if isinstance(other, WorstPokerHand):
-            return HAND_COMPARE_GT
+        self.highest_card = max(cards, key=_card_value)
 
-    def __gt__(self, other):
-        return self.compare(other) == HAND_COMPARE_GT
-    
-    def __lt__(self, other):
-        return self.compare(other) == HAND_COMPARE_LT
-    
-    def __eq__(self, other):
-        return self.compare(other) == HAND_COMPARE_EQ
-    
     def __str__(self):
         return f"Cards: {', '.join([str(card) for card in self.cards])}, High Card: {self.highest_card.rank}"
 
+# ---------------------------------------------------------------------------
+# Lookup table evaluator
+#
+# Cactus Kev style: every rank gets a prime so the product of a hand's rank
+# primes identifies its rank multiset, and flushes are looked up by the 13 bit
+# mask of their ranks. Both tables are built once at import time and map
+# straight to an integer strength, so evaluating a hand never raises or builds
+# Hand objects.
+# ---------------------------------------------------------------------------
+
+# bit masks of the ten straights, highest first. bit 0 is a deuce, bit 12 an ace
+_STRAIGHT_MASKS = tuple((0b11111 << (high - 6), high) for high in range(14, 5, -1)) + ((0b1000000001111, 5),)
+
+def _pack_strength(category, ranks):
+    strength = category << STRENGTH_CATEGORY_SHIFT
+    shift = 16
+    for rank in ranks:
+        strength |= rank << shift
+        shift -= 4
+    return strength
+
+def _straight_high_card(mask):
+    for straight_mask, high in _STRAIGHT_MASKS:
+        if mask & straight_mask == straight_mask:
+            return high
+    return 0
+
+# high card of the best straight in every 13 bit rank mask, 0 when there is none
+_STRAIGHT_TABLE = [_straight_high_card(mask) for mask in range(1 << 13)]
+
+def _flush_strength(mask):
+    """Strength of the best flush that can be made from the ranks in mask."""
+    high = _STRAIGHT_TABLE[mask]
+    if high == CARD_RANK_VALUE_A:
+        return _pack_strength(HAND_RANK_ROYAL_FLUSH, [high])
+    if high:
+        return _pack_strength(HAND_RANK_STRAIGHT_FLUSH, [high])
+    ranks = [value for value in range(CARD_RANK_VALUE_A, 1, -1) if mask & (1 << (value - 2))]
+    return _pack_strength(HAND_RANK_FLUSH, ranks[:5])
+
+def _rank_multiset_strength(groups, mask):
+    """
+    Strength of the best non flush hand that can be made from a rank multiset,
+    given as [rank, count] groups sorted by count and then rank, highest first.
+    """
+    top_rank, top_count = groups[0]
+    if top_count == 4:
+        return _pack_strength(HAND_RANK_FOUR_OF_A_KIND, [top_rank, max(group[0] for group in groups[1:])])
+    if top_count == 3 and groups[1][1] >= 2:
+        return _pack_strength(HAND_RANK_FULL_HOUSE, [top_rank, groups[1][0]])
+    high = _STRAIGHT_TABLE[mask]
+    if high:
+        return _pack_strength(HAND_RANK_STRAIGHT, [high])
+    if top_count == 3:
+        return _pack_strength(HAND_RANK_THREE_OF_A_KIND, [top_rank, groups[1][0], groups[2][0]])
+    if top_count == 2 and groups[1][1] == 2:
+        return _pack_strength(HAND_RANK_TWO_PAIR, [top_rank, groups[1][0], max(group[0] for group in groups[2:])])
+    if top_count == 2:
+        return _pack_strength(HAND_RANK_ONE_PAIR, [group[0] for group in groups[:4]])
+    return _pack_strength(HAND_RANK_HIGH_CARD, [group[0] for group in groups[:5]])
+
+def _build_tables():
+    from itertools import combinations, combinations_with_replacement
+    flush_table = [0] * (1 << 13)
+    product_table = {}
+    for size in range(5, 8):
+        for ranks in combinations(range(13), size):
+            mask = sum(1 << rank for rank in ranks)
+            flush_table[mask] = _flush_strength(mask)
+
+        # ranks come out in descending order, so equal ranks are adjacent
+        for ranks in combinations_with_replacement(range(CARD_RANK_VALUE_A, 1, -1), size):
+            groups = []
+            previous = 0
+            product = 1
+            mask = 0
+            for rank in ranks:
+                product *= _RANK_PRIMES[rank]
+                if rank == previous:
+                    groups[-1][1] += 1
+                    if groups[-1][1] > 4:
+                        break
+                else:
+                    groups.append([rank, 1])
+                    mask |= 1 << (rank - 2)
+                    previous = rank
+            else:
+                groups.sort(key=_group_count_descending)
+                product_table[product] = _rank_multiset_strength(groups, mask)
+    return flush_table, product_table
+
+def _group_count_descending(group):
+    return -group[1]
+
+_FLUSH_TABLE, _PRODUCT_TABLE = _build_tables()
+_SUIT_SHIFTS = (0, 13, 26, 39)
+_RANK_MASK = (1 << 13) - 1
+
+def evaluate_hand(cards) -> int:
+    """
+    Return the strength of the best 5 card hand that can be made from 5, 6 or
+    7 cards. Higher is better and equal hands have equal strength.
+    """
+    if not 5 <= len(cards) <= 7:
+        raise PokerException("Hand must contain between 5 and 7 cards")
+    product = 1
+    cards_mask = 0
+    for card in cards:
+        product *= card.prime
+        cards_mask |= card.mask
+    # each suit owns 13 consecutive bits of the card mask. with at most 7 cards
+    # a flush leaves too few off suit cards for quads or a full house, so a
+    # flush table hit is always the best hand
+    for shift in _SUIT_SHIFTS:
+        mask = (cards_mask >> shift) & _RANK_MASK
+        if mask.bit_count() >= 5:
+            return _FLUSH_TABLE[mask]
+    strength = _PRODUCT_TABLE.get(product)
+    if strength is None:
+        raise PokerException("Invalid Hand")
+    return strength
+
+class IncrementalEvaluator:
+    """
+    Evaluation state that grows one card at a time, seeded with the hole cards
+    and given each community card as it is dealt. Adding a card is O(1) and the
+    current strength is a single table lookup, cached until the next card.
+    """
+    __slots__ = ('cards_mask', 'suit_counts', 'product', 'card_count', '_strength')
+
+    def __init__(self, cards=()):
+        self.cards_mask = 0  # Card.mask bits of the cards held, 13 per suit
+        self.suit_counts = [0, 0, 0, 0]
+        self.product = 1  # product of the rank primes, the _PRODUCT_TABLE key
+        self.card_count = 0
+        self._strength = None
+        for card in cards:
+            self.add(card)
+
+    def add(self, card: Card):
+        if self.card_count == 7:
+            raise PokerException("Hand must contain between 5 and 7 cards")
+        self.cards_mask |= card.mask
+        self.suit_counts[card.suit_index] += 1
+        self.product *= card.prime
+        self.card_count += 1
+        self._strength = None
+
+    def remove(self, card: Card):
+        """Take back a card added earlier."""
+        self.cards_mask &= ~card.mask
+        self.suit_counts[card.suit_index] -= 1
+        self.product //= card.prime
+        self.card_count -= 1
+        self._strength = None
+
+    @property
+    def strength(self) -> int:
+        """Strength of the best hand so far as returned by evaluate_hand, or None with fewer than 5 cards."""
+        if self._strength is None and self.card_count >= 5:
+            for suit_index, count in enumerate(self.suit_counts):
+                if count >= 5:
+                    self._strength = _FLUSH_TABLE[(self.cards_mask >> _SUIT_SHIFTS[suit_index]) & _RANK_MASK]
+                    break
+            else:
+                self._strength = _PRODUCT_TABLE.get(self.product)
+                if self._strength is None:
+                    raise PokerException("Invalid Hand")
+        return self._strength
+
+    @property
+    def category(self) -> "HandCategory":
+        """Category of the best hand so far, or None with fewer than 5 cards."""
+        strength = self.strength
+        return None if strength is None else hand_category(strength)
+
+    def copy(self) -> "IncrementalEvaluator":
+        clone = IncrementalEvaluator.__new__(IncrementalEvaluator)
+        clone.cards_mask = self.cards_mask
+        clone.suit_counts = self.suit_counts[:]
+        clone.product = self.product
+        clone.card_count = self.card_count
+        clone._strength = self._strength
+        return clone
+
+def hand_category(strength: int) -> HandCategory:
+    """Return the category of a strength returned by evaluate_hand."""
+    return _HAND_CATEGORIES[strength >> STRENGTH_CATEGORY_SHIFT]
+
+# the same tables as numpy arrays for evaluate_batch. the product table
+# becomes sorted keys plus matching strengths so it can be searched in bulk
+_FLUSH_TABLE_ARRAY = np.array(_FLUSH_TABLE, dtype=np.int32)
+_PRODUCT_KEYS = np.array(sorted(_PRODUCT_TABLE), dtype=np.int64)
+_PRODUCT_VALUES = np.array([_PRODUCT_TABLE[key] for key in _PRODUCT_KEYS.tolist()], dtype=np.int32)
+_CARD_PRIMES = np.array([card.prime for card in CARDS], dtype=np.int64)
+
+def cards_to_ids(cards) -> np.ndarray:
+    """Convert a list of cards to an array of their ids."""
+    return np.array([card.id for card in cards], dtype=np.int8)
+
+def evaluate_batch(cards: np.ndarray) -> np.ndarray:
+    """
+    Vectorized evaluate_hand. Takes an (N, k) array of card ids with k between
+    5 and 7 and returns the N hand strengths as an int32 array.
+    """
+    cards = np.asarray(cards)
+    if cards.ndim != 2 or not 5 <= cards.shape[1] <= 7:
+        raise PokerException("Batch must be an (N, 5), (N, 6) or (N, 7) array of card ids")
+    ids = cards.astype(np.int64)
+
+    products = _CARD_PRIMES[ids].prod(axis=1)
+    positions = np.searchsorted(_PRODUCT_KEYS, products)
+    np.minimum(positions, len(_PRODUCT_KEYS) - 1, out=positions)
+    if not np.array_equal(_PRODUCT_KEYS[positions], products):
+        raise PokerException("Invalid Hand")
+    strengths = _PRODUCT_VALUES[positions]
+
+    # as in evaluate_hand each suit owns 13 bits of the card mask, and the
+    # flush table is 0 for any suit holding fewer than 5 cards
+    cards_masks = np.bitwise_or.reduce(np.left_shift(np.int64(1), ids), axis=1)
+    for shift in _SUIT_SHIFTS:
+        flush_strengths = _FLUSH_TABLE_ARRAY[(cards_masks >> shift) & _RANK_MASK]
+        np.maximum(strengths, flush_strengths, out=strengths)
+    return strengths
+
+# Suit isomorphism: relabelling suits never changes a situation, so hands are
+# keyed on a canonical form. Each suit gets a 26 bit key, hole card ranks in the
+# high 13 bits and board ranks in the low 13, and suits are renumbered by
+# descending key. Equivalent situations end up with the same card masks.
+
+def canonical_masks(hole_cards, board=()) -> tuple:
+    """Return the (hole mask, board mask) of the canonical suit relabelling."""
+    suit_keys = [0, 0, 0, 0]
+    for card in hole_cards:
+        suit_keys[card.suit_index] |= 1 << (card.value + 11)
+    for card in board:
+        suit_keys[card.suit_index] |= 1 << (card.value - 2)
+    hole_mask = board_mask = 0
+    for shift, key in zip(_SUIT_SHIFTS, sorted(suit_keys, reverse=True)):
+        hole_mask |= (key >> 13) << shift
+        board_mask |= (key & _RANK_MASK) << shift
+    return hole_mask, board_mask
+
+def canonical_key(hole_cards, board=()) -> int:
+    """
+    Return one integer identifying the hole cards and board up to suit
+    permutation, for keying dicts and caches. It packs both 52 bit masks, so
+    it is sparse (up to 104 bits) and can not index an array.
+    """
+    hole_mask, board_mask = canonical_masks(hole_cards, board)
+    return (hole_mask << 52) | board_mask
+
+def canonicalize(hole_cards, board=()) -> tuple:
+    """Return the canonical (hole cards, board) as lists of cards ordered by id."""
+    hole_mask, board_mask = canonical_masks(hole_cards, board)
+    return ([card for card in CARDS if hole_mask & card.mask],
+            [card for card in CARDS if board_mask & card.mask])
+
+def canonical_masks_batch(hole_cards: np.ndarray, board: np.ndarray = None) -> np.ndarray:
+    """
+    Vectorized canonical_masks. Takes an (N, h) array of hole card ids and an
+    optional (N, b) array of board ids and returns an (N, 2) int64 array of
+    canonical hole and board masks.
+    """
+    hole_ids = np.asarray(hole_cards).astype(np.int64)
+    if hole_ids.ndim != 2:
+        raise PokerException("Hole cards must be an (N, h) array of card ids")
+    board_ids = np.zeros((len(hole_ids), 0), dtype=np.int64) if board is None else np.asarray(board).astype(np.int64)
+    if board_ids.ndim != 2 or len(board_ids) != len(hole_ids):
+        raise PokerException("Board must be an (N, b) array of card ids")
+
+    hole_bits = np.left_shift(np.int64(1), hole_ids % 13 + 13)
+    board_bits = np.left_shift(np.int64(1), board_ids % 13)
+    suit_keys = np.empty((len(hole_ids), 4), dtype=np.int64)
+    for suit in range(4):
+        suit_keys[:, suit] = (np.bitwise_or.reduce(np.where(hole_ids // 13 == suit, hole_bits, 0), axis=1) |
+                              np.bitwise_or.reduce(np.where(board_ids // 13 == suit, board_bits, 0), axis=1))
+    suit_keys = np.sort(suit_keys, axis=1)[:, ::-1]
+
+    masks = np.zeros((len(hole_ids), 2), dtype=np.int64)
+    for suit, shift in enumerate(_SUIT_SHIFTS):
+        masks[:, 0] |= (suit_keys[:, suit] >> 13) << shift
+        masks[:, 1] |= (suit_keys[:, suit] & _RANK_MASK) << shift
+    return masks
+
+HAND_RANK_NAMES = {
+    HAND_RANK_HIGH_CARD: HIGH_CARD,
+    HAND_RANK_ONE_PAIR: ONE_PAIR,
+    HAND_RANK_TWO_PAIR: TWO_PAIR,
+    HAND_RANK_THREE_OF_A_KIND: THREE_OF_A_KIND,
+    HAND_RANK_STRAIGHT: STRAIGHT,
+    HAND_RANK_FLUSH: FLUSH,
+    HAND_RANK_FULL_HOUSE: FULL_HOUSE,
+    HAND_RANK_FOUR_OF_A_KIND: FOUR_OF_A_KIND,
+    HAND_RANK_STRAIGHT_FLUSH: STRAIGHT_FLUSH,
+    HAND_RANK_ROYAL_FLUSH: ROYAL_FLUSH
+}
+
+# how many cards of each rank packed in a strength make up the hand, for the
+# categories that are not straights
+_CATEGORY_RANK_COUNTS = {
+    HAND_RANK_HIGH_CARD: (1, 1, 1, 1, 1),
+    HAND_RANK_ONE_PAIR: (2, 1, 1, 1),
+    HAND_RANK_TWO_PAIR: (2, 2, 1),
+    HAND_RANK_THREE_OF_A_KIND: (3, 1, 1),
+    HAND_RANK_FLUSH: (1, 1, 1, 1, 1),
+    HAND_RANK_FULL_HOUSE: (3, 2),
+    HAND_RANK_FOUR_OF_A_KIND: (4, 1),
+}
+_STRAIGHT_CATEGORIES = (HAND_RANK_STRAIGHT, HAND_RANK_STRAIGHT_FLUSH, HAND_RANK_ROYAL_FLUSH)
+_FLUSH_CATEGORIES = (HAND_RANK_FLUSH, HAND_RANK_STRAIGHT_FLUSH, HAND_RANK_ROYAL_FLUSH)
+
 class PokerRules:
     def __init__(self):
         pass
@@ -618,57 +923,69 @@ class PokerRules:
         """
         
         best_hand = None
+        best_strength = -1
         for hand in hands:
-            # try to create a hand object
+            if len(hand) != 5:
+                continue
             try:
-                current_hand = self.create_hand_object(hand)
-                if best_hand is None or current_hand > best_hand:
-                    best_hand = current_hand
+                strength = evaluate_hand(hand)
             except PokerException:
                 continue
-        return best_hand
-    
-    def create_hand_object(self, hand: list[Card]) -> Hand:
+            if strength > best_strength:
+                best_hand = hand
+                best_strength = strength
+        if best_hand is None:
+            return None
+        return self.create_hand_object(best_hand, best_strength)
+
+    def evaluate(self, hand: list[Card]) -> int:
+        """
+        Given 5 to 7 cards, return the integer strength of the best hand they make.
+        """
+        return evaluate_hand(hand)
+
+    def best_hand(self, cards: list[Card]) -> Hand:
+        """
+        Given 5 to 7 cards, return the Hand object of the best 5 of them, from a
+        single evaluation rather than one per 5 card combination.
+        """
+        strength = evaluate_hand(cards)
+        category = strength >> STRENGTH_CATEGORY_SHIFT
+        if category in _FLUSH_CATEGORIES:
+            suits = [card.suit_index for card in cards]
+            flush_suit = max(set(suits), key=suits.count)
+            cards = [card for card in cards if card.suit_index == flush_suit]
+        if category in _STRAIGHT_CATEGORIES:
+            high = (strength >> 16) & 0xF
+            # a wheel's ace is its low card
+            wanted = [(value if value > 1 else CARD_RANK_VALUE_A, 1) for value in range(high, high - 5, -1)]
+        else:
+            wanted = [((strength >> (16 - 4 * index)) & 0xF, count)
+                      for index, count in enumerate(_CATEGORY_RANK_COUNTS[category])]
+        best = []
+        for value, count in wanted:
+            best += [card for card in cards if card.value == value][:count]
+        return self.create_hand_object(best, strength)
+
+    def create_hand_object(self, hand: list[Card], strength: int = None) -> Hand:
         """
         Given a hand, return the appropriate hand object.
         """
-        try:
-            return RoyalFlush(hand)
-        except PokerException:
-            pass
-        try:
-            return StraightFlush(hand)
-        except PokerException:
-            pass
-        try:
-            return FourOfAKind(hand)
-        except PokerException:
-            pass
-        try:
-            return FullHouse(hand)
-        except PokerException:
-            pass
-        try:
-            return Flush(hand)
-        except PokerException:
-            pass
-        try:
-            return Straight(hand)
-        except PokerException:
-            pass
-        try:
-            return ThreeOfAKind(hand)
-        except PokerException:
-            pass
-        try:
-            return TwoPair(hand)
-        except PokerException:
-            pass
-        try:
-            return OnePair(hand)
-        except PokerException:
-            pass
-        try:
-            return HighCard(hand)
-        except PokerException:
-            raise PokerException("Invalid Hand") from None
\ No newline at end of file
+        if strength is None:
+            strength = evaluate_hand(hand)
+        hand_object = _HAND_CLASSES_BY_RANK[hand_category(strength)](hand)
+        hand_object._strength = strength
+        return hand_object
+
+_HAND_CLASSES_BY_RANK = {
+    HAND_RANK_HIGH_CARD: HighCard,
+    HAND_RANK_ONE_PAIR: OnePair,
+    HAND_RANK_TWO_PAIR: TwoPair,
+    HAND_RANK_THREE_OF_A_KIND: ThreeOfAKind,
+    HAND_RANK_STRAIGHT: Straight,
+    HAND_RANK_FLUSH: Flush,
+    HAND_RANK_FULL_HOUSE: FullHouse,
+    HAND_RANK_FOUR_OF_A_KIND: FourOfAKind,
+    HAND_RANK_STRAIGHT_FLUSH: StraightFlush,
+    HAND_RANK_ROYAL_FLUSH: RoyalFlush
+}
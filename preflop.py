@@ -0,0 +1,231 @@
+import os
+import struct
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import poker_util as pu
+import equity as eq
+
+HAND_CLASS_COUNT = 169
+MAX_RANDOM_OPPONENTS = 8
+
+TABLE_MAGIC = b'PFEQ'
+TABLE_VERSION = 1
+DEFAULT_TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'preflop_equity.bin')
+DEFAULT_MATRIX_SAMPLES = 20000
+DEFAULT_RANDOM_SAMPLES = 50000
+
+# rows evaluated per numpy batch while building a matrix row
+_MAX_BATCH_ROWS = 100000
+_RANK_CHARACTERS = '23456789TJQKA'
+
+# file layout: header, class vs class matrix, class vs 1..8 random hands, then
+# one done flag per generation unit (matrix rows first, then random rows)
+_HEADER = struct.Struct('<4sIII')
+_MATRIX_SHAPE = (HAND_CLASS_COUNT, HAND_CLASS_COUNT)
+_RANDOM_SHAPE = (HAND_CLASS_COUNT, MAX_RANDOM_OPPONENTS)
+_UNIT_COUNT = 2 * HAND_CLASS_COUNT
+_MATRIX_OFFSET = _HEADER.size
+_RANDOM_OFFSET = _MATRIX_OFFSET + 4 * HAND_CLASS_COUNT * HAND_CLASS_COUNT
+_DONE_OFFSET = _RANDOM_OFFSET + 4 * HAND_CLASS_COUNT * MAX_RANDOM_OPPONENTS
+_FILE_SIZE = _DONE_OFFSET + _UNIT_COUNT
+
+def _class_index(card1, card2):
+    high, low = max(card1.value, card2.value) - 2, min(card1.value, card2.value) - 2
+    if high == low or card1.suit_index == card2.suit_index:
+        return high * 13 + low  # pairs on the diagonal, suited hands below it
+    return low * 13 + high  # offsuit hands above it
+
+# class of every ordered pair of card ids, indexed by id1 * 52 + id2
+_PAIR_CLASSES = [_class_index(card1, card2) for card1 in pu.CARDS for card2 in pu.CARDS]
+
+def hand_class(card1: pu.Card, card2: pu.Card) -> int:
+    """Return the preflop hand class (0 to 168) of two hole cards."""
+    return _PAIR_CLASSES[card1.id * 52 + card2.id]
+
+def hand_class_name(index: int) -> str:
+    """Return the usual name of a hand class, such as 'AA', 'AKs' or '72o'."""
+    row, column = divmod(index, 13)
+    if row == column:
+        return _RANK_CHARACTERS[row] * 2
+    if row > column:
+        return f"{_RANK_CHARACTERS[row]}{_RANK_CHARACTERS[column]}s"
+    return f"{_RANK_CHARACTERS[column]}{_RANK_CHARACTERS[row]}o"
+
+def _build_class_combos():
+    combos = np.zeros((HAND_CLASS_COUNT, 12, 2), dtype=np.int64)
+    counts = np.zeros(HAND_CLASS_COUNT, dtype=np.int64)
+    for id1 in range(52):
+        for id2 in range(id1 + 1, 52):
+            index = _PAIR_CLASSES[id1 * 52 + id2]
+            combos[index, counts[index]] = (id1, id2)
+            counts[index] += 1
+    return combos, counts
+
+# every two card combo of each class, padded to 12, and how many there are
+_CLASS_COMBOS, _CLASS_COMBO_COUNTS = _build_class_combos()
+
+def _sample_combos(rng, classes):
+    picks = (rng.random(len(classes)) * _CLASS_COMBO_COUNTS[classes]).astype(np.int64)
+    return _CLASS_COMBOS[classes, picks]
+
+def _matrix_row(row, samples, seed):
+    """Equity of class row against every class from row to 168."""
+    rng = np.random.default_rng(seed)
+    opponents = np.arange(row, HAND_CLASS_COUNT)
+    totals = np.zeros(len(opponents))
+    per_batch = max(1, _MAX_BATCH_ROWS // len(opponents))
+    done = 0
+    while done < samples:
+        batch = min(per_batch, samples - done)
+        opponent_index = np.repeat(np.arange(len(opponents)), batch)
+        hero = _sample_combos(rng, np.full(len(opponent_index), row))
+        villain = _sample_combos(rng, opponents[opponent_index])
+        # redraw the opponent's combo wherever it shares a card with the hero's
+        while True:
+            clash = ((hero[:, :1] == villain).any(axis=1)) | ((hero[:, 1:] == villain).any(axis=1))
+            if not clash.any():
+                break
+            villain[clash] = _sample_combos(rng, opponents[opponent_index[clash]])
+
+        keys = rng.random((len(hero), 52), dtype=np.float32)
+        rows = np.arange(len(hero))[:, None]
+        keys[rows, hero] = 2.0
+        keys[rows, villain] = 2.0
+        board = np.argpartition(keys, 5, axis=1)[:, :5]
+
+        hero_strengths = pu.evaluate_batch(np.concatenate([hero, board], axis=1))
+        villain_strengths = pu.evaluate_batch(np.concatenate([villain, board], axis=1))
+        shares = np.where(hero_strengths > villain_strengths, 1.0,
+                          np.where(hero_strengths == villain_strengths, 0.5, 0.0))
+        totals += np.bincount(opponent_index, weights=shares, minlength=len(opponents))
+        done += batch
+    return totals / samples
+
+def _random_row(row, samples, seed):
+    """Equity of class row against 1 to MAX_RANDOM_OPPONENTS random hands."""
+    hole_cards = [pu.card_from_id(int(card_id)) for card_id in _CLASS_COMBOS[row, 0]]
+    calculator = eq.EquityCalculator(processes=1, seed=seed, exact_threshold=0)
+    return np.array([calculator.equity(hole_cards, opponents=opponents, samples=samples).equity
+                     for opponents in range(1, MAX_RANDOM_OPPONENTS + 1)])
+
+def _run_unit(unit, matrix_samples, random_samples, seed):
+    # each unit gets its own seed so a resumed run matches an uninterrupted one
+    unit_seed = np.random.SeedSequence(seed, spawn_key=(unit,))
+    if unit < HAND_CLASS_COUNT:
+        return unit, _matrix_row(unit, matrix_samples, unit_seed)
+    return unit, _random_row(unit - HAND_CLASS_COUNT, random_samples, int(unit_seed.generate_state(1)[0]))
+
+def _open_arrays(path, mode):
+    with open(path, 'rb') as f:
+        magic, version, matrix_samples, random_samples = _HEADER.unpack(f.read(_HEADER.size))
+    if magic != TABLE_MAGIC or os.path.getsize(path) != _FILE_SIZE:
+        raise pu.PokerException(f"{path} is not a preflop equity table")
+    if version != TABLE_VERSION:
+        raise pu.PokerException(f"{path} is version {version}, expected version {TABLE_VERSION}")
+    matrix = np.memmap(path, dtype=np.float32, mode=mode, offset=_MATRIX_OFFSET, shape=_MATRIX_SHAPE)
+    vs_random = np.memmap(path, dtype=np.float32, mode=mode, offset=_RANDOM_OFFSET, shape=_RANDOM_SHAPE)
+    done = np.memmap(path, dtype=np.uint8, mode=mode, offset=_DONE_OFFSET, shape=(_UNIT_COUNT,))
+    return (matrix_samples, random_samples), matrix, vs_random, done
+
+def generate_preflop_table(path=DEFAULT_TABLE_PATH, matrix_samples=DEFAULT_MATRIX_SAMPLES,
+                           random_samples=DEFAULT_RANDOM_SAMPLES, processes=None, seed=0, max_units=None):
+    """
+    Build the preflop equity table at path. The work is split into one unit
+    per matrix row and one per class against random hands, spread over a
+    process pool. Every finished unit is flushed to disk and flagged, so an
+    interrupted run picks up where it stopped when called again with the same
+    settings. max_units limits how many pending units this call processes.
+    Returns True once every unit is done.
+    """
+    if not os.path.exists(path):
+        with open(path, 'wb') as f:
+            f.write(_HEADER.pack(TABLE_MAGIC, TABLE_VERSION, matrix_samples, random_samples))
+            f.truncate(_FILE_SIZE)
+    samples, matrix, vs_random, done = _open_arrays(path, 'r+')
+    if samples != (matrix_samples, random_samples):
+        raise pu.PokerException(f"{path} was started with samples {samples}, not {(matrix_samples, random_samples)}")
+
+    pending = [unit for unit in range(_UNIT_COUNT) if not done[unit]]
+    if max_units is not None:
+        pending = pending[:max_units]
+
+    def store(unit, values):
+        if unit < HAND_CLASS_COUNT:
+            matrix[unit, unit:] = values
+            matrix[unit:, unit] = 1.0 - values
+            matrix[unit, unit] = 0.5  # a class against itself is even by symmetry
+        else:
+            vs_random[unit - HAND_CLASS_COUNT] = values
+        matrix.flush()
+        vs_random.flush()
+        done[unit] = 1
+        done.flush()
+
+    if processes == 1:
+        for unit in pending:
+            store(*_run_unit(unit, matrix_samples, random_samples, seed))
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            futures = [pool.submit(_run_unit, unit, matrix_samples, random_samples, seed) for unit in pending]
+            for future in as_completed(futures):
+                store(*future.result())
+    if os.path.abspath(path) == DEFAULT_TABLE_PATH:
+        reset_default_table()
+    return bool(done.all())
+
+class PreflopTable:
+    """
+    Read only view of a generated preflop equity table. The arrays are memory
+    mapped, so every process that loads the same file shares its pages.
+    """
+    def __init__(self, path=DEFAULT_TABLE_PATH):
+        self.path = path
+        (self.matrix_samples, self.random_samples), self.matrix, self.vs_random, self.done = _open_arrays(path, 'r')
+        if not self.done.all():
+            raise pu.PokerException(f"{path} is incomplete, run generate_preflop_table to finish it")
+
+    def class_equity(self, hero_class: int, villain_class: int) -> float:
+        """Equity of one hand class against another."""
+        return float(self.matrix[hero_class, villain_class])
+
+    def equity(self, hole_cards, opponents: int = 1) -> float:
+        """Equity of two hole cards against 1 to MAX_RANDOM_OPPONENTS random hands."""
+        if not 1 <= opponents <= MAX_RANDOM_OPPONENTS:
+            raise pu.PokerException(f"Preflop table covers 1 to {MAX_RANDOM_OPPONENTS} opponents")
+        return float(self.vs_random[hand_class(hole_cards[0], hole_cards[1]), opponents - 1])
+
+_NOT_LOADED = object()
+_default_table = _NOT_LOADED
+
+def load_default_table():
+    """
+    Return the table at DEFAULT_TABLE_PATH, or None if it has not been
+    generated. Agents ask on every decision, so the answer, missing or not,
+    is kept until reset_default_table().
+    """
+    global _default_table
+    if _default_table is _NOT_LOADED:
+        _default_table = None
+        if os.path.exists(DEFAULT_TABLE_PATH):
+            try:
+                _default_table = PreflopTable(DEFAULT_TABLE_PATH)
+            except pu.PokerException:
+                pass  # not finished generating
+    return _default_table
+
+def reset_default_table():
+    """Make the next load_default_table() look at DEFAULT_TABLE_PATH again."""
+    global _default_table
+    _default_table = _NOT_LOADED
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Generate the preflop equity table.")
+    parser.add_argument('--path', default=DEFAULT_TABLE_PATH)
+    parser.add_argument('--matrix-samples', type=int, default=DEFAULT_MATRIX_SAMPLES)
+    parser.add_argument('--random-samples', type=int, default=DEFAULT_RANDOM_SAMPLES)
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    generate_preflop_table(args.path, args.matrix_samples, args.random_samples, args.processes, args.seed)
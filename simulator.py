@@ -0,0 +1,211 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import agents as ag
+import poker_game as pk
+import poker_util as pu
+
+DEFAULT_STACK = 1000
+DEFAULT_HANDS_PER_GAME = 100
+
+class AgentSpec:
+    """
+    An agent to seat in simulated games: an agent class (or its name in the
+    agents module), the keyword arguments to build it with and how many seats
+    it takes at each table. Results are reported per spec name.
+    """
+    def __init__(self, agent, seats=1, name=None, **kwargs):
+        self.agent_class = getattr(ag, agent) if isinstance(agent, str) else agent
+        self.seats = seats
+        self.name = name or self.agent_class.__name__
+        self.kwargs = kwargs
+
+    def build(self):
+        return self.agent_class(**self.kwargs)
+
+class AgentResult:
+    """Chip results of one agent, accumulated per seat per hand."""
+    def __init__(self, name, total=0, total_squares=0, hands=0):
+        self.name = name
+        self.total = total  # net chips won
+        self.total_squares = total_squares
+        self.hands = hands  # seat hands played
+
+    def add(self, other):
+        self.total += other.total
+        self.total_squares += other.total_squares
+        self.hands += other.hands
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.hands if self.hands else 0.0
+
+    @property
+    def variance(self) -> float:
+        """Variance of the chips won per hand."""
+        if not self.hands:
+            return 0.0
+        return max(0.0, self.total_squares / self.hands - self.mean * self.mean)
+
+    @property
+    def bb_per_100(self) -> float:
+        return 100 * self.mean / pk.BIG_BLIND_AMOUNT
+
+    @property
+    def bb_per_100_std_error(self) -> float:
+        if not self.hands:
+            return 0.0
+        return 100 * (self.variance / self.hands) ** 0.5 / pk.BIG_BLIND_AMOUNT
+
+    def __repr__(self):
+        return (f"AgentResult(name={self.name}, chips={self.total}, hands={self.hands}, "
+                f"bb/100={self.bb_per_100:.2f} +/- {self.bb_per_100_std_error:.2f}, variance={self.variance:.1f})")
+
+class DiscardedGame:
+    """
+    A game given up on because an agent took an illegal action. Starting
+    PokerGame(players, seed=seed, table_id=table_id) with
+    deck.start_hand(first_hand) and fresh stacks replays it up to the failed
+    hand, hand_number of the table's deal stream.
+    """
+    def __init__(self, seed, table_id, first_hand, hand_number, error):
+        self.seed = seed
+        self.table_id = table_id
+        self.first_hand = first_hand
+        self.hand_number = hand_number
+        self.error = error  # repr of the exception
+
+    def __repr__(self):
+        return (f"DiscardedGame(seed={self.seed}, table_id={self.table_id}, first_hand={self.first_hand}, "
+                f"hand_number={self.hand_number}, error={self.error})")
+
+class MatchResults:
+    """Results so far of a simulated match."""
+    def __init__(self, names):
+        self.agents = {name: AgentResult(name) for name in names}
+        self.games = 0  # shards finished
+        self.hands = 0  # table hands played
+        self.discarded = []  # DiscardedGames, their failed hands are not in hands
+        self.elapsed = 0.0
+
+    @property
+    def hands_per_second(self) -> float:
+        return self.hands / self.elapsed if self.elapsed else 0.0
+
+    def __repr__(self):
+        return (f"MatchResults(games={self.games}, hands={self.hands}, discarded={len(self.discarded)}, "
+                f"hands_per_second={self.hands_per_second:.0f}, agents={list(self.agents.values())})")
+
+def _seat_players(specs, stack):
+    players = []
+    spec_names = {}
+    for spec in specs:
+        for seat in range(spec.seats):
+            name = spec.name if spec.seats == 1 else f"{spec.name}_{seat + 1}"
+            players.append(pk.Player(name=name, stack=stack, agent=spec.build()))
+            spec_names[name] = spec.name
+    return players, spec_names
+
+def _play_games(specs, hands, stack, seed, table_id):
+    """
+    Play hands hands at one table, starting a new game with fresh stacks
+    whenever a game ends. An illegal action ends its game, which is
+    reported and left out of the results; any other error propagates. Returns (hands played,
+    {spec name: AgentResult}, [DiscardedGame]).
+    """
+    results = {spec.name: AgentResult(spec.name) for spec in specs}
+    discarded = []
+    played = 0
+    hand_number = 0  # next hand of the table's deal stream
+    while hand_number < hands:
+        players, spec_names = _seat_players(specs, stack)
+        seated = list(players)
+        game = pk.PokerGame(players=players, maximum_hands=hands, seed=seed, table_id=table_id)
+        game.deck.start_hand(hand_number)  # carry on the table's deal stream rather than repeat it
+        first_hand = hand_number
+        while hand_number < hands:
+            stacks = [player.stack for player in seated]
+            try:
+                outcome = game.run_hand()
+            except (ValueError, pu.PokerException) as error:
+                discarded.append(DiscardedGame(seed, table_id, first_hand, hand_number, repr(error)))
+                hand_number += 1  # the next game skips the failed deal
+                break
+            if outcome is not pk.GAME_SHOULD_CONTINUE:
+                break
+            played += 1
+            hand_number += 1
+            for player, before in zip(seated, stacks):
+                if before == 0:
+                    continue  # busted earlier and no longer seated
+                delta = player.stack - before
+                result = results[spec_names[player.name]]
+                result.total += delta
+                result.total_squares += delta * delta
+                result.hands += 1
+    return played, results, discarded
+
+def run_match(specs, hands, stack=DEFAULT_STACK, hands_per_game=DEFAULT_HANDS_PER_GAME, processes=None, seed=0):
+    """
+    Play hands table hands between the agent specs, split into shards of
+    hands_per_game hands. A shard restarts from fresh stacks whenever someone
+    busts. Every shard deals from its own counter based stream (seed, shard
+    index), so results do not depend on how shards are spread over the
+    process pool. Yields the running MatchResults after each finished shard.
+    """
+    specs = [spec if isinstance(spec, AgentSpec) else AgentSpec(spec) for spec in specs]
+    if len({spec.name for spec in specs}) != len(specs):
+        raise ValueError("Agent specs need distinct names.")
+    if sum(spec.seats for spec in specs) < 2:
+        raise ValueError("At least two players are required to start a game.")
+    shards = [(specs, min(hands_per_game, hands - start), stack, seed, table_id)
+             for table_id, start in enumerate(range(0, hands, hands_per_game))]
+    results = MatchResults([spec.name for spec in specs])
+    started = time.perf_counter()
+
+    def collect(played, shard_results, discarded):
+        results.games += 1
+        results.hands += played
+        results.discarded += discarded
+        for name, result in shard_results.items():
+            results.agents[name].add(result)
+        results.elapsed = time.perf_counter() - started
+        return results
+
+    if processes == 1:
+        for shard in shards:
+            yield collect(*_play_games(*shard))
+        return
+    with ProcessPoolExecutor(max_workers=processes or os.cpu_count() or 1) as pool:
+        futures = [pool.submit(_play_games, *shard) for shard in shards]
+        for future in as_completed(futures):
+            yield collect(*future.result())
+
+def simulate_match(specs, hands, stack=DEFAULT_STACK, hands_per_game=DEFAULT_HANDS_PER_GAME, processes=None, seed=0) -> MatchResults:
+    """Run the whole match and return the final MatchResults."""
+    results = None
+    for results in run_match(specs, hands, stack, hands_per_game, processes, seed):
+        pass
+    return results
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Play agents from agents.py against each other.")
+    parser.add_argument('agents', nargs='+', help="agent class names, one per seat")
+    parser.add_argument('--hands', type=int, default=10000)
+    parser.add_argument('--stack', type=int, default=DEFAULT_STACK)
+    parser.add_argument('--hands-per-game', type=int, default=DEFAULT_HANDS_PER_GAME)
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    counts = {}
+    for agent in args.agents:
+        counts[agent] = counts.get(agent, 0) + 1
+    specs = [AgentSpec(agent, seats=seats) for agent, seats in counts.items()]
+    results = None
+    for results in run_match(specs, args.hands, args.stack, args.hands_per_game, args.processes, args.seed):
+        print(results)
+    for game in results.discarded if results is not None else ():
+        print(game)
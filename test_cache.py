@@ -0,0 +1,54 @@
+import unittest
+import equity as eq
+from cache import LRUCache, ENTRY_OVERHEAD_BYTES
+from poker_util import Card
+
+class TestLRUCache(unittest.TestCase):
+    def test_hits_and_misses(self):
+        cache = LRUCache()
+        self.assertIsNone(cache.get(1))
+        cache.put(1, 'one')
+        self.assertEqual(cache.get(1), 'one')
+        self.assertEqual(cache.get_or_compute(2, lambda: 'two'), 'two')
+        self.assertEqual(cache.get_or_compute(2, lambda: 'other'), 'two')
+        self.assertEqual((cache.hits, cache.misses), (2, 2))
+
+    def test_least_recently_used_is_evicted(self):
+        cache = LRUCache(max_entries=2)
+        cache.put(1, 'one')
+        cache.put(2, 'two')
+        cache.get(1)
+        cache.put(3, 'three')
+        self.assertIn(1, cache)
+        self.assertNotIn(2, cache)
+        self.assertEqual(cache.evictions, 1)
+
+    def test_memory_cap(self):
+        cache = LRUCache(max_bytes=20 * ENTRY_OVERHEAD_BYTES)
+        for key in range(1000):
+            cache.put(key, key)
+        self.assertLessEqual(cache.size_bytes, cache.max_bytes)
+        self.assertLess(len(cache), 20)
+        self.assertEqual(cache.evictions, 1000 - len(cache))
+        self.assertEqual(cache.stats()['entries'], len(cache))
+
+    def test_replacing_a_key_keeps_size_consistent(self):
+        cache = LRUCache()
+        cache.put(1, 'one')
+        size = cache.size_bytes
+        cache.put(1, 'one')
+        self.assertEqual(cache.size_bytes, size)
+        cache.clear()
+        self.assertEqual((len(cache), cache.size_bytes), (0, 0))
+
+class TestCachedEquity(unittest.TestCase):
+    def test_equity_shared_across_suit_permutations(self):
+        cache = LRUCache()
+        calculator = eq.EquityCalculator(processes=1, seed=1, cache=cache)
+        first = calculator.equity([Card('A', 'Hearts'), Card('K', 'Hearts')], [Card('2', 'Hearts')], samples=1000)
+        second = calculator.equity([Card('A', 'Spades'), Card('K', 'Spades')], [Card('2', 'Spades')], samples=1000)
+        self.assertIs(first, second)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+import equity as eq
+from poker_util import Card, PokerException
+
+class TestMonteCarloEquity(unittest.TestCase):
+    def setUp(self):
+        self.calculator = eq.EquityCalculator(processes=1, seed=3)
+
+    def tearDown(self):
+        self.calculator.close()
+
+    def test_aces_against_one_random_hand(self):
+        # pocket aces win about 85% of the time heads up
+        result = self.calculator.equity([Card('A', 'Hearts'), Card('A', 'Spades')], samples=20000)
+        self.assertAlmostEqual(result.equity, 0.852, delta=0.015)
+        self.assertLess(result.low, result.equity)
+        self.assertGreater(result.high, result.equity)
+        self.assertEqual(result.samples, 20000)
+
+    def test_more_opponents_lower_equity(self):
+        hole_cards = [Card('A', 'Hearts'), Card('A', 'Spades')]
+        heads_up = self.calculator.equity(hole_cards, opponents=1, samples=10000)
+        four_way = self.calculator.equity(hole_cards, opponents=3, samples=10000)
+        self.assertLess(four_way.equity, heads_up.equity)
+
+    def test_nuts_on_the_river(self):
+        hole_cards = [Card('A', 'Hearts'), Card('K', 'Hearts')]
+        board = [Card('10', 'Hearts'), Card('J', 'Hearts'), Card('Q', 'Hearts'), Card('2', 'Clubs'), Card('7', 'Spades')]
+        result = self.calculator.equity(hole_cards, board, opponents=2, samples=2000)
+        self.assertEqual(result.equity, 1.0)
+
+    def test_board_plays_splits_the_pot(self):
+        hole_cards = [Card('2', 'Clubs'), Card('3', 'Diamonds')]
+        board = [Card('10', 'Hearts'), Card('J', 'Hearts'), Card('Q', 'Hearts'), Card('K', 'Hearts'), Card('A', 'Hearts')]
+        result = self.calculator.equity(hole_cards, board, opponents=1, samples=1000)
+        self.assertEqual(result.equity, 0.5)
+
+    def test_time_budget(self):
+        result = self.calculator.equity([Card('7', 'Hearts'), Card('2', 'Clubs')], samples=None, time_budget=0.05)
+        self.assertGreater(result.samples, 0)
+
+    def test_duplicate_cards_rejected(self):
+        with self.assertRaises(PokerException):
+            self.calculator.equity([Card('A', 'Hearts'), Card('K', 'Hearts')], [Card('A', 'Hearts')])
+
+    def test_process_pool_matches_inline(self):
+        hole_cards = [Card('K', 'Hearts'), Card('Q', 'Hearts')]
+        inline = eq.calculate_equity(hole_cards, opponents=2, samples=6000, processes=1, seed=11)
+        pooled = eq.calculate_equity(hole_cards, opponents=2, samples=6000, processes=2, seed=11)
+        self.assertAlmostEqual(inline.equity, pooled.equity, places=9)
+
+class TestExactEquity(unittest.TestCase):
+    def setUp(self):
+        self.hole_cards = [Card('A', 'Hearts'), Card('K', 'Hearts')]
+        self.board = [Card('10', 'Hearts'), Card('2', 'Clubs'), Card('7', 'Spades'), Card('9', 'Diamonds')]
+
+    def test_river_heads_up_enumerates_every_holding(self):
+        board = self.board + [Card('3', 'Clubs')]
+        result = eq.calculate_equity(self.hole_cards, board, opponents=1, processes=1)
+        self.assertTrue(result.exact)
+        self.assertEqual(result.samples, 990)
+        self.assertEqual(result.std_error, 0.0)
+
+    def test_exact_is_deterministic(self):
+        first = eq.calculate_equity(self.hole_cards, self.board, processes=1, seed=1)
+        second = eq.calculate_equity(self.hole_cards, self.board, processes=1, seed=2)
+        self.assertTrue(first.exact)
+        self.assertEqual(first.equity, second.equity)
+
+    def test_exact_agrees_with_monte_carlo(self):
+        exact = eq.calculate_equity(self.hole_cards, self.board, processes=1)
+        sampled = eq.calculate_equity(self.hole_cards, self.board, processes=1, samples=40000, seed=4, exact_threshold=0)
+        self.assertFalse(sampled.exact)
+        self.assertAlmostEqual(exact.equity, sampled.equity, delta=0.01)
+
+    def test_threshold_switches_to_sampling(self):
+        self.assertEqual(eq.count_combinations(6, 4, 1), 46 * 990)
+        result = eq.calculate_equity(self.hole_cards, self.board, processes=1, samples=1000, exact_threshold=46 * 990 - 1)
+        self.assertFalse(result.exact)
+        self.assertEqual(result.samples, 1000)
+
+    def test_multiway_exact(self):
+        board = self.board + [Card('3', 'Clubs')]
+        result = eq.calculate_equity(self.hole_cards, board, opponents=2, processes=1, exact_threshold=10 ** 6)
+        self.assertTrue(result.exact)
+        self.assertEqual(result.samples, 990 * 903)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import io
+import json
+import unittest
+import events as ev
+from poker_game import PokerGame, Player
+from agents import AllInAgent, CallCheckAgent
+from test_games import MockDeck
+
+class TestEventLog(unittest.TestCase):
+    def tearDown(self):
+        ev.LOG.clear_sinks()
+
+    def play_hand(self):
+        game = PokerGame(players=[Player(name="AllInAgent", stack=1000, agent=AllInAgent()),
+                                  Player(name="CallCheckAgent", stack=1000, agent=CallCheckAgent())])
+        game.deck = MockDeck()
+        game.run_hand()
+
+    def test_disabled_by_default(self):
+        self.assertFalse(ev.LOG.enabled)
+        self.assertEqual(ev.LOG.sinks, [])
+
+    def test_ring_buffer_records_a_hand(self):
+        buffer = ev.LOG.add_sink(ev.RingBufferSink())
+        self.play_hand()
+        actions = buffer.of_type(ev.EVENT_ACTION)
+        self.assertIn({'player': 'AllInAgent', 'type': 'all_in', 'amount': 998}, actions)
+        self.assertEqual(buffer.of_type(ev.EVENT_SHOWDOWN)[0]['winners'], ['AllInAgent'])
+
+    def test_hand_result_is_an_event(self):
+        from poker_game import ShowdownState
+        buffer = ev.LOG.add_sink(ev.RingBufferSink())
+        agent = CallCheckAgent()
+        agent.player_name = "CallCheckAgent"
+        agent.analyze_amount_won(ShowdownState(players=[], community_cards=[], winners=[], pot=10))
+        self.assertEqual(buffer.of_type(ev.EVENT_HAND_RESULT), [{'player': 'CallCheckAgent', 'amount': 0, 'split': False}])
+
+    def test_ring_buffer_keeps_the_latest_events(self):
+        buffer = ev.RingBufferSink(capacity=3)
+        for amount in range(5):
+            buffer.write(ev.EVENT_BET_PLACED, {'player': 'a', 'amount': amount})
+        self.assertEqual([fields['amount'] for _, fields in buffer.events], [2, 3, 4])
+
+    def test_text_and_json_lines_sinks(self):
+        text, lines = io.StringIO(), io.StringIO()
+        ev.enable_text_output(text)
+        ev.LOG.add_sink(ev.JSONLinesSink(lines))
+        self.play_hand()
+        self.assertIn("Action taken: AllInAgent all_in 998", text.getvalue())
+        records = [json.loads(line) for line in lines.getvalue().splitlines()]
+        self.assertEqual(records[0]['event'], ev.EVENT_BETTING_ROUND_START)
+        self.assertIn(ev.EVENT_POT_AWARDED, [record['event'] for record in records])
+
+    def test_removing_the_last_sink_disables_the_log(self):
+        sink = ev.LOG.add_sink(ev.RingBufferSink())
+        ev.LOG.remove_sink(sink)
+        self.assertFalse(ev.LOG.enabled)
+
+if __name__ == "__main__":
+    unittest.main()
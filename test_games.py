@@ -1,5 +1,8 @@
+import random
 import unittest
-from poker_game import PokerGame, Player
+import numpy as np
+from poker_game import Action, PokerGame, Player, TableState
+import poker_game as pk
 from agents import AllInAgent, CallCheckAgent, FoldAgent, DelayedAllinAgent, ReRaiseAgent, DelayedRaiseAgent
 import poker_util as pu
 
@@ -47,6 +50,487 @@ class TestEndToEndGame(unittest.TestCase):
         self.assertEqual(self.player2.stack, 0)    # Player 2 loses all chips
         self.assertEqual(self.player3.stack, 0)    # Player 3 loses all chips
 
+class TestIncrementalHandStrength(unittest.TestCase):
+    def test_community_cards_update_player_evaluators(self):
+        player1 = Player(name="CallCheckAgent", stack=1000, agent=CallCheckAgent())
+        player2 = Player(name="CallCheckAgent2", stack=1000, agent=CallCheckAgent())
+        game = PokerGame(players=[player1, player2])
+        game.deck = MockDeck()
+        game.deal_hands()
+        for _ in range(3):
+            game.advance_phase()
+            for player in (player1, player2):
+                self.assertEqual(player.hand_evaluator.card_count, 2 + len(game.community_cards))
+                self.assertEqual(player.best_hand_strength(game.community_cards),
+                                 pu.evaluate_hand(player.hand + game.community_cards))
+        self.assertEqual(player1.hand_evaluator.category, pu.HandCategory.ROYAL_FLUSH)
+
+    def test_new_hand_is_not_read_from_the_old_evaluator(self):
+        player1 = Player(name="CallCheckAgent", stack=1000, agent=CallCheckAgent())
+        player2 = Player(name="CallCheckAgent2", stack=1000, agent=CallCheckAgent())
+        game = PokerGame(players=[player1, player2], seed=3)
+        game.deal_hands()
+        for _ in range(3):
+            game.advance_phase()
+        player1.hand = [pu.Card('A', 'Hearts'), pu.Card('A', 'Spades')]
+        self.assertIsNone(player1.hand_evaluator)
+        self.assertEqual(player1.best_hand_strength(game.community_cards),
+                         pu.evaluate_hand(player1.hand + game.community_cards))
+
+    def test_evaluator_must_hold_the_same_cards(self):
+        player = Player(name="CallCheckAgent", stack=1000, agent=CallCheckAgent())
+        board = [pu.Card('10', 'Spades'), pu.Card('9', 'Hearts'), pu.Card('3', 'Spades'), pu.Card('7', 'Diamonds'),
+                 pu.Card('A', 'Diamonds')]
+        player.hand = [pu.Card('A', 'Hearts'), pu.Card('A', 'Spades')]
+        player.hand_evaluator = pu.IncrementalEvaluator([pu.Card('2', 'Clubs'), pu.Card('5', 'Hearts')] + board)
+        self.assertEqual(pu.hand_category(player.best_hand_strength(board)), pu.HandCategory.THREE_OF_A_KIND)
+
+class TestSeededGame(unittest.TestCase):
+    def test_hands_are_dealt_from_the_counter_stream(self):
+        players = [Player(name="CallCheckAgent", stack=1000, agent=CallCheckAgent()),
+                   Player(name="CallCheckAgent2", stack=1000, agent=CallCheckAgent())]
+        game = PokerGame(players=players, maximum_hands=3, seed=21, table_id=4)
+        game.run_game()
+        last_hand = game.deck.hand_number
+        self.assertEqual(last_hand, 2)
+        rebuilt = pu.CounterDeck(seed=21, table_id=4, hand_number=last_hand)
+        self.assertEqual([card.id for card in rebuilt.draw_many(4)], [card.id for player in game.players for card in player.hand])
+        self.assertEqual([card.id for card in rebuilt.draw_many(5)], [card.id for card in game.community_cards])
+
+class TestTableState(unittest.TestCase):
+    def test_players_are_views_over_the_game_table(self):
+        player1 = Player(name="CallCheckAgent", stack=1000, agent=CallCheckAgent())
+        player2 = Player(name="CallCheckAgent2", stack=500, agent=CallCheckAgent())
+        player2.status = pk.PLAYER_STATUS_CHECKED
+        game = PokerGame(players=[player1, player2])
+        self.assertIs(player2.table, game.table)
+        self.assertEqual(game.table.stacks, [1000, 500])
+        self.assertEqual(player2.status, pk.PLAYER_STATUS_CHECKED)
+        self.assertEqual(player1.place_bet(1200), 1000)
+        self.assertEqual((game.table.stacks[0], game.table.current_bets[0]), (0, 1000))
+        self.assertEqual(player1.status, pk.PLAYER_STATUS_ALL_IN)
+        self.assertFalse(hasattr(player1, '__dict__'))
+
+    def test_hole_cards(self):
+        player = Player(name="CallCheckAgent", stack=1000)
+        cards = [pu.Card('A', 'Hearts'), pu.Card('2', 'Clubs')]
+        player.hand = cards
+        self.assertEqual([card.id for card in player.hand], [card.id for card in cards])
+        player.hand = []
+        self.assertEqual(player.hand, [])
+        with self.assertRaises(ValueError):
+            player.hand = cards + [pu.Card('3', 'Clubs')]
+        with self.assertRaises(ValueError):
+            player.status = 'sleeping'
+
+    def test_copy_is_independent(self):
+        table = TableState(3)
+        table.stacks[1] = 100
+        copy = table.copy()
+        copy.stacks[1] = 50
+        copy.hole_cards[0] = 12
+        self.assertEqual((table.stacks[1], table.hole_cards[0]), (100, pk.NO_CARD))
+        self.assertEqual(len(copy), 3)
+
+class TestObservationView(unittest.TestCase):
+    def setUp(self):
+        self.player1 = Player(name="CallCheckAgent", stack=1000, agent=CallCheckAgent())
+        self.player2 = Player(name="CallCheckAgent2", stack=1000, agent=CallCheckAgent())
+        self.game = PokerGame(players=[self.player1, self.player2])
+        self.game.deck = MockDeck()
+        self.steps = self.game.hand_steps()
+        self.view = next(self.steps)
+
+    def test_view_reads_the_game_without_copying(self):
+        self.assertIsInstance(self.view, pk.ObservationView)
+        self.assertEqual((self.view.pot, self.view.current_bet, self.view.phase), (3, 2, pk.PHASE_PRE_FLOP))
+        self.assertEqual(self.view.current_player.seat, self.game.players[0].seat)
+        self.assertEqual([player.name for player in self.view.players], [player.name for player in self.game.players])
+        self.assertIs(self.view.players[0], self.view.current_player)
+        self.assertEqual(len(self.view.community_cards), 0)
+        self.assertEqual(self.view.current_player.hand + self.view.community_cards, self.view.current_player.hand)
+
+    def test_view_rejects_mutation(self):
+        with self.assertRaises(AttributeError):
+            self.view.pot = 0
+        with self.assertRaises(AttributeError):
+            self.view.community_cards.append(pu.Card('A', 'Hearts'))
+        with self.assertRaises(TypeError):
+            self.view.players[0] = self.player2
+        with self.assertRaises(AttributeError):
+            self.view.current_player.hand = []
+        with self.assertRaises(AttributeError):
+            self.view.players[1].stack = 0
+
+    def test_detached_snapshot_keeps_the_decision(self):
+        snapshot = self.view.detach()
+        hand = snapshot.current_player.hand
+        stack = snapshot.current_player.stack
+        self.steps.send(CallCheckAgent().act(self.view))
+        self.assertEqual(self.view.pot, 4)
+        self.assertIs(self.game.actions[-1].player, self.player1)  # not the PlayerView the agent acted with
+        self.assertEqual((snapshot.pot, snapshot.current_player.stack), (3, stack))
+        self.assertEqual([card.id for card in snapshot.current_player.hand], [card.id for card in hand])
+        self.assertIsNot(snapshot.current_player, self.game.players[0])
+        self.assertIs(snapshot.detach(), snapshot)
+
+def reference_betting_round_should_end(players):
+    """betting_round_should_end as it was before the table kept counters."""
+    if [p.status for p in players if p.status == pk.PLAYER_STATUS_WAITING]:
+        return False
+    active_player_statuses = [p.status for p in players if p.status != pk.PLAYER_STATUS_FOLDED]
+    if len(set(active_player_statuses)) == 1 and active_player_statuses[0] in [pk.PLAYER_STATUS_CHECKED, pk.PLAYER_STATUS_FOLDED]:
+        return True
+    if [p.status for p in players if p.status == pk.PLAYER_STATUS_ALL_IN]:
+        return True
+    return len(set(p.current_bet for p in players if p.status != pk.PLAYER_STATUS_FOLDED)) == 1
+
+def baseline_next_position(players, phase, current_position):
+    """calculate_next_position as it was in the baseline, before any of the betting changes."""
+    remaining_players = players[current_position + 1:]
+    if len(remaining_players) == 0:
+        current_position = -1
+        remaining_players = players
+    remaining_players = [player for player in remaining_players if player.status != pk.PLAYER_STATUS_FOLDED]
+    if phase == pk.PHASE_PRE_FLOP and len(remaining_players) == 0:
+        return pk.POSITION_SMALL_BLIND
+    for player in remaining_players:
+        if player.status != pk.PLAYER_STATUS_FOLDED and player.status != pk.PLAYER_STATUS_ALL_IN:
+            return players.index(player)
+    for player in remaining_players:
+        if player.status == pk.PLAYER_STATUS_ALL_IN:
+            return players.index(player)
+    raise ValueError("No active players found after the current position.")
+
+def reference_next_position(players, phase, current_position):
+    """
+    The baseline, except where it raised because every later seat had folded:
+    there the game has wrapped round to the seats before current_position
+    since the VecEnv work, so the earlier seats are scanned the same way.
+    """
+    try:
+        return baseline_next_position(players, phase, current_position)
+    except ValueError:
+        earlier_players = [player for player in players[:current_position + 1] if player.status != pk.PLAYER_STATUS_FOLDED]
+        if not earlier_players:
+            raise
+        for player in earlier_players:
+            if player.status != pk.PLAYER_STATUS_ALL_IN:
+                return players.index(player)
+        return players.index(earlier_players[0])
+
+def capped_reraise_agent():
+    # a re-raise of 10 is rejected against any bet of 10 or more, one above every stack is capped to an all in
+    return ReRaiseAgent(re_raise_amount=1000)
+
+class TestCountedBettingState(unittest.TestCase):
+    def assert_matches_reference(self, game):
+        self.assertEqual(game.betting_round_should_end(), reference_betting_round_should_end(game.players))
+        for position in range(len(game.players)):
+            try:
+                expected = reference_next_position(game.players, game.phase, position)
+            except ValueError:
+                with self.assertRaises(ValueError):
+                    game.calculate_next_position(position)
+                continue
+            self.assertEqual(game.calculate_next_position(position), expected)
+
+    def test_random_tables_match_the_list_scans(self):
+        generator = random.Random(7)
+        for _ in range(3000):
+            players = [Player(name=f"player{seat}", stack=100) for seat in range(generator.randint(2, 9))]
+            game = PokerGame(players=players)
+            for _ in range(generator.randint(0, 3)):
+                game.rotate_player_positions_on_table()
+            if generator.random() < 0.3:
+                game.players = [player for player in game.players if generator.random() < 0.7] or game.players[:1]
+            if generator.random() < 0.5:
+                # any seat order, not only rotations of the seats
+                game.players = generator.sample(game.players, len(game.players))
+            game.phase = generator.choice([pk.PHASE_PRE_FLOP, pk.PHASE_FLOP])
+            for _ in range(generator.randint(0, 12)):
+                player = generator.choice(players)
+                if generator.random() < 0.5:
+                    player.status = generator.choice(pk.PLAYER_STATUSES)
+                else:
+                    player.current_bet = generator.choice([0, 2, 4])
+            self.assert_matches_reference(game)
+
+    def test_rings_follow_positions_not_seat_numbers(self):
+        players = [Player(name=f"player{seat}", stack=100) for seat in range(4)]
+        game = PokerGame(players=players)
+        game.phase = pk.PHASE_FLOP
+        game.players = [players[2], players[0], players[3], players[1]]
+        self.assertEqual([game.calculate_next_position(position) for position in range(4)], [1, 2, 3, 0])
+        players[3].status = pk.PLAYER_STATUS_FOLDED
+        self.assertEqual([game.calculate_next_position(position) for position in range(4)], [1, 3, 3, 0])
+
+    def test_played_hands_match_the_list_scans(self):
+        agents = [CallCheckAgent, FoldAgent, AllInAgent, DelayedAllinAgent, capped_reraise_agent, DelayedRaiseAgent]
+        generator = random.Random(11)
+        for table_id in range(40):
+            players = [Player(name=f"player{seat}", stack=generator.choice([3, 20, 100]), agent=generator.choice(agents)())
+                       for seat in range(generator.randint(2, 9))]
+            game = PokerGame(players=players, maximum_hands=5, seed=1, table_id=table_id)
+            for _ in range(5):
+                steps = game.hand_steps()
+                try:
+                    game_state = next(steps)
+                    while True:
+                        self.assert_matches_reference(game)
+                        game_state = steps.send(game_state.current_player.take_action(game_state))
+                except StopIteration as finished:
+                    if finished.value is not pk.GAME_SHOULD_CONTINUE:
+                        break
+
+class TestSidePots(unittest.TestCase):
+    def setUp(self):
+        self.short = Player(name="short", stack=0)
+        self.middle = Player(name="middle", stack=0)
+        self.big = Player(name="big", stack=100)
+        self.folded = Player(name="folded", stack=70)
+        self.game = PokerGame(players=[self.short, self.middle, self.big, self.folded])
+        for player, contribution, status in ((self.short, 50, pk.PLAYER_STATUS_ALL_IN),
+                                             (self.middle, 200, pk.PLAYER_STATUS_ALL_IN),
+                                             (self.big, 200, pk.PLAYER_STATUS_CALLED),
+                                             (self.folded, 30, pk.PLAYER_STATUS_FOLDED)):
+            player.total_contribution = contribution
+            player.status = status
+        self.game.pot = 480
+        self.game.community_cards = [pu.Card('2', 'Clubs'), pu.Card('7', 'Diamonds'), pu.Card('9', 'Hearts'),
+                                     pu.Card('J', 'Spades'), pu.Card('K', 'Clubs')]
+
+    def test_pots_are_layered_by_all_in_level(self):
+        pots = self.game.build_side_pots()
+        self.assertEqual([pot.amount for pot in pots], [180, 300])
+        self.assertEqual(pots[0].eligible_players, [self.short, self.middle, self.big])
+        self.assertEqual(pots[1].eligible_players, [self.middle, self.big])
+
+    def test_each_pot_goes_to_its_best_eligible_hand(self):
+        self.short.hand = [pu.Card('A', 'Hearts'), pu.Card('A', 'Spades')]
+        self.middle.hand = [pu.Card('K', 'Hearts'), pu.Card('Q', 'Spades')]
+        self.big.hand = [pu.Card('3', 'Hearts'), pu.Card('4', 'Spades')]
+        self.folded.hand = [pu.Card('K', 'Spades'), pu.Card('K', 'Diamonds')]
+        _, winners = self.game.determine_winner()
+        self.assertEqual(winners, [self.short])
+        self.game.award_pots()
+        self.assertEqual((self.short.stack, self.middle.stack, self.big.stack, self.folded.stack), (180, 300, 100, 70))
+        agent = CallCheckAgent()
+        agent.player_name = "middle"
+        showdown = pk.ShowdownState(players=self.game.players, community_cards=self.game.community_cards,
+                                    winners=winners, pot=self.game.pot, pots=self.game.pots)
+        self.assertEqual(agent.analyze_amount_won(showdown), 300)
+
+    def test_split_side_pot_gives_odd_chips_by_position(self):
+        self.short.hand = [pu.Card('3', 'Hearts'), pu.Card('4', 'Spades')]
+        self.middle.hand = [pu.Card('A', 'Hearts'), pu.Card('Q', 'Spades')]
+        self.big.hand = [pu.Card('A', 'Diamonds'), pu.Card('Q', 'Hearts')]
+        self.folded.hand = [pu.Card('3', 'Spades'), pu.Card('4', 'Diamonds')]
+        self.folded.total_contribution = 31
+        self.game.determine_winner()
+        self.assertEqual([pot.winners for pot in self.game.pots], [[self.middle, self.big], [self.middle, self.big]])
+        self.game.award_pots()
+        self.assertEqual((self.middle.stack, self.big.stack), (91 + 150, 100 + 90 + 150))
+
+    def test_exact_stack_call_is_all_in(self):
+        caller = Player(name="caller", stack=40)
+        raiser = Player(name="raiser", stack=500)
+        game = PokerGame(players=[caller, raiser])
+        game.current_bet = 40
+        game.process_action(caller, pk.Action(caller, type=pk.PLAYER_ACTION_CALL, amount=40))
+        self.assertEqual((caller.stack, caller.status), (0, pk.PLAYER_STATUS_ALL_IN))
+
+    def test_raise_capped_at_the_stack_is_all_in(self):
+        raiser = Player(name="raiser", stack=60)
+        caller = Player(name="caller", stack=500)
+        game = PokerGame(players=[raiser, caller])
+        game.current_bet = 20
+        game.process_action(raiser, pk.Action(raiser, type=pk.PLAYER_ACTION_RAISE, amount=1000))
+        self.assertEqual((raiser.stack, raiser.status, game.current_bet), (0, pk.PLAYER_STATUS_ALL_IN, 60))
+
+    def test_chips_are_conserved(self):
+        generator = random.Random(3)
+        agents = [CallCheckAgent, FoldAgent, AllInAgent, DelayedAllinAgent, capped_reraise_agent, DelayedRaiseAgent]
+        for table_id in range(60):
+            players = [Player(name=f"player{seat}", stack=generator.choice([3, 20, 100, 500]), agent=generator.choice(agents)())
+                       for seat in range(generator.randint(2, 9))]
+            total = sum(player.stack for player in players)
+            game = PokerGame(players=players, maximum_hands=10, seed=2, table_id=table_id)
+            game.run_game()
+            self.assertEqual(sum(player.stack for player in players), total)
+
+class TestFork(unittest.TestCase):
+    def new_game(self):
+        players = [Player(name="CallCheckAgent", stack=1000, agent=CallCheckAgent()),
+                   Player(name="CallCheckAgent2", stack=1000, agent=CallCheckAgent()),
+                   Player(name="DelayedRaiseAgent", stack=1000, agent=DelayedRaiseAgent())]
+        game = PokerGame(players=players, maximum_hands=1, seed=9)
+        steps = game.hand_steps()
+        game_state = next(steps)
+        for _ in range(4):
+            game_state = steps.send(game_state.current_player.take_action(game_state))
+        return game, steps, game_state
+
+    def finish(self, steps, game_state):
+        try:
+            while True:
+                game_state = steps.send(game_state.current_player.take_action(game_state))
+        except StopIteration as finished:
+            return finished.value
+
+    def test_fork_plays_out_like_the_original(self):
+        game, steps, game_state = self.new_game()
+        fork = game.fork()
+        self.assertIsNot(fork.players[0], game.players[0])
+        self.assertIs(fork.players[0].agent, game.players[0].agent)
+        fork_result = pk.play_steps(fork.resume_steps())
+        self.assertEqual(self.finish(steps, game_state), fork_result)
+
+        reference, reference_steps, reference_state = self.new_game()
+        self.finish(reference_steps, reference_state)
+        for stacks in ([p.stack for p in game.players], [p.stack for p in fork.players]):
+            self.assertEqual(stacks, [p.stack for p in reference.players])
+        self.assertEqual([card.id for card in fork.community_cards], [card.id for card in reference.community_cards])
+
+    def test_fork_is_independent(self):
+        game, _, _ = self.new_game()
+        fork = game.fork()
+        fork.players[0].stack = 0
+        fork.players[1].status = pk.PLAYER_STATUS_FOLDED
+        fork.community_cards.append(pu.Card('A', 'Hearts'))
+        self.assertGreater(game.players[0].stack, 0)
+        self.assertNotEqual(game.players[1].status, pk.PLAYER_STATUS_FOLDED)
+        self.assertEqual(len(game.community_cards), len(fork.community_cards) - 1)
+        self.assertTrue(fork.actions)
+        for action in fork.actions:
+            self.assertIn(action.player, fork.players)
+
+    def test_fork_leaves_the_game_untouched(self):
+        game, _, _ = self.new_game()
+        deck = game.deck
+        before = (deck.ids[:], deck.position, deck.shuffled_to, str(deck.rng.bit_generator.state))
+        game.fork()
+        game.fork(rng=np.random.default_rng(1), observer=game.players[0])
+        self.assertEqual((deck.ids[:], deck.position, deck.shuffled_to, str(deck.rng.bit_generator.state)), before)
+
+    def test_folded_hands_are_not_redealt(self):
+        game, _, _ = self.new_game()
+        folded = game.players[2]
+        folded.status = pk.PLAYER_STATUS_FOLDED
+        for seed in range(10):
+            fork = game.fork(rng=np.random.default_rng(seed), observer=game.players[0])
+            self.assertEqual([card.id for card in fork.players[2].hand], [card.id for card in folded.hand])
+            self.assertEqual(fork.players[2].hand_evaluator.product, folded.hand_evaluator.product)
+            self.assertTrue({card.id for card in folded.hand}.isdisjoint(card.id for card in fork.deck.cards))
+
+    def test_unseen_cards_are_redealt(self):
+        game, _, _ = self.new_game()
+        observer = game.players[0]
+        changed = False
+        for seed in range(20):
+            fork = game.fork(rng=np.random.default_rng(seed), observer=observer)
+            self.assertEqual([card.id for card in fork.players[0].hand], [card.id for card in observer.hand])
+            dealt = [card.id for player in fork.players for card in player.hand]
+            undealt = [card.id for card in fork.deck.cards]
+            self.assertEqual(sorted(dealt + undealt), sorted(set(dealt + undealt)))
+            self.assertEqual(len(dealt + undealt) + len(fork.community_cards), 52)
+            changed = changed or dealt != [card.id for player in game.players for card in player.hand]
+            self.assertEqual(fork.players[1].best_hand_strength(fork.community_cards),
+                             pu.evaluate_hand(fork.players[1].hand + fork.community_cards))
+        self.assertTrue(changed)
+
+def random_action(game, rng):
+    player = game.players[game.table_position]
+    to_call = game.current_bet - player.current_bet
+    choices = [pk.PLAYER_ACTION_FOLD, pk.PLAYER_ACTION_CALL if to_call > 0 else pk.PLAYER_ACTION_CHECK]
+    if player.stack > to_call + 1:
+        choices.append(pk.PLAYER_ACTION_RAISE)
+    if player.stack > 0:
+        choices.append(pk.PLAYER_ACTION_ALL_IN)
+    action_type = choices[int(rng.integers(len(choices)))]
+    if action_type == pk.PLAYER_ACTION_CALL:
+        return Action(player, type=action_type, amount=to_call)
+    if action_type == pk.PLAYER_ACTION_RAISE:
+        return Action(player, type=action_type, amount=int(rng.integers(game.current_bet + 1, player.stack + 1)))
+    if action_type == pk.PLAYER_ACTION_ALL_IN:
+        return Action(player, type=action_type, amount=player.stack)
+    return Action(player, type=action_type)
+
+def game_state_key(game):
+    table = game.table
+    evaluators = [(evaluator.product, evaluator.cards_mask, list(evaluator.suit_counts), evaluator.card_count,
+                   evaluator.strength) if evaluator is not None else None
+                  for evaluator in (player.hand_evaluator for player in game.players)]
+    return (list(table.stacks), list(table.current_bets), list(table.contributions), list(table.statuses),
+            list(table.status_counts), dict(table.live_bets), list(table.next_live), list(table.next_actionable), game.pot,
+            game.current_bet, game.table_position, game.phase, [card.id for card in game.community_cards],
+            evaluators, [(action.player.name, action.type, action.amount) for action in game.actions],
+            game.deck.position)
+
+class TestApplyUndo(unittest.TestCase):
+    def new_game(self, seed, start=True):
+        players = [Player(name=f"Player{i}", stack=stack) for i, stack in enumerate((300, 150, 600, 80))]
+        game = PokerGame(players=players, maximum_hands=1, seed=seed)
+        if start:
+            self.assertTrue(game.start_hand())
+        return game
+
+    def test_undo_restores_every_state(self):
+        for seed in range(30):
+            rng = np.random.default_rng(seed)
+            game = self.new_game(seed)
+            keys = []
+            pending = True
+            while pending:
+                keys.append(game_state_key(game))
+                pending = game.apply(random_action(game, rng))
+            self.assertEqual(game.phase, pk.PHASE_SHOWDOWN)
+            self.assertEqual(len(game.community_cards), 5)
+            while keys:
+                game.undo()
+                self.assertEqual(game_state_key(game), keys.pop())
+
+    def test_undo_then_branch(self):
+        rng = np.random.default_rng(3)
+        game = self.new_game(3)
+        start = game_state_key(game)
+        for _ in range(20):
+            applied = 0
+            while applied < 4 and game.apply(random_action(game, rng)):
+                applied += 1
+            for _ in range(applied + (game.phase == pk.PHASE_SHOWDOWN)):
+                game.undo()
+            self.assertEqual(game_state_key(game), start)
+
+    def test_apply_plays_like_hand_steps(self):
+        for seed in range(30):
+            rng = np.random.default_rng(seed)
+            game = self.new_game(seed)
+            played = []
+            pending = True
+            while pending:
+                action = random_action(game, rng)
+                played.append((game.table_position, action.type, action.amount))
+                pending = game.apply(action)
+            game.finish_hand()
+
+            reference = self.new_game(seed, start=False)
+            steps = reference.hand_steps()
+            game_state = next(steps)
+            with self.assertRaises(StopIteration):
+                for position, action_type, amount in played:
+                    self.assertEqual(game_state.current_player.seat, reference.players[position].seat)
+                    game_state = steps.send(Action(game_state.current_player, type=action_type, amount=amount))
+            self.assertEqual([p.stack for p in game.players], [p.stack for p in reference.players])
+            self.assertEqual([card.id for card in game.community_cards],
+                             [card.id for card in reference.community_cards])
+
+    def test_recorded_game_can_not_apply(self):
+        game = self.new_game(1)
+        game.recorder = object()
+        with self.assertRaises(ValueError):
+            game.apply(random_action(game, np.random.default_rng(1)))
+
 class TestFoldAllInAgent(unittest.TestCase):
 
     def setUp(self):
@@ -93,11 +577,11 @@ class TestCallDelayAllinFoldAgents(unittest.TestCase):
     def test_call_fold_action(self):
         self.game.run_game()
         # Assert the winner and stack changes (after next bb / sb and rotation occurs)
-        # Based on the mock deck, Player 1 (DelayedAllinAgent) should win with a Royal Flush
-        self.assertEqual(self.player1.stack, 0)
-        self.assertEqual(self.player2.stack, 2005)    # this playerr ends up with royal flush because players
-        # rotate but the deck assignments don't
-        self.assertEqual(self.player3.stack, 995)    # Player 3 should not lose any chips
+        # Player 1 (DelayedAllinAgent) shoves on the flop of hand 2 and nobody calls, so the side pot
+        # hands the uncalled chips back. It then doubles up through player 2 with the royal flush on hand 4
+        self.assertEqual(self.player1.stack, 2003)
+        self.assertEqual(self.player2.stack, 0)
+        self.assertEqual(self.player3.stack, 997)    # Player 3 only loses blinds
         # Check if the delayed all-in agent acted correctly
 
         # @Todo: there is an off by 1 error somewhere. players are entering sb/bb even after final hand count reached.
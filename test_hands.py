@@ -1,7 +1,8 @@
 import unittest
 from poker_util import (
     Card, RoyalFlush, StraightFlush, FourOfAKind, FullHouse, Flush, Straight,
-    ThreeOfAKind, TwoPair, OnePair, HighCard, PokerException
+    ThreeOfAKind, TwoPair, OnePair, HighCard, PokerException, WorstPokerHand,
+    HAND_COMPARE_GT, HAND_COMPARE_LT, HAND_COMPARE_EQ
 )
 
 class TestPokerHands(unittest.TestCase):
@@ -390,5 +391,41 @@ class TestPokerHands(unittest.TestCase):
         self.assertTrue(high_card6 > high_card5)
         self.assertFalse(high_card5 > high_card6)
 
+    def test_strength_sorts_hands(self):
+        full_house = FullHouse([
+            Card('Q', 'Clubs'), Card('Q', 'Diamonds'), Card('Q', 'Hearts'),
+            Card('K', 'Spades'), Card('K', 'Hearts')
+        ])
+        flush = Flush([
+            Card('2', 'Diamonds'), Card('5', 'Diamonds'), Card('8', 'Diamonds'),
+            Card('J', 'Diamonds'), Card('K', 'Diamonds')
+        ])
+        one_pair = OnePair([
+            Card('3', 'Clubs'), Card('3', 'Diamonds'), Card('7', 'Hearts'),
+            Card('9', 'Spades'), Card('K', 'Hearts')
+        ])
+        worst = WorstPokerHand()
+        hands = sorted([one_pair, worst, full_house, flush], key=lambda hand: hand.strength, reverse=True)
+        self.assertEqual(hands, [full_house, flush, one_pair, worst])
+        self.assertTrue(one_pair > worst)
+
+    def test_compare_returns_constants(self):
+        full_house1 = FullHouse([
+            Card('Q', 'Clubs'), Card('Q', 'Diamonds'), Card('Q', 'Hearts'),
+            Card('K', 'Spades'), Card('K', 'Hearts')
+        ])
+        full_house2 = FullHouse([
+            Card('Q', 'Clubs'), Card('Q', 'Diamonds'), Card('Q', 'Hearts'),
+            Card('J', 'Spades'), Card('J', 'Hearts')
+        ])
+        full_house3 = FullHouse([
+            Card('Q', 'Spades'), Card('Q', 'Diamonds'), Card('Q', 'Hearts'),
+            Card('K', 'Clubs'), Card('K', 'Diamonds')
+        ])
+        self.assertEqual(full_house1.compare(full_house2), HAND_COMPARE_GT)
+        self.assertEqual(full_house2.compare(full_house1), HAND_COMPARE_LT)
+        self.assertEqual(full_house1.compare(full_house3), HAND_COMPARE_EQ)
+        self.assertTrue(full_house1 == full_house3)
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,82 @@
+import os
+import shutil
+import tempfile
+import unittest
+import history as hh
+import poker_game as pk
+import poker_util as pu
+from agents import CallCheckAgent, FoldAgent, ReRaiseAgent, DelayedAllinAgent
+
+def record_game(directory, hands=6, chunk_hands=hh.DEFAULT_CHUNK_HANDS, table_id=0):
+    players = [pk.Player(name="CallCheckAgent", stack=200, agent=CallCheckAgent()),
+               pk.Player(name="ReRaiseAgent", stack=100, agent=ReRaiseAgent()),
+               pk.Player(name="DelayedAllinAgent", stack=60, agent=DelayedAllinAgent(delay=3)),
+               pk.Player(name="FoldAgent", stack=100, agent=FoldAgent())]
+    with hh.HandHistoryWriter(directory, chunk_hands=chunk_hands) as recorder:
+        game = pk.PokerGame(players=players, maximum_hands=hands, seed=5, table_id=table_id, recorder=recorder)
+        game.run_game()
+    return game
+
+class TestHandHistory(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.game = record_game(self.directory)
+        self.reader = hh.HandHistoryReader(self.directory)
+
+    def tearDown(self):
+        self.reader.close()
+        shutil.rmtree(self.directory)
+
+    def temporary_directory(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        return directory
+
+    def test_records_match_the_deal(self):
+        self.assertEqual(len(self.reader), 6)
+        for index, record in enumerate(self.reader):
+            self.assertEqual((record.seed, record.table_id, record.hand_number), (5, 0, index))
+            deck = pu.CounterDeck(seed=5, table_id=0, hand_number=index)
+            dealt = deck.draw_many(2 * len(record.seats) + 5)
+            self.assertEqual([card.id for hole in record.hole_cards for card in hole] + [card.id for card in record.board],
+                             [card.id for card in dealt])
+            self.assertGreater(len(record.actions), 0)
+
+    def test_replay_reproduces_every_hand(self):
+        for index, record in enumerate(self.reader):
+            game, steps, game_state = self.reader.replay(index)
+            self.assertIsNone(game_state)
+            total_in = [stack - player.stack + won for stack, player, won in zip(record.stacks, game.players, record.payouts)]
+            self.assertEqual(sum(record.payouts), sum(total_in))
+            self.assertEqual([player.total_contribution for player in game.players], total_in)
+
+    def test_replay_stops_at_an_action(self):
+        record = self.reader[0]
+        game, steps, game_state = hh.replay_hand(record, actions=2)
+        position, action_type, amount = record.actions[2]
+        self.assertEqual(game_state.current_player.seat, game.players[position].seat)
+        steps.send(pk.Action(game_state.current_player, type=action_type, amount=amount))
+        self.assertEqual(game.actions[-1].type, action_type)
+
+    def test_chunks_roll_over_and_reopen_appends(self):
+        directory = self.temporary_directory()
+        record_game(directory, hands=5, chunk_hands=2)
+        record_game(directory, hands=3, chunk_hands=2, table_id=1)
+        self.assertEqual(sorted(name for name in os.listdir(directory) if name.endswith('.bin')),
+                         [f"hands-{chunk:05d}.bin" for chunk in range(5)])
+        reader = hh.HandHistoryReader(directory)
+        self.assertEqual(len(reader), 8)
+        self.assertEqual([record.table_id for record in reader], [0] * 5 + [1] * 3)
+        self.assertEqual(reader[-1].hand_number, 2)
+        reader.close()
+
+    def test_rejects_other_files(self):
+        directory = self.temporary_directory()
+        with open(os.path.join(directory, 'hands-00000.bin'), 'wb') as f:
+            f.write(b'nope' + bytes(4))
+        open(os.path.join(directory, 'hands-00000.idx'), 'wb').close()
+        with self.assertRaises(pu.PokerException):
+            hh.HandHistoryReader(directory)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,10 @@
 import unittest
+from itertools import combinations
+import numpy as np
+import poker_util as pu
 from poker_util import (
     Card, PokerRules, RoyalFlush, StraightFlush, FourOfAKind, FullHouse, Flush,
-    Straight, ThreeOfAKind, TwoPair, OnePair, HighCard
+    Straight, ThreeOfAKind, TwoPair, OnePair, HighCard, PokerException
 )
 
 class TestPokerRules(unittest.TestCase):
@@ -57,5 +60,287 @@ class TestPokerRules(unittest.TestCase):
         self.assertEqual(type(best_hand), type(expected_best_hand))
         self.assertEqual(best_hand.cards, expected_best_hand.cards)
 
+    def test_best_hand_matches_every_combination(self):
+        rng = np.random.default_rng(5)
+        for _ in range(2000):
+            cards = [pu.CARDS[card_id] for card_id in rng.choice(52, size=int(rng.integers(5, 8)), replace=False)]
+            expected = self.poker_rules.get_best_hand(list(combinations(cards, 5)))
+            best_hand = self.poker_rules.best_hand(cards)
+            self.assertEqual(type(best_hand), type(expected))
+            self.assertEqual(best_hand.strength, expected.strength)
+            self.assertEqual(len({card.id for card in best_hand.cards}), 5)
+            self.assertTrue({card.id for card in best_hand.cards} <= {card.id for card in cards})
+            self.assertEqual(pu.evaluate_hand(best_hand.cards), best_hand.strength)
+
+    def test_best_hand_of_a_wheel(self):
+        cards = [Card('A', 'Hearts'), Card('2', 'Clubs'), Card('3', 'Diamonds'), Card('4', 'Spades'),
+                 Card('5', 'Hearts'), Card('K', 'Clubs'), Card('K', 'Diamonds')]
+        best_hand = self.poker_rules.best_hand(cards)
+        self.assertIsInstance(best_hand, Straight)
+        self.assertEqual([card.id for card in best_hand.cards], [card.id for card in cards[4:0:-1] + cards[:1]])
+
+class TestCard(unittest.TestCase):
+    def test_cards_are_interned(self):
+        self.assertIs(Card('A', 'Spades'), Card('A', 'Spades'))
+        self.assertIs(pu.card_from_id(Card('10', 'Clubs').id), Card('10', 'Clubs'))
+
+    def test_card_ids(self):
+        self.assertEqual([card.id for card in pu.CARDS], list(range(52)))
+        card = Card('K', 'Diamonds')
+        self.assertEqual(card.value, pu.CARD_RANK_VALUE_K)
+        self.assertEqual(card.suit_index, 1)
+        self.assertEqual(card.mask, 1 << card.id)
+
+    def test_cards_are_immutable(self):
+        with self.assertRaises(PokerException):
+            Card('A', 'Spades').rank = 'K'
+
+    def test_invalid_card(self):
+        with self.assertRaises(PokerException):
+            Card('1', 'Spades')
+
+    def test_deck_deals_interned_cards(self):
+        deck = pu.Deck()
+        cards = [deck.draw() for _ in range(52)]
+        self.assertEqual(sorted(card.id for card in cards), list(range(52)))
+        self.assertIs(cards[0], pu.card_from_id(cards[0].id))
+
+def card_ids(cards):
+    # Card equality only compares ranks, deals have to match card for card
+    return [card.id for card in cards]
+
+class TestDecks(unittest.TestCase):
+    def test_seeded_decks_repeat(self):
+        self.assertEqual(card_ids(pu.Deck(seed=4).cards), card_ids(pu.Deck(seed=4).cards))
+        self.assertEqual(card_ids(pu.FastDeck(seed=4).draw_many(9)), card_ids(pu.FastDeck(seed=4).draw_many(9)))
+
+    def test_fast_deck_deals_every_card_once(self):
+        deck = pu.FastDeck(seed=1)
+        cards = [deck.draw() for _ in range(5)] + deck.draw_many(47)
+        self.assertEqual(sorted(card.id for card in cards), list(range(52)))
+        self.assertEqual(len(deck), 0)
+        with self.assertRaises(PokerException):
+            deck.draw()
+        deck.reset_cards()
+        self.assertEqual(len(deck.cards), 52)
+
+    def test_fast_deck_reshuffles_after_reset(self):
+        deck = pu.FastDeck(seed=2)
+        first = deck.draw_many(9)
+        deck.reset_cards()
+        self.assertNotEqual(card_ids(deck.draw_many(9)), card_ids(first))
+
+    def test_undealt_ids_do_not_deal(self):
+        deck = pu.CounterDeck(seed=6)
+        deck.draw_many(9)
+        undealt = list(deck.undealt_ids())
+        self.assertEqual(len(undealt), 43)
+        self.assertEqual(list(deck.undealt_ids()), undealt)
+        self.assertEqual(card_ids(deck.draw_many(43)), undealt)
+
+    def test_spawned_decks_have_their_own_streams(self):
+        def next_hand(seed):
+            deck = pu.FastDeck.with_undealt([0, 1, 2], seed)
+            deck.draw_many(3)
+            deck.reset_cards()
+            return card_ids(deck.draw_many(9))
+        parent = pu.CounterDeck(seed=7, table_id=1)
+        first, second = parent.spawn_seed(), parent.spawn_seed()
+        self.assertNotEqual(next_hand(first), next_hand(second))
+        again = pu.CounterDeck(seed=7, table_id=1)
+        self.assertEqual(next_hand(again.spawn_seed()), next_hand(first))
+        self.assertEqual(card_ids(again.draw_many(9)), card_ids(pu.CounterDeck(seed=7, table_id=1).draw_many(9)))
+        self.assertEqual(next_hand(pu.FastDeck(seed=3).spawn_seed()), next_hand(pu.FastDeck(seed=3).spawn_seed()))
+
+    def test_deal_batch(self):
+        deals = pu.FastDeck(seed=3).deal_batch(2000, 9)
+        self.assertEqual(deals.shape, (2000, 9))
+        self.assertTrue(all(len(set(deal)) == 9 for deal in deals.tolist()))
+        # every card should turn up as the first card about 2000 / 52 times
+        counts = np.bincount(deals[:, 0], minlength=52)
+        self.assertGreater(counts.min(), 10)
+        self.assertLess(counts.max(), 80)
+
+class TestCounterDeck(unittest.TestCase):
+    def test_any_hand_is_rebuilt_directly(self):
+        deck = pu.CounterDeck(seed=11, table_id=2)
+        deals = []
+        for _ in range(5):
+            deals.append(card_ids(deck.draw_many(9)))
+            deck.reset_cards()
+        for hand_number in (4, 0, 3):
+            self.assertEqual(card_ids(pu.CounterDeck(seed=11, table_id=2, hand_number=hand_number).draw_many(9)), deals[hand_number])
+
+    def test_tables_use_separate_streams(self):
+        self.assertNotEqual(card_ids(pu.CounterDeck(seed=11, table_id=0).draw_many(9)),
+                            card_ids(pu.CounterDeck(seed=11, table_id=1).draw_many(9)))
+
+    def test_deal_does_not_depend_on_draw_sizes(self):
+        one_at_a_time = pu.CounterDeck(seed=5, deal_size=1)
+        self.assertEqual([one_at_a_time.draw().id for _ in range(20)], card_ids(pu.CounterDeck(seed=5).draw_many(20)))
+
+class TestHandEvaluator(unittest.TestCase):
+    def setUp(self):
+        self.poker_rules = PokerRules()
+
+    def test_rank_attributes_keep_their_names(self):
+        trips = ThreeOfAKind([Card('7', 'Hearts'), Card('7', 'Spades'), Card('7', 'Clubs'), Card('K', 'Hearts'), Card('2', 'Spades')])
+        self.assertEqual((trips.rank, trips.rank_value), (pu.CARD_RANK_NAME_7, 7))
+        pair = OnePair([Card('Q', 'Hearts'), Card('Q', 'Spades'), Card('7', 'Clubs'), Card('K', 'Hearts'), Card('2', 'Spades')])
+        self.assertEqual((pair.rank, pair.rank_value), (pu.CARD_RANK_NAME_Q, 12))
+        two_pair = TwoPair([Card('J', 'Hearts'), Card('J', 'Spades'), Card('4', 'Clubs'), Card('4', 'Hearts'), Card('A', 'Spades')])
+        self.assertEqual((two_pair.first_pair_rank, two_pair.second_pair_rank), (pu.CARD_RANK_NAME_J, pu.CARD_RANK_NAME_4))
+        self.assertEqual((two_pair.first_pair_rank_value, two_pair.second_pair_rank_value), (11, 4))
+
+    def test_categories(self):
+        hands = [
+            ([Card('10', 'Hearts'), Card('J', 'Hearts'), Card('Q', 'Hearts'), Card('K', 'Hearts'), Card('A', 'Hearts')], pu.HAND_RANK_ROYAL_FLUSH),
+            ([Card('A', 'Spades'), Card('2', 'Spades'), Card('3', 'Spades'), Card('4', 'Spades'), Card('5', 'Spades')], pu.HAND_RANK_STRAIGHT_FLUSH),
+            ([Card('A', 'Clubs'), Card('A', 'Diamonds'), Card('A', 'Hearts'), Card('A', 'Spades'), Card('K', 'Hearts')], pu.HAND_RANK_FOUR_OF_A_KIND),
+            ([Card('Q', 'Clubs'), Card('Q', 'Diamonds'), Card('Q', 'Hearts'), Card('K', 'Spades'), Card('K', 'Hearts')], pu.HAND_RANK_FULL_HOUSE),
+            ([Card('2', 'Diamonds'), Card('5', 'Diamonds'), Card('8', 'Diamonds'), Card('J', 'Diamonds'), Card('K', 'Diamonds')], pu.HAND_RANK_FLUSH),
+            ([Card('A', 'Clubs'), Card('2', 'Diamonds'), Card('3', 'Hearts'), Card('4', 'Spades'), Card('5', 'Hearts')], pu.HAND_RANK_STRAIGHT),
+            ([Card('9', 'Clubs'), Card('9', 'Diamonds'), Card('9', 'Hearts'), Card('J', 'Spades'), Card('K', 'Hearts')], pu.HAND_RANK_THREE_OF_A_KIND),
+            ([Card('10', 'Clubs'), Card('10', 'Diamonds'), Card('J', 'Hearts'), Card('J', 'Spades'), Card('K', 'Hearts')], pu.HAND_RANK_TWO_PAIR),
+            ([Card('3', 'Clubs'), Card('3', 'Diamonds'), Card('7', 'Hearts'), Card('9', 'Spades'), Card('K', 'Hearts')], pu.HAND_RANK_ONE_PAIR),
+            ([Card('2', 'Clubs'), Card('5', 'Diamonds'), Card('7', 'Hearts'), Card('9', 'Spades'), Card('K', 'Hearts')], pu.HAND_RANK_HIGH_CARD),
+        ]
+        for cards, category in hands:
+            self.assertEqual(pu.hand_category(pu.evaluate_hand(cards)), category)
+
+    def test_strength_orders_kickers(self):
+        wheel = [Card('A', 'Clubs'), Card('2', 'Diamonds'), Card('3', 'Hearts'), Card('4', 'Spades'), Card('5', 'Hearts')]
+        six_high = [Card('6', 'Clubs'), Card('2', 'Diamonds'), Card('3', 'Hearts'), Card('4', 'Spades'), Card('5', 'Hearts')]
+        self.assertGreater(pu.evaluate_hand(six_high), pu.evaluate_hand(wheel))
+
+        two_pair_low_kicker = [Card('10', 'Clubs'), Card('10', 'Diamonds'), Card('J', 'Hearts'), Card('J', 'Spades'), Card('2', 'Hearts')]
+        two_pair_high_kicker = [Card('10', 'Hearts'), Card('10', 'Spades'), Card('J', 'Clubs'), Card('J', 'Diamonds'), Card('A', 'Hearts')]
+        self.assertGreater(pu.evaluate_hand(two_pair_high_kicker), pu.evaluate_hand(two_pair_low_kicker))
+
+        same_flush = [Card('2', 'Hearts'), Card('5', 'Hearts'), Card('8', 'Hearts'), Card('J', 'Hearts'), Card('K', 'Hearts')]
+        other_suit = [Card('2', 'Spades'), Card('5', 'Spades'), Card('8', 'Spades'), Card('J', 'Spades'), Card('K', 'Spades')]
+        self.assertEqual(pu.evaluate_hand(same_flush), pu.evaluate_hand(other_suit))
+
+    def test_distinct_hand_classes(self):
+        deck = pu.Deck(no_shuffle=True).cards
+        from itertools import combinations
+        spades = [card for card in deck if card.suit == pu.SUIT_SPADES]
+        # 1287 rank sets, 10 of them straights, each one a distinct straight flush or flush
+        self.assertEqual(len({pu.evaluate_hand(hand) for hand in combinations(spades, 5)}), 1287)
+
+    def test_create_hand_object_matches_category(self):
+        cards = [Card('Q', 'Clubs'), Card('Q', 'Diamonds'), Card('Q', 'Hearts'), Card('K', 'Spades'), Card('K', 'Hearts')]
+        self.assertIsInstance(self.poker_rules.create_hand_object(cards), FullHouse)
+        cards = [Card('A', 'Spades'), Card('2', 'Spades'), Card('3', 'Spades'), Card('4', 'Spades'), Card('5', 'Spades')]
+        self.assertIsInstance(self.poker_rules.create_hand_object(cards), StraightFlush)
+
+    def test_seven_cards_match_best_of_combinations(self):
+        import random
+        from itertools import combinations
+        rng = random.Random(7)
+        deck = pu.Deck(no_shuffle=True).cards
+        for size in (5, 6, 7):
+            for _ in range(200):
+                cards = rng.sample(deck, size)
+                expected = max(pu.evaluate_hand(hand) for hand in combinations(cards, 5))
+                self.assertEqual(pu.evaluate_hand(cards), expected)
+
+    def test_seven_card_flush_beats_board_pair(self):
+        cards = [
+            Card('2', 'Hearts'), Card('9', 'Hearts'), Card('K', 'Hearts'), Card('K', 'Spades'),
+            Card('4', 'Hearts'), Card('7', 'Hearts'), Card('4', 'Clubs')
+        ]
+        self.assertEqual(pu.hand_category(self.poker_rules.evaluate(cards)), pu.HAND_RANK_FLUSH)
+
+    def test_invalid_hand_size(self):
+        with self.assertRaises(PokerException):
+            pu.evaluate_hand([Card('A', 'Spades'), Card('2', 'Spades')])
+
+class TestIncrementalEvaluator(unittest.TestCase):
+    def test_matches_full_evaluation_on_every_street(self):
+        rng = np.random.default_rng(7)
+        for _ in range(300):
+            cards = [pu.card_from_id(card_id) for card_id in rng.permutation(52)[:7]]
+            evaluator = pu.IncrementalEvaluator(cards[:2])
+            self.assertIsNone(evaluator.strength)
+            for dealt in range(3, 8):
+                evaluator.add(cards[dealt - 1])
+                if dealt >= 5:
+                    self.assertEqual(evaluator.strength, pu.evaluate_hand(cards[:dealt]))
+
+    def test_tracks_counts_and_masks(self):
+        evaluator = pu.IncrementalEvaluator([Card('A', 'Hearts'), Card('A', 'Spades')])
+        evaluator.add(Card('K', 'Hearts'))
+        self.assertEqual(evaluator.suit_counts, [2, 0, 0, 1])
+        self.assertEqual(evaluator.cards_mask, Card('A', 'Hearts').mask | Card('A', 'Spades').mask | Card('K', 'Hearts').mask)
+        evaluator.remove(Card('K', 'Hearts'))
+        self.assertEqual(evaluator.cards_mask, Card('A', 'Hearts').mask | Card('A', 'Spades').mask)
+        evaluator.add(Card('K', 'Hearts'))
+        for card in (Card('Q', 'Hearts'), Card('J', 'Hearts'), Card('10', 'Hearts')):
+            evaluator.add(card)
+        self.assertEqual(evaluator.category, pu.HandCategory.ROYAL_FLUSH)
+        copy = evaluator.copy()
+        copy.add(Card('2', 'Clubs'))
+        self.assertEqual(evaluator.card_count, 6)
+        with self.assertRaises(PokerException):
+            copy.add(Card('3', 'Clubs'))
+
+class TestBatchEvaluator(unittest.TestCase):
+    def test_batch_matches_scalar(self):
+        rng = np.random.default_rng(5)
+        for size in (5, 6, 7):
+            hands = np.argsort(rng.random((500, 52)), axis=1)[:, :size]
+            strengths = pu.evaluate_batch(hands)
+            self.assertEqual(strengths.shape, (500,))
+            for hand, strength in zip(hands, strengths):
+                self.assertEqual(strength, pu.evaluate_hand([pu.card_from_id(card_id) for card_id in hand]))
+
+    def test_batch_from_cards(self):
+        royal_flush = [Card('10', 'Hearts'), Card('J', 'Hearts'), Card('Q', 'Hearts'), Card('K', 'Hearts'), Card('A', 'Hearts'),
+                       Card('2', 'Clubs'), Card('2', 'Spades')]
+        full_house = [Card('Q', 'Clubs'), Card('Q', 'Diamonds'), Card('Q', 'Hearts'), Card('K', 'Spades'), Card('K', 'Hearts'),
+                      Card('2', 'Clubs'), Card('3', 'Spades')]
+        strengths = pu.evaluate_batch(np.stack([pu.cards_to_ids(royal_flush), pu.cards_to_ids(full_house)]))
+        self.assertEqual([pu.hand_category(int(strength)) for strength in strengths],
+                         [pu.HAND_RANK_ROYAL_FLUSH, pu.HAND_RANK_FULL_HOUSE])
+
+    def test_batch_rejects_bad_shape(self):
+        with self.assertRaises(PokerException):
+            pu.evaluate_batch(np.zeros((3, 4), dtype=np.int8))
+
+class TestCanonicalForm(unittest.TestCase):
+    def test_suit_permutations_share_a_key(self):
+        hole_cards = [Card('A', 'Spades'), Card('K', 'Spades')]
+        board = [Card('2', 'Spades'), Card('7', 'Clubs'), Card('7', 'Hearts')]
+        relabelled_hole_cards = [Card('A', 'Diamonds'), Card('K', 'Diamonds')]
+        relabelled_board = [Card('2', 'Diamonds'), Card('7', 'Hearts'), Card('7', 'Spades')]
+        self.assertEqual(pu.canonical_key(hole_cards, board), pu.canonical_key(relabelled_hole_cards, relabelled_board))
+        self.assertNotEqual(pu.canonical_key(hole_cards, board),
+                            pu.canonical_key([Card('A', 'Spades'), Card('K', 'Clubs')], board))
+
+    def test_hole_cards_and_board_stay_apart(self):
+        hole_cards = [Card('A', 'Spades'), Card('K', 'Spades')]
+        board = [Card('Q', 'Hearts'), Card('J', 'Hearts'), Card('2', 'Clubs')]
+        self.assertNotEqual(pu.canonical_key(hole_cards, board), pu.canonical_key(board[:2], hole_cards + board[2:]))
+        canonical_hole_cards, canonical_board = pu.canonicalize(hole_cards, board)
+        self.assertEqual([card.value for card in canonical_hole_cards], [13, 14])
+        self.assertEqual(len({card.suit for card in canonical_hole_cards}), 1)
+        self.assertEqual(pu.canonical_key(canonical_hole_cards, canonical_board), pu.canonical_key(hole_cards, board))
+
+    def test_distinct_flops_and_starting_hands(self):
+        flops = np.array(list(combinations(range(52), 3)))
+        flop_masks = pu.canonical_masks_batch(np.zeros((len(flops), 0), dtype=np.int64), flops)
+        self.assertEqual(len(np.unique(flop_masks, axis=0)), 1755)
+        starting_hands = np.array(list(combinations(range(52), 2)))
+        self.assertEqual(len(np.unique(pu.canonical_masks_batch(starting_hands), axis=0)), 169)
+
+    def test_batch_matches_scalar(self):
+        rng = np.random.default_rng(9)
+        hands = np.argsort(rng.random((300, 52)), axis=1)[:, :7]
+        masks = pu.canonical_masks_batch(hands[:, :2], hands[:, 2:])
+        for hand, (hole_mask, board_mask) in zip(hands, masks):
+            cards = [pu.card_from_id(card_id) for card_id in hand]
+            self.assertEqual(pu.canonical_masks(cards[:2], cards[2:]), (hole_mask, board_mask))
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,84 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+import preflop as pf
+import poker_util as pu
+from poker_util import Card, PokerException
+
+class TestHandClass(unittest.TestCase):
+    def test_class_names(self):
+        self.assertEqual(pf.hand_class_name(pf.hand_class(Card('A', 'Hearts'), Card('K', 'Hearts'))), 'AKs')
+        self.assertEqual(pf.hand_class_name(pf.hand_class(Card('K', 'Clubs'), Card('A', 'Hearts'))), 'AKo')
+        self.assertEqual(pf.hand_class_name(pf.hand_class(Card('10', 'Spades'), Card('10', 'Hearts'))), 'TT')
+        self.assertEqual(pf.hand_class_name(pf.hand_class(Card('2', 'Clubs'), Card('7', 'Diamonds'))), '72o')
+
+    def test_every_combo_has_one_of_169_classes(self):
+        classes = [pf.hand_class(card1, card2) for i, card1 in enumerate(pu.CARDS) for card2 in pu.CARDS[i + 1:]]
+        self.assertEqual(len(classes), 1326)
+        self.assertEqual(sorted(set(classes)), list(range(pf.HAND_CLASS_COUNT)))
+        self.assertEqual(len({pf.hand_class_name(index) for index in range(pf.HAND_CLASS_COUNT)}), pf.HAND_CLASS_COUNT)
+
+class TestPreflopTable(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+        cls.path = os.path.join(cls.directory, 'preflop.bin')
+        pf.generate_preflop_table(cls.path, matrix_samples=20, random_samples=200, processes=1, seed=5)
+        cls.table = pf.PreflopTable(cls.path)
+
+    @classmethod
+    def tearDownClass(cls):
+        del cls.table
+        shutil.rmtree(cls.directory)
+
+    def test_table_is_memory_mapped(self):
+        self.assertIsInstance(self.table.matrix, np.memmap)
+        self.assertIsInstance(self.table.vs_random, np.memmap)
+
+    def test_matrix_is_zero_sum(self):
+        matrix = np.asarray(self.table.matrix, dtype=np.float64)
+        np.testing.assert_allclose(matrix + matrix.T, 1.0, atol=1e-6)
+
+    def test_equity_lookup(self):
+        aces = [Card('A', 'Hearts'), Card('A', 'Spades')]
+        self.assertGreater(self.table.equity(aces, 1), 0.7)
+        self.assertLess(self.table.equity(aces, 8), self.table.equity(aces, 1))
+        with self.assertRaises(PokerException):
+            self.table.equity(aces, 9)
+
+    def test_resumed_generation_matches(self):
+        path = os.path.join(self.directory, 'resumed.bin')
+        self.assertFalse(pf.generate_preflop_table(path, 20, 200, processes=1, seed=5, max_units=100))
+        with self.assertRaises(PokerException):
+            pf.PreflopTable(path)
+        self.assertTrue(pf.generate_preflop_table(path, 20, 200, processes=2, seed=5))
+        resumed = pf.PreflopTable(path)
+        np.testing.assert_array_equal(resumed.matrix, self.table.matrix)
+        np.testing.assert_array_equal(resumed.vs_random, self.table.vs_random)
+
+    def test_default_table_is_looked_up_once(self):
+        path = os.path.join(self.directory, 'default.bin')
+        self.addCleanup(pf.reset_default_table)
+        with mock.patch.object(pf, 'DEFAULT_TABLE_PATH', path):
+            pf.reset_default_table()
+            self.assertIsNone(pf.load_default_table())
+            shutil.copyfile(self.path, path)
+            self.assertIsNone(pf.load_default_table())  # the missing table is remembered
+            pf.reset_default_table()
+            self.assertIsNotNone(pf.load_default_table())
+            os.remove(path)
+            pf.reset_default_table()
+            pf.generate_preflop_table(path, 20, 200, processes=1, seed=5, max_units=100)
+            self.assertIsNone(pf.load_default_table())
+            pf.generate_preflop_table(path, 20, 200, processes=1, seed=5)
+            self.assertIsNotNone(pf.load_default_table())
+
+    def test_resume_with_other_settings_rejected(self):
+        with self.assertRaises(PokerException):
+            pf.generate_preflop_table(self.path, 40, 200, processes=1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+import simulator as sim
+import poker_game as pk
+from agents import CallCheckAgent
+
+class BrokenAgent(CallCheckAgent):
+    def act(self, game_state):
+        raise IndexError("agent bug")
+
+class TestMatchSimulator(unittest.TestCase):
+    def test_plays_every_requested_hand(self):
+        results = sim.simulate_match(['CallCheckAgent', 'PairBetterAgent'], 300, hands_per_game=100, processes=1, seed=1)
+        self.assertEqual(results.hands, 300)
+        self.assertEqual(results.games, 3)
+        self.assertEqual(results.agents['PairBetterAgent'].hands, 300)
+        self.assertGreater(results.hands_per_second, 0)
+
+    def test_pool_matches_inline(self):
+        specs = [sim.AgentSpec(CallCheckAgent, seats=2), sim.AgentSpec('FlushBetterAgent')]
+        inline = sim.simulate_match(specs, 200, hands_per_game=50, processes=1, seed=3)
+        pooled = sim.simulate_match(specs, 200, hands_per_game=50, processes=2, seed=3)
+        for name in ('CallCheckAgent', 'FlushBetterAgent'):
+            self.assertEqual(inline.agents[name].total, pooled.agents[name].total)
+            self.assertEqual(inline.agents[name].variance, pooled.agents[name].variance)
+        self.assertEqual(inline.agents['CallCheckAgent'].hands, 400)
+
+    def test_streams_results_per_shard(self):
+        hands = [results.hands for results in sim.run_match(['CallCheckAgent', 'FoldAgent'], 250, hands_per_game=100, processes=1)]
+        self.assertEqual(hands, [100, 200, 250])
+
+    def test_all_in_agent_match(self):
+        # calls for exactly the remaining stack used to leave players at 0 chips but not all in
+        results = sim.simulate_match(['AllInAgent', 'CallCheckAgent'], 2000, processes=1)
+        self.assertEqual(results.hands, 2000)
+        self.assertEqual(results.agents['AllInAgent'].total, -results.agents['CallCheckAgent'].total)
+
+    def test_failing_games_are_discarded(self):
+        # ReRaiseAgent re-raises 10 into DelayedRaiseAgent's bet of 100, which the game rejects
+        names = ['ReRaiseAgent', 'DelayedRaiseAgent', 'CallCheckAgent']
+        results = sim.simulate_match(names, 20, hands_per_game=10, processes=1, seed=2)
+        self.assertEqual(results.games, 2)
+        self.assertTrue(results.discarded)
+        self.assertEqual(results.hands + len(results.discarded), 20)
+        pooled = sim.simulate_match(names, 20, hands_per_game=10, processes=2, seed=2)
+        self.assertEqual(sorted((game.table_id, game.hand_number) for game in pooled.discarded),
+                         [(game.table_id, game.hand_number) for game in results.discarded])
+
+        discarded = results.discarded[-1]
+        self.assertIn('Raise must be greater', discarded.error)
+        players, _ = sim._seat_players([sim.AgentSpec(name) for name in names], sim.DEFAULT_STACK)
+        game = pk.PokerGame(players=players, seed=discarded.seed, table_id=discarded.table_id)
+        game.deck.start_hand(discarded.first_hand)
+        for _ in range(discarded.hand_number - discarded.first_hand):
+            game.run_hand()
+        with self.assertRaises(ValueError):
+            game.run_hand()
+
+    def test_agent_bugs_are_not_discarded(self):
+        specs = [sim.AgentSpec(BrokenAgent), sim.AgentSpec('CallCheckAgent')]
+        with self.assertRaises(IndexError):
+            sim.simulate_match(specs, 10, processes=1, seed=2)
+
+    def test_bb_per_100(self):
+        result = sim.AgentResult('agent', total=40, total_squares=400, hands=10)
+        self.assertEqual(result.bb_per_100, 200.0)
+        self.assertEqual(result.variance, 24.0)
+
+    def test_duplicate_names_rejected(self):
+        with self.assertRaises(ValueError):
+            sim.simulate_match(['CallCheckAgent', 'CallCheckAgent'], 10, processes=1)
+
+if __name__ == "__main__":
+    unittest.main()
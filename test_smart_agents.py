@@ -1,4 +1,5 @@
 import unittest
+from unittest import mock
 from poker_game import PokerGame, Player
 import agents as ag
 import poker_util as pu
@@ -130,5 +131,56 @@ class TestFlushBetterDoesNotBetOnPair(unittest.TestCase):
         self.assertEqual(self.player1.stack, 998)  # FlushBetterAgent wins the pot
         self.assertEqual(self.player2.stack, 1002)    # CallCheckAgent loses all chips
 
+class TestSmartAgentEquity(unittest.TestCase):
+    def test_equity_on_the_river(self):
+        import poker_game as pk
+        agent = ag.PairBetterAgent()
+        player = Player(name="PairBetterAgent", stack=1000, agent=agent)
+        opponent = Player(name="CallCheckAgent", stack=1000, agent=ag.CallCheckAgent())
+        player.hand = [pu.Card(pu.CARD_RANK_NAME_A, pu.SUIT_HEARTS), pu.Card(pu.CARD_RANK_NAME_K, pu.SUIT_HEARTS)]
+        game_state = pk.PokerGameStateSnapshot(
+            pot=10,
+            current_bet=0,
+            phase=pk.PHASE_RIVER,
+            players=[player, opponent],
+            community_cards=[
+                pu.Card(pu.CARD_RANK_NAME_10, pu.SUIT_HEARTS), pu.Card(pu.CARD_RANK_NAME_J, pu.SUIT_HEARTS),
+                pu.Card(pu.CARD_RANK_NAME_Q, pu.SUIT_HEARTS), pu.Card(pu.CARD_RANK_NAME_2, pu.SUIT_CLUBS),
+                pu.Card(pu.CARD_RANK_NAME_3, pu.SUIT_CLUBS)
+            ],
+            actions=[],
+            current_player=player
+        )
+        self.assertEqual(agent.get_current_players_equity(game_state), 1.0)
+
+class TestSnapshotHandCategory(unittest.TestCase):
+    def make_snapshot(self, community_cards):
+        import poker_game as pk
+        player = Player(name="PairBetterAgent", stack=1000, agent=ag.PairBetterAgent())
+        player.hand = [pu.Card(pu.CARD_RANK_NAME_A, pu.SUIT_HEARTS), pu.Card(pu.CARD_RANK_NAME_K, pu.SUIT_HEARTS)]
+        return pk.PokerGameStateSnapshot(pot=10, current_bet=0, phase=pk.PHASE_FLOP, players=[player],
+                                         community_cards=community_cards, actions=[], current_player=player)
+
+    def test_categories_are_ordered(self):
+        self.assertLess(pu.HandCategory.HIGH_CARD, pu.HandCategory.ONE_PAIR)
+        self.assertLess(pu.HandCategory.STRAIGHT_FLUSH, pu.HandCategory.ROYAL_FLUSH)
+        self.assertEqual(pu.HandCategory.FLUSH, pu.HAND_RANK_FLUSH)
+
+    def test_category_is_evaluated_once(self):
+        import poker_game as pk
+        snapshot = self.make_snapshot([pu.Card(pu.CARD_RANK_NAME_A, pu.SUIT_CLUBS), pu.Card(pu.CARD_RANK_NAME_2, pu.SUIT_HEARTS),
+                                       pu.Card(pu.CARD_RANK_NAME_7, pu.SUIT_HEARTS)])
+        with mock.patch.object(pk, 'hand_category', wraps=pk.hand_category) as evaluate:
+            self.assertIs(snapshot.hand_category, pu.HandCategory.ONE_PAIR)
+            self.assertTrue(snapshot.at_least(pu.HandCategory.ONE_PAIR))
+            self.assertFalse(snapshot.at_least(pu.HandCategory.TWO_PAIR))
+        self.assertEqual(evaluate.call_count, 1)
+
+    def test_no_category_before_the_flop(self):
+        snapshot = self.make_snapshot([])
+        self.assertIsNone(snapshot.hand_category)
+        self.assertFalse(snapshot.at_least(pu.HandCategory.HIGH_CARD))
+        self.assertEqual(ag.PairBetterAgent().get_current_players_hand_rank(snapshot), -1)
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,107 @@
+import unittest
+import numpy as np
+import agents as ag
+import poker_game as pk
+import poker_util as pu
+import vec_env as ve
+from poker_game import Player
+
+class TestVecEnv(unittest.TestCase):
+    def play(self, seed, steps=40):
+        env = ve.VecEnv(8, opponents=(ag.CallCheckAgent, ag.PairBetterAgent), seed=seed)
+        observations = [env.reset()]
+        rng = np.random.default_rng(seed)
+        rewards, dones = [], []
+        for _ in range(steps):
+            actions = rng.choice([ve.ACTION_CALL, ve.ACTION_CHECK, ve.ACTION_FOLD], size=8)
+            observation, reward, done, infos = env.step(actions)
+            observations.append(observation)
+            rewards.append(reward)
+            dones.append(done)
+        return np.stack(observations), np.stack(rewards), np.stack(dones), env
+
+    def test_every_table_waits_on_the_hero(self):
+        observations, rewards, dones, env = self.play(seed=1)
+        self.assertEqual(observations.shape, (41, 8, ag.OBSERVATION_SIZE))
+        self.assertTrue(all(env.game_state.current_player.seat == hero.seat for env, hero in zip(env.envs, env.heroes)))
+        self.assertTrue(dones.any())
+        # rewards only come with finished hands
+        self.assertFalse(rewards[~dones].any())
+
+    def test_runs_are_reproducible(self):
+        first = self.play(seed=4)
+        second = self.play(seed=4)
+        np.testing.assert_array_equal(first[0], second[0])
+        np.testing.assert_array_equal(first[1], second[1])
+
+    def test_busted_games_restart(self):
+        env = ve.VecEnv(2, seed=2)
+        env.reset()
+        for _ in range(30):
+            env.step([ve.ACTION_ALL_IN, ve.ACTION_ALL_IN])
+        for table_id, hero in enumerate(env.heroes):
+            self.assertGreater(hero.stack, 0)
+            self.assertGreater(env.hands_played(table_id), 1)
+
+class TestPokerEnv(unittest.TestCase):
+    def test_reset_and_step_through_hands(self):
+        hero = Player(name="hero", stack=1000)
+        env = ve.PokerEnv([hero, Player(name="CallCheckAgent", stack=1000, agent=ag.CallCheckAgent())], seed=3)
+        game_state = env.reset()
+        self.assertEqual(game_state.current_player.seat, hero.seat)
+        self.assertEqual(env.observation().shape, (ag.OBSERVATION_SIZE,))
+        done = False
+        while not done:
+            game_state, rewards, done = env.step(ve.ACTION_CHECK)
+        self.assertIsNone(game_state)
+        self.assertEqual(rewards['hero'], hero.stack - 1000)
+        with self.assertRaises(ValueError):
+            env.step(ve.ACTION_CHECK)
+        self.assertEqual(env.reset().current_player.seat, hero.seat)
+        self.assertEqual(env.hands_played, 1)
+
+    def test_every_seat_can_be_driven_externally(self):
+        players = [Player(name="first", stack=100), Player(name="second", stack=100)]
+        env = ve.PokerEnv(players, seed=5)
+        game_state = env.reset()
+        seen = set()
+        while game_state is not None:
+            seen.add(game_state.current_player.name)
+            game_state, rewards, done = env.step(ve.ACTION_ALL_IN if game_state.current_player.stack else ve.ACTION_CHECK)
+        self.assertEqual(seen, {"first", "second"})
+        self.assertEqual(sum(rewards.values()), 0)
+
+class TestBatchedObservations(unittest.TestCase):
+    def test_matches_rl_agent_layout(self):
+        agent = ag.RLAgent()
+        player = Player(name="RLAgent", stack=990, agent=agent)
+        player.hand = [pu.Card('A', 'Hearts'), pu.Card('K', 'Spades')]
+        states = [
+            pk.PokerGameStateSnapshot(pot=10, current_bet=2, phase=pk.PHASE_PRE_FLOP, players=[player],
+                                      community_cards=[], actions=[], current_player=player),
+            pk.PokerGameStateSnapshot(pot=30, current_bet=0, phase=pk.PHASE_TURN, players=[player],
+                                      community_cards=[pu.Card('2', 'Clubs'), pu.Card('7', 'Hearts'),
+                                                       pu.Card('9', 'Diamonds'), pu.Card('J', 'Spades')],
+                                      actions=[], current_player=player),
+        ]
+        batch = ag.vectorize_game_states(states)
+        for row, state in zip(batch, states):
+            np.testing.assert_array_equal(row, agent.vectorize_game_state(state))
+
+class TestMakeAction(unittest.TestCase):
+    def setUp(self):
+        self.player = Player(name="hero", stack=100)
+        self.player.current_bet = 2
+        self.facing_bet = pk.PokerGameStateSnapshot(pot=10, current_bet=6, phase=pk.PHASE_FLOP, players=[self.player],
+                                                    community_cards=[], actions=[], current_player=self.player)
+
+    def test_check_facing_a_bet_calls(self):
+        action = ve.make_action(self.facing_bet, ve.ACTION_CHECK)
+        self.assertEqual((action.type, action.amount), (pk.PLAYER_ACTION_CALL, 4))
+
+    def test_small_raise_rejected(self):
+        with self.assertRaises(ValueError):
+            ve.make_action(self.facing_bet, ve.ACTION_RAISE, 5)
+
+if __name__ == "__main__":
+    unittest.main()
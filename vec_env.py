@@ -0,0 +1,211 @@
+import numpy as np
+import agents as ag
+import poker_game as pk
+
+# discrete action ids, in the order BaseAgent.vectorize_action uses
+ACTION_CALL = 0
+ACTION_CHECK = 1
+ACTION_FOLD = 2
+ACTION_RAISE = 3
+ACTION_ALL_IN = 4
+ACTION_TYPES = (pk.PLAYER_ACTION_CALL, pk.PLAYER_ACTION_CHECK, pk.PLAYER_ACTION_FOLD,
+                pk.PLAYER_ACTION_RAISE, pk.PLAYER_ACTION_ALL_IN)
+
+DEFAULT_STACK = 1000
+HERO_NAME = 'hero'
+
+def make_action(game_state: pk.PokerGameStateSnapshot, action_id: int, amount: int = 0) -> pk.Action:
+    """
+    Build the Action for a discrete action id at a decision point. A check
+    facing a bet becomes a call and a call with nothing to call becomes a
+    check, so a policy can not stall a table. Raises ValueError for raises
+    the game would reject.
+    """
+    player = game_state.current_player
+    to_call = game_state.current_bet - player.current_bet
+    if action_id == ACTION_CHECK and to_call > 0:
+        action_id = ACTION_CALL
+    elif action_id == ACTION_CALL and to_call == 0:
+        action_id = ACTION_CHECK
+
+    if action_id == ACTION_CALL:
+        amount = to_call
+    elif action_id == ACTION_ALL_IN:
+        amount = player.stack
+    elif action_id == ACTION_RAISE:
+        if amount <= game_state.current_bet:
+            raise ValueError(f"Raise must be greater than the current bet of {game_state.current_bet}.")
+    elif action_id in (ACTION_CHECK, ACTION_FOLD):
+        amount = 0
+    else:
+        raise ValueError(f"Unknown action id: {action_id}")
+    return pk.Action(player, type=ACTION_TYPES[action_id], amount=amount)
+
+class PokerEnv:
+    """
+    Step/reset API over one PokerGame. Seats whose Player has no agent are
+    played by the caller and the rest by their agents. The hand runs as a
+    PokerGame.hand_steps generator paused at each caller decision, so there
+    are no callbacks or threads involved.
+
+        game_state = env.reset()
+        while game_state is not None:
+            game_state, rewards, done = env.step(policy(game_state))
+            if done:
+                game_state = env.reset()
+    """
+    def __init__(self, players, maximum_hands=None, seed=None, table_id=0):
+        self.game = pk.PokerGame(players=players, maximum_hands=maximum_hands, seed=seed, table_id=table_id)
+        self.controlled = [player for player in players if player.agent is None]
+        self.steps = None  # the running hand_steps generator
+        self.game_state = None  # the pending caller decision
+        self.done = True
+        self.game_over = False
+        self.hands_played = 0
+        # chips the controlled seats won in hands reset() played through
+        # because none of them had a decision
+        self.reset_rewards = {}
+        self._hand_start_stacks = {}
+
+    def reset(self) -> pk.PokerGameStateSnapshot:
+        """Start the next hand and return the first caller decision, or None once the game is over."""
+        self.reset_rewards = {player.name: 0 for player in self.controlled}
+        while True:
+            self._hand_start_stacks = {player.name: player.stack for player in self.controlled}
+            self.steps = self.game.hand_steps()
+            self.done = False
+            if self._advance(None):
+                return self.game_state
+            if self.game_over:
+                return None
+            for name, chips in self._hand_rewards().items():
+                self.reset_rewards[name] += chips
+
+    def step(self, action, amount: int = 0):
+        """
+        Act for the seat whose turn it is, with an Action or a discrete action
+        id. Returns (next caller decision, rewards, done). When the hand ends
+        the decision is None and rewards maps each controlled seat to the
+        chips it won or lost over the hand.
+        """
+        if self.done:
+            raise ValueError("The hand is over, call reset() to start the next one.")
+        if not isinstance(action, pk.Action):
+            action = make_action(self.game_state, int(action), amount)
+        if self._advance(action):
+            return self.game_state, {}, False
+        return None, self._hand_rewards(), True
+
+    def observation(self) -> np.ndarray:
+        """The pending decision in the RLAgent.vectorize_game_state layout."""
+        return ag.vectorize_game_states([self.game_state])[0]
+
+    def _hand_rewards(self):
+        return {player.name: player.stack - self._hand_start_stacks[player.name] for player in self.controlled}
+
+    def _advance(self, action):
+        """Play agent seats until a caller decision (returns True) or the end of the hand (returns False)."""
+        try:
+            game_state = next(self.steps) if action is None else self.steps.send(action)
+            while game_state.current_player.agent is not None:
+                game_state = self.steps.send(game_state.current_player.take_action(game_state))
+        except StopIteration as finished:
+            self.game_state = None
+            self.done = True
+            if finished.value is pk.GAME_SHOULD_CONTINUE:
+                self.hands_played += 1
+            else:
+                self.game_over = True
+            return False
+        self.game_state = game_state
+        return True
+
+class VecEnv:
+    """
+    num_tables PokerEnvs stepped in lockstep for batched inference. At each
+    table one seat, the hero, is played by the caller and the others by the
+    opponent agents. Every table is always paused on a hero decision: a
+    hand that ends mid step is scored and the next one is started, and a
+    game that ends (someone busts, or max_hands_per_game hands were played)
+    is replaced with a new one at fresh stacks. Table t deals from the
+    counter based stream (seed, t), so runs are reproducible.
+    """
+    def __init__(self, num_tables, opponents=(ag.CallCheckAgent,), stack=DEFAULT_STACK, seed=0,
+                 max_hands_per_game=None):
+        if not opponents:
+            raise ValueError("At least two players are required to start a game.")
+        self.num_tables = num_tables
+        self.opponents = opponents  # agent classes or other callables returning an agent
+        self.stack = stack
+        self.seed = seed
+        self.max_hands_per_game = max_hands_per_game
+        self.envs = [None] * num_tables
+        self._earlier_hands = [0] * num_tables  # hands played by each table's replaced games
+
+    def reset(self) -> np.ndarray:
+        """Start a new game at every table and return the (num_tables, OBSERVATION_SIZE) observations."""
+        self.envs = [None] * self.num_tables
+        self._earlier_hands = [0] * self.num_tables
+        for table_id in range(self.num_tables):
+            self._next_hand(table_id)
+        return self.observations()
+
+    def step(self, actions, amounts=None):
+        """
+        Apply one action id per table (and a raise amount per table when
+        raising). Returns (observations, rewards, dones, infos): rewards are
+        the hero's chip change over hands that ended, dones flags them.
+        """
+        rewards = np.zeros(self.num_tables, dtype=np.float32)
+        dones = np.zeros(self.num_tables, dtype=bool)
+        infos = []
+        for table_id, env in enumerate(self.envs):
+            amount = 0 if amounts is None else int(amounts[table_id])
+            _, hand_rewards, done = env.step(int(actions[table_id]), amount)
+            if done:
+                rewards[table_id] = hand_rewards[HERO_NAME] + self._next_hand(table_id)
+                dones[table_id] = True
+            infos.append({'table_id': table_id, 'hands_played': self.hands_played(table_id)})
+        return self.observations(), rewards, dones, infos
+
+    def observations(self) -> np.ndarray:
+        return ag.vectorize_game_states([env.game_state for env in self.envs])
+
+    @property
+    def heroes(self):
+        return [env.controlled[0] for env in self.envs]
+
+    def hands_played(self, table_id) -> int:
+        """Hands the table has finished, across games."""
+        env = self.envs[table_id]
+        return self._earlier_hands[table_id] + (env.hands_played if env is not None else 0)
+
+    def _game_is_over(self, env):
+        if env is None or env.game_over or env.controlled[0].stack == 0:
+            return True
+        return self.max_hands_per_game is not None and env.hands_played >= self.max_hands_per_game
+
+    def _new_env(self, table_id):
+        self._earlier_hands[table_id] = self.hands_played(table_id)
+        players = [pk.Player(name=HERO_NAME, stack=self.stack)] + [
+            pk.Player(name=f"{getattr(opponent, '__name__', 'opponent')}_{seat + 1}", stack=self.stack, agent=opponent())
+            for seat, opponent in enumerate(self.opponents)
+        ]
+        env = PokerEnv(players, maximum_hands=self.max_hands_per_game, seed=self.seed, table_id=table_id)
+        env.game.deck.start_hand(self._earlier_hands[table_id])  # continue the table's deal stream
+        self.envs[table_id] = env
+
+    def _next_hand(self, table_id):
+        """
+        Start the table's next hand, replacing the game when it is over, and
+        return the hero's chips from hands played through without a decision.
+        """
+        chips = 0
+        while True:
+            if self._game_is_over(self.envs[table_id]):
+                self._new_env(table_id)
+            env = self.envs[table_id]
+            game_state = env.reset()
+            chips += env.reset_rewards[HERO_NAME]
+            if game_state is not None:
+                return chips